@@ -6,69 +6,218 @@ Modulo per l'analisi dei dati delle sessioni di studio
 import json
 import datetime
 from collections import defaultdict, Counter
-from dataM import load_sessions
+from dataM import (SESSIONS_FILE, TIMESTAMP_FORMAT, get_sqlite_storage, load_daily_rollup, load_sessions,
+                   load_sessions_since, parse_timestamp)
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
+from records import columns
+from session_snapshot import SessionSnapshot, load_snapshot, save_snapshot
 
 class AnalyticsEngine:
     """Motore per l'analisi dei dati delle sessioni di studio"""
     
     def __init__(self, user):
         self.user = user
-        self.sessions = self._load_user_sessions()
-        self.df = self._create_dataframe()
+        self._offset = 0  # posizione di lettura nel file sessioni
+        self.duration_parse_errors = 0  # righe con durata non interpretabile
+        self.timestamp_parse_errors = 0  # righe scartate per timestamp mancante o illeggibile
+        self._time_index_cache = None  # (df, datetime ordinati, posizioni)
+        self.df = self._load_frame()
     
-    def _load_user_sessions(self):
-        """Carica le sessioni dell'utente"""
+    @property
+    def sessions(self):
+        """Sessioni grezze dell'utente (dalla cache condivisa di dataM)"""
+        return load_sessions(self.user)
+    
+    def _load_frame(self):
+        """Frame iniziale: dallo snapshot colonnare se disponibile, altrimenti dal JSON"""
+        if get_sqlite_storage() is None:
+            try:
+                return self._frame_from_snapshot()
+            except Exception as e:
+                print(f"Avviso: snapshot analytics non disponibile - {e}")
         try:
-            return load_sessions(self.user)
+            tail = load_sessions_since(0, self.user)
+            self._offset = tail.offset
+            return self._build_frame(tail.sessions)
         except Exception as e:
             print(f"Errore nel caricamento sessioni: {e}")
-            return []
+            return pd.DataFrame()
+    
+    def _frame_from_snapshot(self):
+        """
+        Carica lo snapshot colonnare (memory-map), lo aggiorna leggendo solo la
+        coda del JSONL e ne estrae le righe dell'utente
+        """
+        snapshot = load_snapshot(SESSIONS_FILE)
+        tail = load_sessions_since(snapshot.offset if snapshot else 0)
+        if snapshot is None or tail.restarted:
+            snapshot = SessionSnapshot()
+        
+        if tail.sessions or tail.offset != snapshot.offset:
+            new_rows = pd.DataFrame(columns(tail.sessions, ('id', 'user', 'materia', 'durata', 'timestamp')))
+            snapshot = snapshot.extended(
+                ids=new_rows['id'].fillna(0),
+                users=new_rows['user'].tolist(),
+                materie=new_rows['materia'].tolist(),
+                timestamps=self._parse_timestamps(new_rows['timestamp']).to_numpy(dtype='datetime64[s]'),
+                durations=self._parse_durations(new_rows['durata']),
+                offset=tail.offset
+            )
+            save_snapshot(snapshot, SESSIONS_FILE)
+        self._offset = snapshot.offset
+        
+        rows = snapshot.rows_for_user(self.user)
+        if rows is None or len(rows['ids']) == 0:
+            return pd.DataFrame()
+        
+        return self._frame(
+            ids=rows['ids'],
+            users=self.user,
+            materie=np.asarray(snapshot.materie, dtype=object)[rows['materia_codes']],
+            datetimes=rows['timestamps'],
+            minutes=rows['durations'],
+        )
+    
+    def refresh(self):
+        """
+        Legge solo le sessioni salvate dopo l'ultimo caricamento.
+        Ritorna True se i dati sono cambiati.
+        """
+        try:
+            tail = load_sessions_since(self._offset, self.user)
+        except Exception as e:
+            print(f"Errore aggiornamento sessioni: {e}")
+            return False
+        
+        self._offset = tail.offset
+        if tail.restarted:
+            self.df = self._build_frame(tail.sessions)
+        elif tail.sessions:
+            # Solo le nuove righe passano per la costruzione delle colonne derivate
+            new_rows = self._build_frame(tail.sessions)
+            self.df = new_rows if self.df.empty else pd.concat([self.df, new_rows], ignore_index=True)
+        else:
+            return False
+        return True
     
     def _create_dataframe(self):
         """Crea un DataFrame pandas dalle sessioni"""
-        if not self.sessions:
+        return self._build_frame(self.sessions)
+    
+    def _build_frame(self, sessions):
+        """Costruisce le colonne derivate (date/ora/settimana/durata) per un blocco di sessioni"""
+        if not sessions:
             return pd.DataFrame()
         
-        # Converte le sessioni in DataFrame
-        df = pd.DataFrame(self.sessions)
-        
-        if not df.empty:
-            # Converte timestamp in datetime
-            df['datetime'] = pd.to_datetime(df['timestamp'])
-            df['date'] = df['datetime'].dt.date
-            df['hour'] = df['datetime'].dt.hour
-            df['weekday'] = df['datetime'].dt.day_name()
-            df['week'] = df['datetime'].dt.isocalendar().week.astype(int)
-            df['month'] = df['datetime'].dt.month
-            df['year'] = df['datetime'].dt.year
+        # Converte le sessioni in colonne (i record non passano da get() riga per riga)
+        raw = pd.DataFrame(columns(sessions, ('id', 'user', 'materia', 'durata', 'timestamp')))
+        return self._frame(
+            ids=raw['id'].fillna(0),
+            users=raw['user'],
+            materie=raw['materia'],
+            # Formato canonico in blocco, fallback per gli altri
+            datetimes=self._parse_timestamps(raw['timestamp']),
+            # Minuti interi, HH:MM:SS o MM:SS
+            minutes=self._parse_durations(raw['durata']),
+        )
+    
+    def _frame(self, ids, users, materie, datetimes, minutes):
+        """
+        Frame dell'engine con colonne e tipi fissi: snapshot e sessioni JSON/SQLite
+        producono lo stesso schema, quindi refresh() può concatenarli.
+        'durata' è in minuti (float) come 'durata_minuti'. Le righe senza un
+        timestamp leggibile sono scartate (come nel rollup) e contate in
+        self.timestamp_parse_errors.
+        """
+        df = pd.DataFrame({
+            'id': np.asarray(ids, dtype=np.int64),
+            'user': np.asarray(users, dtype=object) if not isinstance(users, str) else users,
+            'materia': np.asarray(materie, dtype=object),
+            'durata': np.asarray(minutes, dtype=np.float64),
+            'datetime': np.asarray(datetimes, dtype='datetime64[ns]'),
+        })
+        unreadable = df['datetime'].isna()
+        if unreadable.any():
+            self.timestamp_parse_errors += int(unreadable.sum())
+            df = df[~unreadable].reset_index(drop=True)
+        self._add_calendar_columns(df)
+        df['durata_minuti'] = df['durata']
+        df['durata_ore'] = df['durata_minuti'] / 60
+        return df
+    
+    def _add_calendar_columns(self, df):
+        """Colonne di calendario derivate da df['datetime']"""
+        df['date'] = df['datetime'].dt.date
+        df['hour'] = df['datetime'].dt.hour
+        df['weekday'] = df['datetime'].dt.day_name()
+        df['week'] = df['datetime'].dt.isocalendar().week.astype(int)
+        df['month'] = df['datetime'].dt.month
+        df['year'] = df['datetime'].dt.year
+    
+    def _parse_timestamps(self, timestamps):
+        """
+        Converte la colonna timestamp: il formato canonico in blocco, gli altri
+        con dataM.parse_timestamp (stessi formati storici del rollup, es.
+        dd/mm/YYYY). I valori illeggibili diventano NaT.
+        """
+        parsed = pd.to_datetime(timestamps, format=TIMESTAMP_FORMAT, errors='coerce')
+        others = parsed.isna() & timestamps.notna()
+        if others.any():
+            parsed[others] = pd.to_datetime(timestamps[others].map(parse_timestamp), errors='coerce')
+        return parsed
+    
+    def _parse_durations(self, durations):
+        """
+        Converte in blocco la colonna durata in minuti (minuti numerici,
+        "HH:MM:SS" o "MM:SS"). Le righe non interpretabili valgono 0 e sono
+        contate in self.duration_parse_errors.
+        """
+        if pd.api.types.is_numeric_dtype(durations):
+            minutes = durations.astype(float)
+        else:
+            minutes = pd.Series(np.nan, index=durations.index)
+            kinds = durations.map(type)
+            
+            numeric = kinds.isin((int, float))
+            minutes[numeric] = durations[numeric].astype(float)
             
-            # Converte durata in minuti (assumendo che sia in formato HH:MM:SS)
-            df['durata_minuti'] = df['durata'].apply(self._parse_duration)
-            df['durata_ore'] = df['durata_minuti'] / 60
+            textual = kinds == str
+            if textual.any():
+                minutes[textual] = self._parse_duration_strings(
+                    np.char.strip(np.asarray(durations[textual], dtype=str))
+                )
         
-        return df
+        bad_rows = int(minutes.isna().sum())
+        if bad_rows:
+            self.duration_parse_errors += bad_rows
+        return minutes.fillna(0)
+    
+    def _parse_duration_strings(self, text):
+        """Minuti da un array di stringhe, raggruppate per numero di ':'"""
+        colons = np.char.count(text, ':')
+        values = np.full(len(text), np.nan)
+        
+        plain = colons == 0
+        values[plain] = pd.to_numeric(text[plain], errors='coerce')
+        
+        # MM:SS e HH:MM:SS: peso di ogni campo in minuti
+        for n_colons, weights in ((1, (1, 1 / 60)), (2, (60, 1, 1 / 60))):
+            rows = colons == n_colons
+            if rows.any():
+                values[rows] = self._split_duration_fields(text[rows], len(weights)) @ np.array(weights)
+        return values
     
-    def _parse_duration(self, duration_str):
-        """Converte la durata da stringa a minuti"""
+    def _split_duration_fields(self, text, n_fields):
+        """Matrice (righe x campi) dei valori numerici separati da ':'"""
         try:
-            if isinstance(duration_str, str):
-                # Formato HH:MM:SS o MM:SS
-                parts = duration_str.split(':')
-                if len(parts) == 3:  # HH:MM:SS
-                    hours, minutes, seconds = map(float, parts)
-                    return hours * 60 + minutes + seconds / 60
-                elif len(parts) == 2:  # MM:SS
-                    minutes, seconds = map(float, parts)
-                    return minutes + seconds / 60
-                else:
-                    return float(duration_str)
-            return float(duration_str)
-        except (ValueError, AttributeError, TypeError):
-            print(f"Errore parsing durata: {duration_str}")
-            return 0
+            # Percorso veloce: un solo parsing in C di tutte le righe del gruppo
+            return np.fromstring(':'.join(text.tolist()), sep=':').reshape(-1, n_fields)
+        except ValueError:
+            # Qualche campo non numerico: parsing per colonna con NaN sulle righe errate
+            fields = pd.Series(text).str.split(':', expand=True)
+            return fields.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
     
     def get_total_study_time(self, period="tutto"):
         """Calcola il tempo totale di studio"""
@@ -89,26 +238,43 @@ class AnalyticsEngine:
         
         return filtered_df.groupby('materia')['durata_ore'].sum().to_dict()
     
+    def _rollup_frame(self):
+        """Totali giornalieri (materia, giorno) dal rollup di dataM, con colonne di calendario"""
+        rollup = load_daily_rollup(self.user)
+        rows = [(materia, day, entry[0], entry[1])
+                for materia, days in rollup.items() for day, entry in days.items()]
+        df = pd.DataFrame(rows, columns=['materia', 'day', 'minuti', 'sessioni'])
+        dates = pd.to_datetime(df['day'], format='%Y-%m-%d', errors='coerce')
+        df = df[dates.notna()]
+        dates = dates[dates.notna()]
+        df['date'] = dates.dt.date
+        df['week'] = dates.dt.isocalendar().week.astype(int)
+        df['month'] = dates.dt.month
+        df['year'] = dates.dt.year
+        df['durata_ore'] = df['minuti'] / 60
+        return df
+    
     def get_daily_study_stats(self, days=30):
         """Statistiche giornaliere degli ultimi N giorni"""
-        if self.df.empty:
+        rollup_df = self._rollup_frame()
+        if rollup_df.empty:
             return []
         
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
         
         # Filtra per periodo
-        mask = (self.df['date'] >= start_date) & (self.df['date'] <= end_date)
-        filtered_df = self.df[mask]
+        mask = (rollup_df['date'] >= start_date) & (rollup_df['date'] <= end_date)
+        filtered_df = rollup_df[mask]
         
         if filtered_df.empty:
             return []
         
-        # Raggruppa per data
+        # Raggruppa per data (una riga del rollup per materia studiata nel giorno)
         daily_stats = filtered_df.groupby('date').agg({
             'durata_ore': 'sum',
-            'id': 'count',  # numero sessioni
-            'materia': lambda x: len(x.unique())  # numero materie diverse
+            'sessioni': 'sum',
+            'materia': 'nunique'  # numero materie diverse
         }).reset_index()
         
         daily_stats.columns = ['data', 'ore_totali', 'sessioni', 'materie_diverse']
@@ -117,16 +283,17 @@ class AnalyticsEngine:
     
     def get_weekly_study_stats(self, weeks=4):
         """Statistiche settimanali"""
-        if self.df.empty:
+        rollup_df = self._rollup_frame()
+        if rollup_df.empty:
             return []
         
         # Filtra per le ultime N settimane
         current_week = datetime.now().isocalendar().week
         current_year = datetime.now().year
         
-        filtered_df = self.df[
-            (self.df['year'] == current_year) & 
-            (self.df['week'] >= current_week - weeks)
+        filtered_df = rollup_df[
+            (rollup_df['year'] == current_year) & 
+            (rollup_df['week'] >= current_week - weeks)
         ]
         
         if filtered_df.empty:
@@ -134,7 +301,7 @@ class AnalyticsEngine:
         
         weekly_stats = filtered_df.groupby(['year', 'week']).agg({
             'durata_ore': 'sum',
-            'materia': 'count'
+            'sessioni': 'sum'
         }).reset_index()
         
         weekly_stats.columns = ['anno', 'settimana', 'ore_totali', 'sessioni']
@@ -143,16 +310,17 @@ class AnalyticsEngine:
     
     def get_monthly_study_stats(self, months=6):
         """Statistiche mensili"""
-        if self.df.empty:
+        rollup_df = self._rollup_frame()
+        if rollup_df.empty:
             return []
         
         current_month = datetime.now().month
         current_year = datetime.now().year
         
         # Filtra per gli ultimi N mesi
-        filtered_df = self.df[
-            ((self.df['year'] == current_year) & (self.df['month'] >= current_month - months)) |
-            ((self.df['year'] == current_year - 1) & (self.df['month'] >= 12 - (months - current_month)))
+        filtered_df = rollup_df[
+            ((rollup_df['year'] == current_year) & (rollup_df['month'] >= current_month - months)) |
+            ((rollup_df['year'] == current_year - 1) & (rollup_df['month'] >= 12 - (months - current_month)))
         ]
         
         if filtered_df.empty:
@@ -160,7 +328,7 @@ class AnalyticsEngine:
         
         monthly_stats = filtered_df.groupby(['year', 'month']).agg({
             'durata_ore': 'sum',
-            'materia': 'count'
+            'sessioni': 'sum'
         }).reset_index()
         
         monthly_stats.columns = ['anno', 'mese', 'ore_totali', 'sessioni']
@@ -209,20 +377,57 @@ class AnalyticsEngine:
             'most_productive_day': day_stats.idxmax() if not day_stats.empty else 'N/D'
         }
     
+    def _time_index(self):
+        """
+        Datetime ordinati e posizioni di riga corrispondenti (righe con data
+        valida), ricalcolati solo quando self.df viene sostituito. Le sessioni
+        arrivano già in ordine, quindi l'ordinamento stabile è quasi lineare.
+        """
+        cache = self._time_index_cache
+        if cache is None or cache[0] is not self.df:
+            times = self.df['datetime'].to_numpy(dtype='datetime64[ns]')
+            valid = np.flatnonzero(~np.isnat(times))
+            order = valid[np.argsort(times[valid], kind='stable')]
+            cache = self._time_index_cache = (self.df, times[order], order)
+        return cache[1], cache[2]
+    
+    def _rows_between(self, start, end=None):
+        """Righe con start <= datetime < end via ricerca binaria, nell'ordine del DataFrame"""
+        times, order = self._time_index()
+        lo = np.searchsorted(times, np.datetime64(start, 'ns'), side='left')
+        hi = len(times) if end is None else np.searchsorted(times, np.datetime64(end, 'ns'), side='left')
+        return self.df.iloc[np.sort(order[lo:max(lo, hi)])]
+    
     def _filter_by_period(self, period):
-        """Filtra il DataFrame per periodo"""
+        """Filtra il DataFrame per periodo (costo proporzionale alle righe del periodo)"""
         if self.df.empty or period in ["all", "tutto"]:
             return self.df
         
         now = datetime.now()
         
         if period in ["today", "oggi"]:
-            return self.df[self.df['date'] == now.date()]
+            midnight = datetime.combine(now.date(), datetime.min.time())
+            return self._rows_between(midnight, midnight + timedelta(days=1))
         elif period in ["week", "settimana"]:
-            start_week = now - timedelta(days=7)
-            return self.df[self.df['datetime'] >= start_week]
+            return self._rows_between(now - timedelta(days=7))
         elif period in ["month", "mese"]:
-            start_month = now - timedelta(days=30)
-            return self.df[self.df['datetime'] >= start_month]
+            return self._rows_between(now - timedelta(days=30))
         else:
-            return self.df
\ No newline at end of file
+            return self.df
+
+
+_engines = {}
+
+
+def get_analytics_engine(user):
+    """
+    Motore condiviso per utente: viene costruito una volta sola e alle
+    aperture successive legge solo le sessioni nuove.
+    """
+    engine = _engines.get(user)
+    if engine is None:
+        engine = AnalyticsEngine(user)
+        _engines[user] = engine
+    else:
+        engine.refresh()
+    return engine
@@ -0,0 +1,162 @@
+"""
+Export dei grafici da riga di comando per TimeTrackerT2
+Genera i grafici dell'Analytics in PNG/SVG senza interfaccia (backend Agg),
+per uno o tutti gli utenti, ad esempio per preparare i report settimanali
+su un server senza display.
+
+Ogni utente viene elaborato in un processo separato: l'AnalyticsEngine è
+costruito una sola volta per utente e usato per tutti i grafici.
+
+Uso:
+    python chart_export.py                          # tutti gli utenti
+    python chart_export.py --user Anna --format svg
+    python chart_export.py --chart dashboard --chart pattern_orario --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import matplotlib
+matplotlib.use('Agg')  # nessun Tk: deve precedere ogni import di pyplot
+
+import dataM
+
+OUTPUT_DIR = 'report_grafici'
+FORMATS = ('png', 'svg')
+PERIODS = ('tutto', 'oggi', 'settimana', 'mese')
+
+# nome grafico -> funzione (ChartGenerator, periodo) -> Figure
+CHARTS = {
+    'dashboard': lambda gen, period: gen.create_productivity_dashboard(),
+    'materie_torta': lambda gen, period: gen.create_subject_distribution_chart(period, 'pie'),
+    'materie_barre': lambda gen, period: gen.create_subject_distribution_chart(period, 'bar'),
+    'pattern_orario': lambda gen, period: gen.create_hourly_heatmap(),
+    'pattern_settimanale': lambda gen, period: gen.create_weekday_pattern_chart(),
+    'trend_giornaliero': lambda gen, period: gen.create_daily_trend_chart(30),
+    'confronto_settimanale': lambda gen, period: gen.create_weekly_comparison_chart(),
+}
+
+
+def _safe_name(name: str) -> str:
+    """Nome utilizzabile come cartella"""
+    return "".join(c if c.isalnum() or c in ' -_.' else '_' for c in name).strip() or '_'
+
+
+def export_user_charts(user: str, charts: List[str], output_dir: str = OUTPUT_DIR,
+                       fmt: str = 'png', period: str = 'settimana', dpi: int = 100) -> Dict[str, str]:
+    """
+    Esporta i grafici richiesti per un utente in output_dir/<utente>/<grafico>.<fmt>.
+    Ritorna {grafico: percorso} per quelli riusciti e {grafico: 'ERRORE: ...'} per gli altri.
+    """
+    from analytics_engine import AnalyticsEngine
+    from chart_generator import ChartGenerator
+
+    user_dir = os.path.join(output_dir, _safe_name(user))
+    os.makedirs(user_dir, exist_ok=True)
+
+    chart_gen = ChartGenerator(AnalyticsEngine(user))
+    results = {}
+    for chart in charts:
+        path = os.path.join(user_dir, f"{chart}.{fmt}")
+        try:
+            figure = CHARTS[chart](chart_gen, period)
+            figure.savefig(path, format=fmt, dpi=dpi, facecolor=figure.get_facecolor())
+            results[chart] = path
+        except Exception as e:
+            results[chart] = f"ERRORE: {e}"
+    return results
+
+
+def _prepare_shared_caches(user: str):
+    """
+    Aggiorna una volta, nel processo principale, i file derivati condivisi
+    (indice, rollup, snapshot colonnare): i processi di lavoro li trovano
+    già allineati e non li riscrivono in parallelo.
+    """
+    if dataM.get_sqlite_storage() is None:
+        dataM.get_session_rollup().refresh()
+        from analytics_engine import AnalyticsEngine
+        AnalyticsEngine(user)
+
+
+def export_charts(users: Optional[List[str]] = None, charts: Optional[List[str]] = None,
+                  output_dir: str = OUTPUT_DIR, fmt: str = 'png', period: str = 'settimana',
+                  workers: Optional[int] = None, dpi: int = 100) -> Dict[str, Dict[str, str]]:
+    """
+    Esporta i grafici per più utenti in un pool di processi.
+    Con un solo utente (o workers=1) lavora nel processo corrente.
+    Ritorna {utente: {grafico: percorso o errore}}.
+    """
+    users = users if users is not None else dataM.load_user()
+    charts = charts or list(CHARTS)
+    unknown = [chart for chart in charts if chart not in CHARTS]
+    if unknown:
+        raise ValueError(f"Grafici sconosciuti: {', '.join(unknown)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato non supportato: {fmt}")
+    if not users:
+        return {}
+
+    if workers is None:
+        workers = min(len(users), os.cpu_count() or 1)
+
+    if workers <= 1 or len(users) == 1:
+        return {user: export_user_charts(user, charts, output_dir, fmt, period, dpi) for user in users}
+
+    _prepare_shared_caches(users[0])
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(export_user_charts, user, charts, output_dir, fmt, period, dpi): user
+            for user in users
+        }
+        for future in as_completed(futures):
+            user = futures[future]
+            try:
+                results[user] = future.result()
+            except Exception as e:
+                results[user] = {chart: f"ERRORE: {e}" for chart in charts}
+    return {user: results[user] for user in users}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Esporta i grafici Analytics di TimeTrackerT2 senza GUI")
+    parser.add_argument('--user', action='append', dest='users',
+                        help="utente da esportare (ripetibile, default: tutti)")
+    parser.add_argument('--chart', action='append', dest='charts', choices=sorted(CHARTS),
+                        help="grafico da esportare (ripetibile, default: tutti)")
+    parser.add_argument('--format', default='png', choices=FORMATS)
+    parser.add_argument('--period', default='settimana', choices=PERIODS,
+                        help="periodo per i grafici delle materie")
+    parser.add_argument('--output', default=OUTPUT_DIR, help="cartella di destinazione")
+    parser.add_argument('--workers', type=int, default=None, help="processi di lavoro")
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        results = export_charts(args.users, args.charts, args.output, args.format,
+                                args.period, args.workers, args.dpi)
+    except Exception as e:
+        print(f"❌ Export fallito: {e}")
+        return 1
+
+    failures = 0
+    for user, charts in results.items():
+        print(f"👤 {user}")
+        for chart, outcome in charts.items():
+            if outcome.startswith("ERRORE"):
+                failures += 1
+                print(f"   ❌ {chart}: {outcome}")
+            else:
+                print(f"   ✅ {chart}: {outcome}")
+    print(f"\n🎯 {len(results)} utenti esportati in {time.perf_counter() - start:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
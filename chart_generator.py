@@ -3,269 +3,451 @@ Chart Generator per TimeTrackerT2
 Modulo per la generazione di grafici per l'analisi dei dati
 """
 
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.figure import Figure
-import seaborn as sns
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import tkinter as tk
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import dataM
+
+_style_applied = False
+
+
+def apply_chart_style():
+    """
+    Tema scuro per matplotlib, applicato al primo ChartGenerator invece che
+    all'import (seaborn serve solo per la palette e si carica qui).
+    """
+    global _style_applied
+    if _style_applied:
+        return
+    _style_applied = True
+    try:
+        import matplotlib.style
+        import seaborn as sns
+        
+        matplotlib.style.use('dark_background')
+        sns.set_palette("husl")
+    except Exception as e:
+        print(f"Avviso: configurazione stile matplotlib - {e}")
+        # Usa configurazione di default se dark_background non è disponibile
+
+
+PERIOD_NAMES = {'tutto': 'Tutto', 'oggi': 'Oggi', 'settimana': 'Settimana', 'mese': 'Mese',
+                'all': 'Tutto', 'today': 'Oggi', 'week': 'Settimana', 'month': 'Mese'}
+
+ITALIAN_DAYS = {
+    'Monday': 'Lunedì', 'Tuesday': 'Martedì', 'Wednesday': 'Mercoledì',
+    'Thursday': 'Giovedì', 'Friday': 'Venerdì', 'Saturday': 'Sabato', 'Sunday': 'Domenica'
+}
+
+
+# Limite di memoria della cache dei grafici rasterizzati (buffer RGBA)
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RenderCache:
+    """
+    Cache LRU dei grafici già rasterizzati: chiave -> (larghezza, altezza,
+    byte RGBA del buffer Agg). Oltre max_bytes si scartano i meno usati.
+    """
+    
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, width, height, rgba):
+        """Memorizza un buffer RGBA; quelli più grandi del limite non entrano"""
+        rgba = bytes(rgba)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[2])
+            if len(rgba) > self.max_bytes:
+                return
+            self._entries[key] = (width, height, rgba)
+            self.size += len(rgba)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# Condivisa tra le finestre: riaprire l'Analytics senza nuove sessioni
+# mostra i grafici già disegnati senza ricalcolarli
+_render_cache = RenderCache()
+
+
+def get_render_cache():
+    return _render_cache
+
+
+def chart_cache_key(user, chart, period=None, version=None):
+    """
+    Chiave della cache: (utente, grafico, periodo, versione sessioni, giorno).
+    Il giorno serve perché 'oggi' e 'settimana' cambiano a mezzanotte.
+    None se la versione dei dati non è disponibile (niente cache).
+    """
+    if version is None:
+        version = dataM.sessions_version()
+        if version is None:
+            return None
+    return (user, chart, period, version, date.today().isoformat())
+
+
+class _PersistentChart:
+    """Figura riutilizzata da un tipo di grafico, con gli artisti da aggiornare"""
+    
+    def __init__(self, figsize):
+        self.figure = Figure(figsize=figsize, facecolor='#2b2b2b')
+        self.data = None     # dati dell'ultimo disegno
+        self.layout = None   # struttura degli artisti (es. etichette delle barre)
+        self.artists = {}
 
-# Configurazione tema scuro per matplotlib
-try:
-    plt.style.use('dark_background')
-    sns.set_palette("husl")
-except Exception as e:
-    print(f"Avviso: configurazione stile matplotlib - {e}")
-    # Usa configurazione di default se dark_background non è disponibile
 
 class ChartGenerator:
-    """Generatore di grafici per l'analisi dei dati"""
+    """
+    Generatore di grafici per l'analisi dei dati.
+    Ogni tipo di grafico ha una Figure persistente: se cambiano solo i valori
+    gli artisti esistenti vengono aggiornati (altezze, angoli, set_data),
+    se cambia la struttura la figura viene svuotata e ridisegnata.
+    """
     
-    def __init__(self, analytics_engine):
+    def __init__(self, analytics_engine, render_cache=None):
         self.engine = analytics_engine
         self.colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F']
-        
+        self._charts = {}
+        # Le figure vengono aggiornate nel thread di lavoro e disegnate dalla GUI
+        self.lock = threading.RLock()
+        self.render_cache = render_cache if render_cache is not None else _render_cache
+        apply_chart_style()
+    
+    # ===== FIGURE PERSISTENTI =====
+    def _chart(self, key, figsize):
+        chart = self._charts.get(key)
+        if chart is None:
+            chart = self._charts[key] = _PersistentChart(figsize)
+        return chart
+    
+    def _refresh(self, chart, data, layout, draw, update=None):
+        """
+        Porta la figura ai nuovi dati: nessun lavoro se sono invariati,
+        update() se la struttura è la stessa, altrimenti draw() da zero.
+        """
+        with self.lock:
+            if chart.data == data:
+                return chart.figure
+            if update is not None and chart.layout == layout:
+                update()
+            else:
+                chart.figure.clear()
+                chart.artists = {}
+                draw()
+                chart.layout = layout
+            chart.data = data
+        return chart.figure
+    
+    def _empty(self, chart, message):
+        return self._refresh(chart, ('empty', message), ('empty', message),
+                             lambda: self._draw_empty(chart.figure, message))
+    
+    def render(self, figure):
+        """
+        Rasterizza la figura nel buffer Agg del suo canvas senza toccare Tk
+        (utilizzabile dal thread di lavoro): alla GUI resta solo il blit.
+        Ritorna False se la figura non ha ancora un canvas Agg.
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        canvas = figure.canvas
+        if not isinstance(canvas, FigureCanvasAgg):
+            return False
+        with self.lock:
+            FigureCanvasAgg.draw(canvas)
+        return True
+    
+    def cache_rendered(self, key, figure):
+        """Salva nella cache il buffer Agg già disegnato della figura"""
+        renderer = getattr(figure.canvas, 'renderer', None)  # presente dopo il primo draw
+        if key is None or renderer is None:
+            return
+        with self.lock:
+            self.render_cache.put(key, int(renderer.width), int(renderer.height), renderer.buffer_rgba())
+    
+    # ===== GRAFICI =====
     def create_subject_distribution_chart(self, period="tutto", chart_type="pie"):
         """Crea grafico distribuzione tempo per materia"""
         data = self.engine.get_study_time_by_subject(period)
+        chart = self._chart(('subject', chart_type), (10, 6))
         
         if not data:
-            return self._create_empty_chart("Nessun dato disponibile")
+            return self._empty(chart, "Nessun dato disponibile")
         
-        fig = Figure(figsize=(10, 6), facecolor='#2b2b2b')
+        labels = list(data.keys())
+        values = list(data.values())
+        period_display = PERIOD_NAMES.get(period, period)
         
         if chart_type == "pie":
-            ax = fig.add_subplot(111)
-            wedges, texts, autotexts = ax.pie(
-                data.values(), 
-                labels=data.keys(),
-                autopct='%1.1f%%',
-                colors=self.colors[:len(data)],
-                startangle=90
-            )
-            
-            # Personalizza i testi
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontsize(10)
-            
-            for text in texts:
-                text.set_color('white')
-                text.set_fontsize(11)
-            
-            period_names = {'tutto': 'Tutto', 'oggi': 'Oggi', 'settimana': 'Settimana', 'mese': 'Mese', 'all': 'Tutto', 'today': 'Oggi', 'week': 'Settimana', 'month': 'Mese'}
-            period_display = period_names.get(period, period)
-            ax.set_title(f'Distribuzione Tempo per Materia ({period_display})', 
-                        color='white', fontsize=14, pad=20)
-                        
-        else:  # bar chart
-            ax = fig.add_subplot(111)
-            bars = ax.bar(data.keys(), data.values(), color=self.colors[:len(data)])
+            title = f'Distribuzione Tempo per Materia ({period_display})'
             
-            period_names = {'tutto': 'Tutto', 'oggi': 'Oggi', 'settimana': 'Settimana', 'mese': 'Mese', 'all': 'Tutto', 'today': 'Oggi', 'week': 'Settimana', 'month': 'Mese'}
-            period_display = period_names.get(period, period)
-            ax.set_title(f'Ore di Studio per Materia ({period_display})', 
-                        color='white', fontsize=14, pad=20)
+            def draw():
+                ax = chart.figure.add_subplot(111)
+                wedges, texts, autotexts = ax.pie(
+                    values, 
+                    labels=labels,
+                    autopct='%1.1f%%',
+                    colors=self.colors[:len(data)],
+                    startangle=90
+                )
+                
+                # Personalizza i testi
+                for autotext in autotexts:
+                    autotext.set_color('white')
+                    autotext.set_fontsize(10)
+                
+                for text in texts:
+                    text.set_color('white')
+                    text.set_fontsize(11)
+                
+                title_artist = ax.set_title(title, color='white', fontsize=14, pad=20)
+                chart.artists = {'pie': (wedges, texts, autotexts), 'title': title_artist}
+                chart.figure.patch.set_facecolor('#2b2b2b')
+                chart.figure.tight_layout()
+            
+            def update():
+                self._update_pie(*chart.artists['pie'], values, startangle=90)
+                chart.artists['title'].set_text(title)
+            
+            return self._refresh(chart, (labels, values, title), ('pie', labels), draw, update)
+        
+        # bar chart
+        title = f'Ore di Studio per Materia ({period_display})'
+        
+        def draw():
+            ax = chart.figure.add_subplot(111)
+            bars = ax.bar(labels, values, color=self.colors[:len(data)])
+            
+            title_artist = ax.set_title(title, color='white', fontsize=14, pad=20)
             ax.set_xlabel('Materie', color='white')
             ax.set_ylabel('Ore di Studio', color='white')
             
             # Personalizza l'aspetto
-            ax.tick_params(colors='white')
-            ax.spines['bottom'].set_color('white')
-            ax.spines['left'].set_color('white')
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
+            self._style_axes(ax)
             
             # Aggiungi valori sopra le barre
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{height:.1f}h', ha='center', va='bottom', color='white')
-        
-        fig.patch.set_facecolor('#2b2b2b')
-        fig.tight_layout()
-        return fig
+            chart.artists = {
+                'ax': ax, 'bars': bars, 'values': self._bar_value_labels(ax, bars), 'title': title_artist
+            }
+            chart.figure.patch.set_facecolor('#2b2b2b')
+            chart.figure.tight_layout()
+        
+        def update():
+            self._update_bars(chart.artists['ax'], chart.artists['bars'], chart.artists['values'], values)
+            chart.artists['title'].set_text(title)
+        
+        return self._refresh(chart, (labels, values, title), ('bar', labels), draw, update)
     
     def create_daily_trend_chart(self, days=30):
         """Crea grafico trend giornaliero"""
         data = self.engine.get_daily_study_stats(days)
+        chart = self._chart(('daily_trend', days), (12, 6))
         
         if not data:
-            return self._create_empty_chart("Nessun dato per il trend giornaliero")
+            return self._empty(chart, "Nessun dato per il trend giornaliero")
         
         df = pd.DataFrame(data)
-        df['data'] = pd.to_datetime(df['data'])
-        
-        fig = Figure(figsize=(12, 6), facecolor='#2b2b2b')
-        ax = fig.add_subplot(111)
-        
-        # Crea il grafico a linee
-        ax.plot(df['data'], df['ore_totali'], 
-               marker='o', linewidth=2, markersize=6, 
-               color='#4ECDC4', markerfacecolor='#FF6B6B')
+        dates = pd.to_datetime(df['data'])
+        hours = df['ore_totali'].tolist()
         
-        # Personalizza l'aspetto
-        ax.set_title(f'Trend Studio Giornaliero ({days} giorni)', 
-                    color='white', fontsize=14, pad=20)
-        ax.set_xlabel('Data', color='white')
-        ax.set_ylabel('Ore di Studio', color='white')
-        
-        # Formatta le date sull'asse x
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, days//10)))
-        
-        # Personalizza colori
-        ax.tick_params(colors='white')
-        ax.spines['bottom'].set_color('white')
-        ax.spines['left'].set_color('white')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
+        def draw():
+            ax = chart.figure.add_subplot(111)
+            
+            # Crea il grafico a linee
+            line, = ax.plot(dates, hours, 
+                            marker='o', linewidth=2, markersize=6, 
+                            color='#4ECDC4', markerfacecolor='#FF6B6B')
+            
+            # Personalizza l'aspetto
+            ax.set_title(f'Trend Studio Giornaliero ({days} giorni)', 
+                        color='white', fontsize=14, pad=20)
+            ax.set_xlabel('Data', color='white')
+            ax.set_ylabel('Ore di Studio', color='white')
+            
+            # Formatta le date sull'asse x
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
+            ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, days//10)))
+            
+            # Personalizza colori
+            self._style_axes(ax)
+            
+            # Aggiungi griglia
+            ax.grid(True, alpha=0.3, color='white')
+            
+            chart.artists = {'ax': ax, 'line': line}
+            chart.figure.patch.set_facecolor('#2b2b2b')
+            chart.figure.tight_layout()
         
-        # Aggiungi griglia
-        ax.grid(True, alpha=0.3, color='white')
+        def update():
+            ax = chart.artists['ax']
+            chart.artists['line'].set_data(dates, hours)
+            ax.relim()
+            ax.autoscale_view()
         
-        fig.patch.set_facecolor('#2b2b2b')
-        fig.tight_layout()
-        return fig
+        return self._refresh(chart, (df['data'].tolist(), hours), ('line',), draw, update)
     
     def create_weekly_comparison_chart(self):
         """Crea grafico comparativo settimanale"""
         data = self.engine.get_weekly_study_stats(4)
+        chart = self._chart('weekly_comparison', (10, 6))
         
         if not data:
-            return self._create_empty_chart("Nessun dato per il confronto settimanale")
-        
-        df = pd.DataFrame(data)
-        
-        fig = Figure(figsize=(10, 6), facecolor='#2b2b2b')
-        ax = fig.add_subplot(111)
+            return self._empty(chart, "Nessun dato per il confronto settimanale")
         
         # Crea etichette per le settimane
-        labels = [f"Sett. {row['settimana']}" for _, row in df.iterrows()]
-        
-        bars = ax.bar(labels, df['ore_totali'], color=self.colors[:len(df)])
-        
-        ax.set_title('Confronto Studio Settimanale', color='white', fontsize=14, pad=20)
-        ax.set_xlabel('Settimane', color='white')
-        ax.set_ylabel('Ore Totali', color='white')
+        labels = [f"Sett. {row['settimana']}" for row in data]
+        values = [row['ore_totali'] for row in data]
         
-        # Personalizza l'aspetto
-        ax.tick_params(colors='white')
-        ax.spines['bottom'].set_color('white')
-        ax.spines['left'].set_color('white')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
+        def draw():
+            ax = chart.figure.add_subplot(111)
+            bars = ax.bar(labels, values, color=self.colors[:len(values)])
+            
+            ax.set_title('Confronto Studio Settimanale', color='white', fontsize=14, pad=20)
+            ax.set_xlabel('Settimane', color='white')
+            ax.set_ylabel('Ore Totali', color='white')
+            
+            # Personalizza l'aspetto
+            self._style_axes(ax)
+            
+            # Aggiungi valori sopra le barre
+            chart.artists = {'ax': ax, 'bars': bars, 'values': self._bar_value_labels(ax, bars)}
+            chart.figure.patch.set_facecolor('#2b2b2b')
+            chart.figure.tight_layout()
         
-        # Aggiungi valori sopra le barre
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{height:.1f}h', ha='center', va='bottom', color='white')
+        def update():
+            self._update_bars(chart.artists['ax'], chart.artists['bars'], chart.artists['values'], values)
         
-        fig.patch.set_facecolor('#2b2b2b')
-        fig.tight_layout()
-        return fig
+        return self._refresh(chart, (labels, values), ('bar', labels), draw, update)
     
     def create_hourly_heatmap(self):
         """Crea heatmap delle ore di studio"""
         pattern = self.engine.get_study_pattern_by_hour()
+        chart = self._chart('hourly_heatmap', (12, 4))
         
         if not pattern:
-            return self._create_empty_chart("Nessun dato per il pattern orario")
+            return self._empty(chart, "Nessun dato per il pattern orario")
         
         # Prepara i dati per la heatmap
         hours = list(range(24))
         study_hours = [pattern.get(hour, 0) for hour in hours]
         
-        fig = Figure(figsize=(12, 4), facecolor='#2b2b2b')
-        ax = fig.add_subplot(111)
-        
         # Crea matrice per heatmap
         data_matrix = np.array(study_hours).reshape(1, -1)
         
-        im = ax.imshow(data_matrix, cmap='YlOrRd', aspect='auto')
-        
-        # Personalizza assi
-        ax.set_xticks(range(24))
-        ax.set_xticklabels([f"{h}:00" for h in hours])
-        ax.set_yticks([])
-        ax.set_xlabel('Ora del Giorno', color='white')
-        ax.set_title('Pattern di Studio per Ora', color='white', fontsize=14, pad=20)
-        
-        # Aggiungi colorbar
-        cbar = fig.colorbar(im, ax=ax)
-        cbar.set_label('Ore di Studio', color='white')
-        cbar.ax.yaxis.label.set_color('white')
-        cbar.ax.tick_params(colors='white')
+        def draw():
+            fig = chart.figure
+            ax = fig.add_subplot(111)
+            
+            im = ax.imshow(data_matrix, cmap='YlOrRd', aspect='auto')
+            
+            # Personalizza assi
+            ax.set_xticks(range(24))
+            ax.set_xticklabels([f"{h}:00" for h in hours])
+            ax.set_yticks([])
+            ax.set_xlabel('Ora del Giorno', color='white')
+            ax.set_title('Pattern di Studio per Ora', color='white', fontsize=14, pad=20)
+            
+            # Aggiungi colorbar
+            cbar = fig.colorbar(im, ax=ax)
+            cbar.set_label('Ore di Studio', color='white')
+            cbar.ax.yaxis.label.set_color('white')
+            cbar.ax.tick_params(colors='white')
+            
+            # Personalizza colori
+            ax.tick_params(colors='white')
+            
+            chart.artists = {'image': im}
+            fig.patch.set_facecolor('#2b2b2b')
+            fig.tight_layout()
         
-        # Personalizza colori
-        ax.tick_params(colors='white')
+        def update():
+            # La colorbar segue la nuova scala dell'immagine
+            im = chart.artists['image']
+            im.set_data(data_matrix)
+            im.set_clim(data_matrix.min(), data_matrix.max())
         
-        fig.patch.set_facecolor('#2b2b2b')
-        fig.tight_layout()
-        return fig
+        return self._refresh(chart, study_hours, ('heatmap',), draw, update)
     
     def create_weekday_pattern_chart(self):
         """Crea grafico pattern settimanale"""
         pattern = self.engine.get_study_pattern_by_weekday()
+        chart = self._chart('weekday_pattern', (10, 6))
         
         if not pattern:
-            return self._create_empty_chart("Nessun dato per il pattern settimanale")
+            return self._empty(chart, "Nessun dato per il pattern settimanale")
         
         # Giorni in italiano
-        italian_days = {
-            'Monday': 'Lunedì', 'Tuesday': 'Martedì', 'Wednesday': 'Mercoledì',
-            'Thursday': 'Giovedì', 'Friday': 'Venerdì', 'Saturday': 'Sabato', 'Sunday': 'Domenica'
-        }
-        
-        days = list(pattern.keys())
         values = list(pattern.values())
-        italian_labels = [italian_days.get(day, day) for day in days]
-        
-        fig = Figure(figsize=(10, 6), facecolor='#2b2b2b')
-        ax = fig.add_subplot(111)
-        
-        bars = ax.bar(italian_labels, values, color=self.colors[:len(days)])
+        italian_labels = [ITALIAN_DAYS.get(day, day) for day in pattern.keys()]
         
-        ax.set_title('Pattern di Studio per Giorno della Settimana', 
-                    color='white', fontsize=14, pad=20)
-        ax.set_xlabel('Giorno', color='white')
-        ax.set_ylabel('Ore di Studio', color='white')
-        
-        # Personalizza l'aspetto
-        ax.tick_params(colors='white')
-        ax.spines['bottom'].set_color('white')
-        ax.spines['left'].set_color('white')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        # Ruota le etichette per leggibilità
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        def draw():
+            ax = chart.figure.add_subplot(111)
+            
+            bars = ax.bar(italian_labels, values, color=self.colors[:len(values)])
+            
+            ax.set_title('Pattern di Studio per Giorno della Settimana', 
+                        color='white', fontsize=14, pad=20)
+            ax.set_xlabel('Giorno', color='white')
+            ax.set_ylabel('Ore di Studio', color='white')
+            
+            # Personalizza l'aspetto
+            self._style_axes(ax)
+            
+            # Ruota le etichette per leggibilità
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+                label.set_horizontalalignment('right')
+            
+            # Aggiungi valori sopra le barre
+            chart.artists = {'ax': ax, 'bars': bars, 'values': self._bar_value_labels(ax, bars)}
+            chart.figure.patch.set_facecolor('#2b2b2b')
+            chart.figure.tight_layout()
         
-        # Aggiungi valori sopra le barre
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{height:.1f}h', ha='center', va='bottom', color='white')
+        def update():
+            self._update_bars(chart.artists['ax'], chart.artists['bars'], chart.artists['values'], values)
         
-        fig.patch.set_facecolor('#2b2b2b')
-        fig.tight_layout()
-        return fig
+        return self._refresh(chart, (italian_labels, values), ('bar', italian_labels), draw, update)
     
     def create_productivity_dashboard(self):
         """Crea dashboard riassuntiva"""
         insights = self.engine.get_productivity_insights()
-        
-        fig = Figure(figsize=(12, 8), facecolor='#2b2b2b')
-        
-        # Crea subplot per le statistiche principali
-        gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
-        
-        # Statistiche testuali
-        ax1 = fig.add_subplot(gs[0, :])
-        ax1.axis('off')
+        subject_data = self.engine.get_study_time_by_subject()
+        hourly_data = self.engine.get_study_pattern_by_hour()
+        chart = self._chart('dashboard', (12, 8))
         
         stats_text = f"""
         DASHBOARD PRODUTTIVITA'
@@ -278,42 +460,114 @@ class ChartGenerator:
         Ora piu' Produttiva: {insights['most_productive_hour']}
         Giorno piu' Produttivo: {insights['most_productive_day']}
         """
+        subject_labels = list(subject_data.keys()) if subject_data else []
+        subject_values = list(subject_data.values()) if subject_data else []
+        hours = list(hourly_data.keys()) if hourly_data else []
+        hour_values = list(hourly_data.values()) if hourly_data else []
         
-        ax1.text(0.1, 0.5, stats_text, fontsize=14, color='white', 
-                verticalalignment='center', fontfamily='monospace')
-        
-        # Grafico materie (se ci sono dati)
-        subject_data = self.engine.get_study_time_by_subject()
-        if subject_data:
-            ax2 = fig.add_subplot(gs[1, 0])
-            ax2.pie(subject_data.values(), labels=subject_data.keys(),
-                   autopct='%1.1f%%', colors=self.colors[:len(subject_data)])
-            ax2.set_title('Distribuzione Materie', color='white', fontsize=12)
-        
-        # Pattern orario (se ci sono dati)
-        hourly_data = self.engine.get_study_pattern_by_hour()
-        if hourly_data:
-            ax3 = fig.add_subplot(gs[1, 1])
-            hours = list(hourly_data.keys())
-            values = list(hourly_data.values())
-            ax3.bar(hours, values, color='#4ECDC4')
-            ax3.set_title('Pattern Orario', color='white', fontsize=12)
-            ax3.set_xlabel('Ora', color='white', fontsize=10)
-            ax3.tick_params(colors='white', labelsize=8)
-            ax3.spines['bottom'].set_color('white')
-            ax3.spines['left'].set_color('white')
-            ax3.spines['top'].set_visible(False)
-            ax3.spines['right'].set_visible(False)
-        
-        fig.patch.set_facecolor('#2b2b2b')
-        return fig
+        def draw():
+            fig = chart.figure
+            
+            # Crea subplot per le statistiche principali
+            gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
+            
+            # Statistiche testuali
+            ax1 = fig.add_subplot(gs[0, :])
+            ax1.axis('off')
+            
+            chart.artists['text'] = ax1.text(0.1, 0.5, stats_text, fontsize=14, color='white', 
+                                             verticalalignment='center', fontfamily='monospace')
+            
+            # Grafico materie (se ci sono dati)
+            if subject_data:
+                ax2 = fig.add_subplot(gs[1, 0])
+                chart.artists['pie'] = ax2.pie(subject_values, labels=subject_labels,
+                                               autopct='%1.1f%%', colors=self.colors[:len(subject_data)])
+                ax2.set_title('Distribuzione Materie', color='white', fontsize=12)
+            
+            # Pattern orario (se ci sono dati)
+            if hourly_data:
+                ax3 = fig.add_subplot(gs[1, 1])
+                chart.artists['hours_ax'] = ax3
+                chart.artists['hours'] = ax3.bar(hours, hour_values, color='#4ECDC4')
+                ax3.set_title('Pattern Orario', color='white', fontsize=12)
+                ax3.set_xlabel('Ora', color='white', fontsize=10)
+                ax3.tick_params(colors='white', labelsize=8)
+                ax3.spines['bottom'].set_color('white')
+                ax3.spines['left'].set_color('white')
+                ax3.spines['top'].set_visible(False)
+                ax3.spines['right'].set_visible(False)
+            
+            fig.patch.set_facecolor('#2b2b2b')
+        
+        def update():
+            chart.artists['text'].set_text(stats_text)
+            if subject_data:
+                self._update_pie(*chart.artists['pie'], subject_values, startangle=0)
+            if hourly_data:
+                ax3 = chart.artists['hours_ax']
+                for bar, value in zip(chart.artists['hours'], hour_values):
+                    bar.set_height(value)
+                ax3.relim()
+                ax3.autoscale_view()
+        
+        data = (stats_text, subject_labels, subject_values, hours, hour_values)
+        return self._refresh(chart, data, ('dashboard', subject_labels, hours), draw, update)
+    
+    # ===== SUPPORTO =====
+    @staticmethod
+    def _style_axes(ax):
+        ax.tick_params(colors='white')
+        ax.spines['bottom'].set_color('white')
+        ax.spines['left'].set_color('white')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+    
+    @staticmethod
+    def _bar_value_labels(ax, bars):
+        """Valori sopra le barre"""
+        labels = []
+        for bar in bars:
+            height = bar.get_height()
+            labels.append(ax.text(bar.get_x() + bar.get_width()/2., height,
+                                  f'{height:.1f}h', ha='center', va='bottom', color='white'))
+        return labels
+    
+    @staticmethod
+    def _update_bars(ax, bars, value_labels, values):
+        """Nuove altezze per barre esistenti, con etichette e scala dell'asse"""
+        for bar, label, value in zip(bars, value_labels, values):
+            bar.set_height(value)
+            label.set_position((bar.get_x() + bar.get_width()/2., value))
+            label.set_text(f'{value:.1f}h')
+        ax.relim()
+        ax.autoscale_view()
+    
+    @staticmethod
+    def _update_pie(wedges, texts, autotexts, values, startangle=0,
+                    labeldistance=1.1, pctdistance=0.6):
+        """Nuovi angoli per spicchi esistenti (stessa geometria di Axes.pie)"""
+        total = float(sum(values))
+        theta1 = startangle / 360.0
+        for wedge, text, autotext, value in zip(wedges, texts, autotexts, values):
+            fraction = value / total if total else 0.0
+            theta2 = theta1 + fraction
+            wedge.set_theta1(360.0 * theta1)
+            wedge.set_theta2(360.0 * theta2)
+            
+            thetam = 2 * math.pi * 0.5 * (theta1 + theta2)
+            x, y = math.cos(thetam), math.sin(thetam)
+            text.set_position((labeldistance * x, labeldistance * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((pctdistance * x, pctdistance * y))
+            autotext.set_text('%1.1f%%' % (100.0 * fraction))
+            theta1 = theta2
     
-    def _create_empty_chart(self, message):
-        """Crea grafico vuoto con messaggio"""
-        fig = Figure(figsize=(8, 6), facecolor='#2b2b2b')
+    @staticmethod
+    def _draw_empty(fig, message):
+        """Grafico vuoto con messaggio"""
         ax = fig.add_subplot(111)
         ax.text(0.5, 0.5, message, ha='center', va='center', 
                fontsize=16, color='white', transform=ax.transAxes)
         ax.set_facecolor('#2b2b2b')
         ax.axis('off')
-        return fig
\ No newline at end of file
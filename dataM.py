@@ -1,18 +1,156 @@
 #data.py
 #File di managing dati
 import json
+import os
 import datetime
+import functools
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+from records import Session, json_default
+
+#=====STORAGE BACKEND=====
+DATABASE_FILE = 'timetracker.db'
+
+_sqlite_storages = {}
+
+
+def get_sqlite_storage():
+    """
+    Ritorna il backend SQLite se attivo, altrimenti None (file JSON).
+    Si attiva se esiste timetracker.db o con TIMETRACKER_STORAGE=sqlite.
+    """
+    if os.environ.get('TIMETRACKER_STORAGE', '').lower() != 'sqlite' and not os.path.exists(DATABASE_FILE):
+        return None
+    key = os.path.abspath(DATABASE_FILE)
+    storage = _sqlite_storages.get(key)
+    if storage is None:
+        from sqlite_storage import SQLiteStorage
+        storage = SQLiteStorage(DATABASE_FILE)
+        _sqlite_storages[key] = storage
+    return storage
+
+#=====JOURNALED JSON=====
+JOURNAL_COMPACT_OPS = 200
+
+
+class JsonJournal:
+    """
+    Lista di record JSON (con campo 'id') salvata come snapshot + journal.
+
+    Ogni modifica aggiunge una riga a <file>.journal invece di riscrivere
+    tutto il file; al caricamento il journal viene rieseguito sopra lo
+    snapshot. Dopo JOURNAL_COMPACT_OPS operazioni lo snapshot viene riscritto
+    in un file temporaneo e sostituito con os.replace, poi il journal viene
+    svuotato: un crash lascia sempre un file valido, e rieseguire un journal
+    già compattato non cambia il risultato.
+    """
+
+    def __init__(self, snapshot_file, compact_ops=JOURNAL_COMPACT_OPS, record_type=None):
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + '.journal'
+        self.compact_ops = compact_ops
+        self.record_type = record_type  # es. records.Goal: load() ritorna record invece di dict
+        self.pending_ops = 0  # operazioni nel journal non ancora compattate
+
+    def load(self):
+        """Snapshot + operazioni del journal. Un JSON snapshot corrotto solleva JSONDecodeError."""
+        records = []
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        if self.record_type is not None:
+            records = [self.record_type.from_dict(record) for record in records]
+
+        # ID -> posizioni nella lista, per put/del in tempo costante durante il replay
+        positions = {}
+        for i, record in enumerate(records):
+            positions.setdefault(record.get('id'), []).append(i)
+        self.pending_ops = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        operation = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Append interrotto da un crash: la riga incompleta si scarta
+                        print(f"Warning: Riga incompleta in {self.journal_file}, ignorata")
+                        continue
+                    if self.record_type is not None and 'record' in operation:
+                        operation['record'] = self.record_type.from_dict(operation['record'])
+                    self._apply(records, positions, operation)
+                    self.pending_ops += 1
+        except FileNotFoundError:
+            pass
+        # I record eliminati restano come None fino alla fine del replay
+        return [record for record in records if record is not None]
+
+    @staticmethod
+    def _apply(records, positions, operation):
+        if operation.get('op') == 'put':
+            record = operation['record']
+            record_positions = positions.get(record.get('id'))
+            if record_positions:
+                records[record_positions[-1]] = record
+            else:
+                positions[record.get('id')] = [len(records)]
+                records.append(record)
+        elif operation.get('op') == 'del':
+            for i in positions.pop(operation['id'], ()):
+                records[i] = None
+
+    def _append(self, operation, records):
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(operation, ensure_ascii=False, default=json_default) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending_ops += 1
+        if self.pending_ops >= self.compact_ops:
+            self.compact(records)
+
+    def put(self, record, records):
+        """Registra un record nuovo o modificato (records: lista completa aggiornata)"""
+        self._append({'op': 'put', 'record': record}, records)
+
+    def delete(self, record_id, records):
+        """Registra l'eliminazione dei record con l'ID indicato"""
+        self._append({'op': 'del', 'id': record_id}, records)
+
+    def compact(self, records):
+        """Riscrive lo snapshot in modo atomico e svuota il journal"""
+        tmp_path = self.snapshot_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_file)
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self.pending_ops = 0
 
 #=====USER FUNCTIONS=====
 def save_user(user_list):
-    with open('users.txt', 'w') as f:
+    storage = get_sqlite_storage()
+    if storage:
+        storage.save_users(user_list)
+        return
+    with open('users.txt', 'w', encoding='utf-8') as f:
         for user in user_list:
             f.write(user + '\n')
 
 def load_user():
+    storage = get_sqlite_storage()
+    if storage:
+        return storage.load_users()
     try:
-        with open('users.txt', 'r') as f:
-            return [line.strip() for line in f.readlines()]
+        with open('users.txt', 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
     except FileNotFoundError:
         return []
     
@@ -22,6 +160,10 @@ def save_subjects(subjects_list):
         if not subjects_list:
             print("La lista delle materie è vuota. Salvataggio annullato.")
             return
+        storage = get_sqlite_storage()
+        if storage:
+            storage.save_subjects(subjects_list)
+            return
         with open('subjects.json', 'w') as f:
             json.dump(subjects_list, f)
     except Exception as e:
@@ -29,6 +171,9 @@ def save_subjects(subjects_list):
 
 def load_subjects(user):
     """Load subjects from file"""
+    storage = get_sqlite_storage()
+    if storage:
+        return storage.load_subjects() or {user: []}
     try:
         with open('subjects.json', 'r') as f:
             return json.load(f)
@@ -38,20 +183,767 @@ def load_subjects(user):
         print("Error reading subjects from file.")
         return {user: []}
     
+#=====TIMESTAMP PARSING=====
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIMESTAMP_FALLBACK_FORMATS = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M')
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_timestamp(timestamp):
+    """
+    datetime di un timestamp di sessione, None se illeggibile.
+    Il formato canonico (e ogni ISO 8601) passa da fromisoformat; gli altri
+    formati storici da strptime. I risultati sono memorizzati per stringa.
+    """
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(timestamp)
+        if parsed.tzinfo is not None:
+            # Le sessioni usano ore locali senza fuso: normalizza
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FALLBACK_FORMATS:
+        try:
+            return datetime.datetime.strptime(timestamp, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@functools.lru_cache(maxsize=65536)
+def timestamp_epoch(timestamp):
+    """Secondi epoch (ora locale) di un timestamp, None se illeggibile"""
+    parsed = parse_timestamp(timestamp)
+    return parsed.timestamp() if parsed else None
+
+
+def session_epoch(session):
+    """
+    Epoch della sessione dal suo timestamp. Chi lo usa in un ciclo caldo lo
+    legge già calcolato dalla colonna epochs della SessionTable.
+    """
+    return timestamp_epoch(session.get('timestamp'))
+
+#=====SESSION STORE=====
+SESSIONS_FILE = 'sessions.json'
+
+
+class SessionStore:
+    """
+    Archivio append-only delle sessioni (JSONL) con indice per utente.
+
+    Accanto a sessions.json viene mantenuto un file indice (sessions.json.idx)
+    con una riga [id, utente, offset] per ogni sessione: l'ID massimo
+    (high-water mark) e gli offset in byte per utente vengono ricostruiti
+    dall'indice, senza rileggere il file delle sessioni. Un append costa
+    quindi O(1) e load(user) legge solo le righe di quell'utente.
+
+    Le sessioni lette restano in cache per utente come record Session
+    (records.py, __slots__), condivise da tutto il processo: la cache viene aggiornata in place sugli append e invalidata
+    quando mtime/dimensione del file cambiano per mano di terzi. Un file
+    cresciuto vale come append solo se l'impronta (file_fingerprint) della
+    parte già indicizzata è rimasta uguale; altrimenti è stato riscritto.
+    """
+
+    def __init__(self, sessions_file=SESSIONS_FILE):
+        self.sessions_file = sessions_file
+        self.index_file = sessions_file + '.idx'
+        self._lock = threading.RLock()
+        self._reset()
+        self._load_index()
+
+    def _reset(self):
+        self.last_id = 0
+        self.indexed_size = 0
+        self.offsets = {}  # user -> [offset riga, ...] in ordine di scrittura
+        self._cache = {}  # user -> [sessione, ...] già lette dal disco
+        self._signature = None  # (mtime_ns, size) del file al momento dell'ultima sync
+        self._fingerprint = None  # CRC32 della coda della parte indicizzata
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.sessions_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None, 0
+
+    def _load_index(self):
+        """Carica l'indice persistito e lo riallinea al file delle sessioni"""
+        last_offset = None
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    session_id, user, offset, end = json.loads(line)
+                    self.offsets.setdefault(user, []).append(offset)
+                    self.last_id = max(self.last_id, session_id)
+                    self.indexed_size = end
+                    last_offset = (offset, session_id)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, ValueError, TypeError):
+            print("Warning: Indice sessioni corrotto, ricostruzione in corso")
+            self._rebuild_index()
+            return
+
+        if not self._index_matches_file(last_offset):
+            self._rebuild_index()
+        else:
+            self._sync()
+
+    def _index_matches_file(self, last_entry):
+        """Verifica a costo O(1) che l'indice descriva ancora il file"""
+        if self._file_signature()[1] < self.indexed_size:
+            return False
+        if last_entry is None:
+            return self.indexed_size == 0
+        offset, session_id = last_entry
+        try:
+            with open(self.sessions_file, 'rb') as f:
+                f.seek(offset)
+                record = json.loads(f.readline())
+            return record.get('id', 0) == session_id
+        except (OSError, ValueError):
+            return False
+
+    def _rebuild_index(self):
+        """Ricostruisce l'indice da zero scansionando il file delle sessioni"""
+        self._reset()
+        try:
+            os.remove(self.index_file)
+        except OSError:
+            pass
+        self._sync()
+
+    def _scan(self, start):
+        """Legge le righe dal byte start: ritorna [(sessione, offset, fine)] e l'offset finale"""
+        records = []
+        offset = start
+        try:
+            with open(self.sessions_file, 'rb') as f:
+                f.seek(start)
+                for line in f:
+                    end = offset + len(line)
+                    if line.strip():
+                        try:
+                            records.append((Session.from_dict(json.loads(line)), offset, end))
+                        except json.JSONDecodeError:
+                            print(f"Warning: Riga sessione corrotta all'offset {offset}, ignorata")
+                    offset = end
+        except FileNotFoundError:
+            pass
+        return records, offset
+
+    def _sync(self):
+        """Riallinea indice e cache se il file è cambiato dall'ultima lettura"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        size = signature[1]
+        if size < self.indexed_size or (size == self.indexed_size and self._signature is not None):
+            # Stessa dimensione ma mtime diverso, o file più corto: riscritto
+            self._rebuild_index()
+            return
+        if self._fingerprint is not None and self._indexed_fingerprint() != self._fingerprint:
+            # Più grande ma con contenuto diverso: riscritto da un altro processo
+            self._rebuild_index()
+            return
+
+        records, offset = self._scan(self.indexed_size)
+        self.indexed_size = offset
+        for session, line_offset, _ in records:
+            user = session.get('user')
+            self.offsets.setdefault(user, []).append(line_offset)
+            self.last_id = max(self.last_id, session.get('id', 0))
+            if user in self._cache:
+                self._cache[user].append(session)
+        self._append_index_entries(
+            [(session.get('id', 0), session.get('user'), line_offset, end) for session, line_offset, end in records],
+            final_size=offset
+        )
+        self._signature = signature
+        self._fingerprint = self._indexed_fingerprint()
+
+    def _indexed_fingerprint(self):
+        try:
+            return file_fingerprint(self.sessions_file, self.indexed_size)
+        except OSError:
+            return None
+
+    def _append_index_entries(self, entries, final_size):
+        if not entries:
+            return
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            for i, entry in enumerate(entries):
+                session_id, user, offset, end = entry
+                # L'ultima voce registra la dimensione coperta dall'indice
+                if i == len(entries) - 1:
+                    end = final_size
+                f.write(json.dumps([session_id, user, offset, end]) + '\n')
+
+    def next_id(self):
+        """Prossimo ID disponibile (high-water mark + 1)"""
+        with self._lock:
+            self._sync()
+            return self.last_id + 1
+
+    def append(self, session):
+        """Aggiunge una sessione al file e all'indice. Assegna l'ID se manca."""
+        with self._lock:
+            self._sync()
+            if not session.get('id'):
+                session['id'] = self.last_id + 1
+
+            line = (json.dumps(session, default=json_default) + '\n').encode('utf-8')
+            with open(self.sessions_file, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                if offset > 0 and not self._ends_with_newline():
+                    f.write(b'\n')
+                    offset += 1
+                f.write(line)
+            end = offset + len(line)
+
+            user = session.get('user')
+            self.offsets.setdefault(user, []).append(offset)
+            if user in self._cache:
+                self._cache[user].append(session if isinstance(session, Session) else Session.from_dict(session))
+            self.last_id = max(self.last_id, session['id'])
+            self.indexed_size = end
+            self._append_index_entries([(session['id'], user, offset, end)], final_size=end)
+            self._signature = self._file_signature()
+            self._fingerprint = self._indexed_fingerprint()
+            return session
+
+    def _ends_with_newline(self):
+        with open(self.sessions_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def load(self, user):
+        """
+        Sessioni dell'utente. La prima lettura segue gli offset indicizzati,
+        le successive arrivano dalla cache. Ritorna una nuova lista di record
+        Session (API da dizionario), condivisi: i chiamanti non devono modificarli.
+        """
+        with self._lock:
+            self._sync()
+            cached = self._cache.get(user)
+            if cached is None:
+                cached = self._read_at(self.offsets.get(user, []))
+                self._cache[user] = cached
+            return list(cached)
+
+    def _read_at(self, offsets):
+        sessions = []
+        if offsets:
+            with open(self.sessions_file, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    sessions.append(Session.from_dict(json.loads(f.readline())))
+        return sessions
+
+    def load_page(self, user, offset=0, limit=50):
+        """
+        Pagina di sessioni dell'utente dalla più recente: salta le offset più
+        recenti e ne ritorna al massimo limit. Legge solo quelle righe.
+        Ritorna (sessioni, totale sessioni dell'utente).
+        """
+        with self._lock:
+            self._sync()
+            offsets = self.offsets.get(user, [])
+            total = len(offsets)
+            end = max(0, total - offset)
+            start = max(0, end - limit)
+            cached = self._cache.get(user)
+            page = cached[start:end] if cached is not None else self._read_at(offsets[start:end])
+            page.reverse()
+            return page, total
+
+    def load_since(self, offset, user=None):
+        """
+        Legge solo le righe aggiunte dopo il byte offset (lettura incrementale).
+        Se l'offset non è più valido (file troncato o riscritto) riparte da 0.
+        Ritorna (sessioni, nuovo_offset, ripartito_da_zero).
+        """
+        with self._lock:
+            self._sync()
+            restarted = False
+            if offset and (offset > self.indexed_size or not self._is_line_start(offset)):
+                offset = 0
+                restarted = True
+            if offset == 0 and user is not None:
+                # Prima lettura: conviene seguire l'indice dell'utente
+                return self.load(user), self.indexed_size, restarted
+            records, new_offset = self._scan(offset)
+            sessions = [session for session, _, _ in records
+                        if user is None or session.get('user') == user]
+            return sessions, new_offset, restarted
+
+    def _is_line_start(self, offset):
+        with open(self.sessions_file, 'rb') as f:
+            f.seek(offset - 1)
+            return f.read(1) == b'\n'
+
+
+_session_stores = {}
+
+
+def get_session_store(sessions_file=SESSIONS_FILE):
+    """Ritorna l'archivio sessioni condiviso per il file indicato"""
+    key = os.path.abspath(sessions_file)
+    store = _session_stores.get(key)
+    if store is None:
+        store = SessionStore(sessions_file)
+        _session_stores[key] = store
+    return store
+
+#=====DAILY ROLLUP=====
+ROLLUP_FILE = 'sessions_rollup.json'
+ROLLUP_VERSION = 1
+ROLLUP_COMPACT_OPS = JOURNAL_COMPACT_OPS
+FINGERPRINT_BYTES = 4096
+
+
+def file_fingerprint(path, offset, size=FINGERPRINT_BYTES):
+    """CRC32 degli ultimi byte prima di offset: riconosce un file riscritto"""
+    start = max(0, offset - size)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return zlib.crc32(f.read(offset - start))
+
+
+def session_day(timestamp):
+    """Giorno 'YYYY-MM-DD' di un timestamp di sessione, None se illeggibile"""
+    if not isinstance(timestamp, str):
+        return None
+    if len(timestamp) >= 10 and timestamp[4] == '-' and timestamp[7] == '-':
+        return timestamp[:10]
+    parsed = parse_timestamp(timestamp)
+    return parsed.strftime('%Y-%m-%d') if parsed else None
+
+
+def session_minutes(durata):
+    """Durata in minuti: minuti interi oppure stringhe HH:MM:SS / MM:SS"""
+    if isinstance(durata, (int, float)) and not isinstance(durata, bool):
+        return durata
+    try:
+        parts = [float(part) for part in str(durata).split(':')]
+    except ValueError:
+        return 0
+    if len(parts) == 3:
+        return parts[0] * 60 + parts[1] + parts[2] / 60
+    if len(parts) == 2:
+        return parts[0] + parts[1] / 60
+    return parts[0] if len(parts) == 1 else 0
+
+
+class SessionRollup:
+    """
+    Totali giornalieri (utente, materia, giorno) -> [minuti, sessioni].
+
+    Il rollup è persistito in sessions_rollup.json insieme all'offset del file
+    sessioni fino a cui è aggiornato: a ogni lettura si aggiungono solo le
+    righe nuove, quindi analytics e obiettivi lavorano su O(giorni x materie)
+    invece di rileggere tutte le sessioni.
+
+    Gli aggiornamenti non riscrivono il file: gli incrementi delle sessioni
+    nuove vanno in coda a <file>.delta (una riga per aggiornamento, con gli
+    offset di partenza e di arrivo) e vengono rieseguiti al caricamento.
+    Dopo ROLLUP_COMPACT_OPS righe il file completo viene riscritto e il delta
+    svuotato prima della sostituzione: un crash lascia al più un rollup più
+    vecchio, che si riallinea rileggendo le sessioni dal suo offset.
+    """
+
+    def __init__(self, store, rollup_file=ROLLUP_FILE, compact_ops=ROLLUP_COMPACT_OPS):
+        self.store = store
+        self.rollup_file = rollup_file
+        self.delta_file = rollup_file + '.delta'
+        self.compact_ops = compact_ops
+        self._lock = store._lock
+        self.days = None  # user -> materia -> giorno -> [minuti, sessioni]
+        self.offset = 0
+        self.fingerprint = 0
+        self.pending_ops = 0  # righe del delta non ancora compattate
+        self.version = 0  # cambia a ogni aggiornamento (chiave per le cache)
+
+    def _load_file(self):
+        self.days, self.offset, self.fingerprint, self.pending_ops = {}, 0, 0, 0
+        try:
+            with open(self.rollup_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == ROLLUP_VERSION:
+                self.days = data['days']
+                self.offset = data['offset']
+                self.fingerprint = data['fingerprint']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        self._replay_delta()
+
+    def _replay_delta(self):
+        """Riesegue gli incrementi che proseguono dall'offset del file completo"""
+        try:
+            with open(self.delta_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                        if delta['from'] != self.offset:
+                            # Delta di un rollup precedente: il resto si rilegge dalle sessioni
+                            break
+                        for user, materia, day, minutes, count in delta['days']:
+                            self._add(user, materia, day, minutes, count)
+                    except (ValueError, KeyError, TypeError):
+                        # Riga interrotta da un crash
+                        break
+                    self.offset, self.fingerprint = delta['to'], delta['fingerprint']
+                    self.pending_ops += 1
+        except OSError:
+            pass
+
+    def _is_stale(self):
+        """True se il file sessioni non contiene più i byte già aggregati"""
+        if not self.offset:
+            return False
+        try:
+            return (os.path.getsize(self.store.sessions_file) < self.offset or
+                    file_fingerprint(self.store.sessions_file, self.offset) != self.fingerprint)
+        except OSError:
+            return True
+
+    def _add(self, user, materia, day, minutes, count):
+        entry = self.days.setdefault(user, {}).setdefault(materia, {}).setdefault(day, [0, 0])
+        entry[0] += minutes
+        entry[1] += count
+
+    def _fold(self, session, changes):
+        day = session_day(session.get('timestamp'))
+        if day is None:
+            return
+        minutes = session_minutes(session.get('durata', 0))
+        self._add(session.get('user'), session.get('materia'), day, minutes, 1)
+        entry = changes.setdefault((session.get('user'), session.get('materia'), day), [0, 0])
+        entry[0] += minutes
+        entry[1] += 1
+
+    def _sync(self):
+        """Aggiunge al rollup le sessioni scritte dopo l'ultimo aggiornamento"""
+        if self.days is None:
+            self._load_file()
+        rebuilt = self._is_stale()
+        if rebuilt:
+            self.days, self.offset = {}, 0
+        start = self.offset
+        sessions, new_offset, restarted = self.store.load_since(self.offset)
+        if restarted:
+            self.days, start = {}, 0
+        # Prima costruzione o ricostruzione: si scrive direttamente il file completo
+        rebuilt = rebuilt or restarted or start == 0
+        if not sessions and new_offset == self.offset and not restarted:
+            return
+        changes = {}
+        for session in sessions:
+            self._fold(session, changes)
+        self.offset = new_offset
+        self.fingerprint = file_fingerprint(self.store.sessions_file, new_offset) if new_offset else 0
+        self.version += 1
+        if rebuilt or self.pending_ops + 1 >= self.compact_ops or not self._append_delta(start, changes):
+            self._save()
+
+    def _append_delta(self, start, changes):
+        """Aggiunge una riga al delta; False se non è stato possibile scriverla"""
+        delta = {'from': start, 'to': self.offset, 'fingerprint': self.fingerprint,
+                 'days': [[user, materia, day, minutes, count]
+                          for (user, materia, day), (minutes, count) in changes.items()]}
+        try:
+            with open(self.delta_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(delta, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Warning: Impossibile aggiornare il rollup sessioni ({e})")
+            return False
+        self.pending_ops += 1
+        return True
+
+    def _save(self):
+        """Riscrive il rollup completo e svuota il delta"""
+        tmp_path = self.rollup_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': ROLLUP_VERSION, 'offset': self.offset,
+                           'fingerprint': self.fingerprint, 'days': self.days}, f, ensure_ascii=False)
+            # Delta svuotato prima della sostituzione: mai incrementi contati due volte
+            with open(self.delta_file, 'w', encoding='utf-8'):
+                pass
+            os.replace(tmp_path, self.rollup_file)
+            self.pending_ops = 0
+        except OSError as e:
+            print(f"Warning: Impossibile salvare il rollup sessioni ({e})")
+
+    def refresh(self):
+        """Riallinea il rollup al file sessioni; ritorna la versione corrente"""
+        with self._lock:
+            self._sync()
+            return self.version
+
+    def load(self, user):
+        """Totali dell'utente: {materia: {'YYYY-MM-DD': [minuti, sessioni]}} (copia)"""
+        with self._lock:
+            self._sync()
+            return {materia: {day: list(entry) for day, entry in days.items()}
+                    for materia, days in self.days.get(user, {}).items()}
+
+
+_session_rollups = {}
+
+
+def get_session_rollup(sessions_file=SESSIONS_FILE):
+    """Ritorna il rollup giornaliero condiviso per il file sessioni indicato"""
+    key = os.path.abspath(sessions_file)
+    rollup = _session_rollups.get(key)
+    if rollup is None or rollup.store is not get_session_store(sessions_file):
+        rollup_file = os.path.join(os.path.dirname(sessions_file), ROLLUP_FILE)
+        rollup = SessionRollup(get_session_store(sessions_file), rollup_file)
+        _session_rollups[key] = rollup
+    return rollup
+
+#=====SESSION TABLE=====
+NO_EPOCH = -(2 ** 63)  # sessione senza timestamp leggibile: precede ogni altra nell'indice
+
+
+def _seconds_to_minutes(seconds):
+    return seconds // 60 if seconds % 60 == 0 else seconds / 60
+
+
+class _TimeIndex:
+    """
+    Righe di un gruppo (utente, utente+materia o tutte) ordinate per epoch,
+    con le somme prefisse delle durate: un intervallo di tempo si trova con
+    due ricerche binarie e il suo totale con una sottrazione.
+    """
+
+    __slots__ = ('epochs', 'rows', 'prefix')
+
+    def __init__(self):
+        self.epochs = array('q')
+        self.rows = array('i')
+        self.prefix = array('q', [0])  # prefix[i] = secondi delle prime i righe
+
+    def add(self, epoch, row, durations):
+        epochs = self.epochs
+        if not epochs or epoch >= epochs[-1]:
+            # Caso normale: le sessioni arrivano in ordine di tempo
+            epochs.append(epoch)
+            self.rows.append(row)
+            self.prefix.append(self.prefix[-1] + durations[row])
+            return
+        # Sessione fuori ordine: inserimento e somme ricalcolate da quel punto
+        i = bisect_right(epochs, epoch)
+        epochs.insert(i, epoch)
+        self.rows.insert(i, row)
+        prefix = self.prefix
+        prefix.append(0)
+        for j in range(i + 1, len(prefix)):
+            prefix[j] = prefix[j - 1] + durations[self.rows[j - 1]]
+
+    def span(self, start=None, end=None):
+        """Posizioni [lo, hi) delle righe con start <= epoch < end"""
+        if start is None and end is None:
+            return 0, len(self.epochs)
+        lo = bisect_left(self.epochs, NO_EPOCH + 1 if start is None else start)
+        hi = len(self.epochs) if end is None else bisect_left(self.epochs, end)
+        return lo, max(lo, hi)
+
+    def seconds(self, start=None, end=None):
+        lo, hi = self.span(start, end)
+        return self.prefix[hi] - self.prefix[lo]
+
+
+class SessionTable:
+    """
+    Tabella colonnare delle sessioni per il codice senza pandas (obiettivi,
+    statistiche): array('q') per ID ed epoch, array('i') per le durate in
+    secondi, codici interi per utenti e materie con i nomi internati.
+
+    Ogni utente, ogni coppia utente+materia e la tabella intera hanno un
+    indice temporale ordinato con somme prefisse (_TimeIndex), quindi le
+    domande "da/fino a" (oggi, settimana, ultimi N giorni) costano in base
+    alle righe dell'intervallo e non alla storia.
+
+    Come il rollup si aggiorna leggendo solo le sessioni nuove
+    (load_sessions_since) e riparte da zero se il file viene riscritto.
+    refresh() e le letture prendono lo stesso lock: i thread di lavoro
+    dell'analytics non vedono mai colonne e indici a metà aggiornamento.
+    """
+
+    def __init__(self, source=None):
+        self.source = source  # archivio JSON o SQLite da cui è stata letta
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = array('q')
+        self.epochs = array('q')
+        self.durations = array('i')  # secondi
+        self.user_codes = array('i')
+        self.materia_codes = array('i')
+        self.users = []
+        self.materie = []
+        self._user_positions = {}
+        self._materia_positions = {}
+        self._all_index = _TimeIndex()
+        self._user_indexes = {}  # codice utente -> _TimeIndex
+        self._subject_indexes = {}  # codice utente -> {codice materia: _TimeIndex}
+        self.offset = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self.ids)
+
+    @staticmethod
+    def _intern(name, names, positions):
+        code = positions.get(name)
+        if code is None:
+            code = positions[name] = len(names)
+            names.append(name)
+        return code
+
+    def append(self, session):
+        row = len(self.ids)
+        user_code = self._intern(session.get('user'), self.users, self._user_positions)
+        materia_code = self._intern(session.get('materia'), self.materie, self._materia_positions)
+        epoch = session_epoch(session)
+        epoch = NO_EPOCH if epoch is None else int(epoch)
+        self.ids.append(session.get('id') or 0)
+        self.epochs.append(epoch)
+        self.durations.append(int(round(session_minutes(session.get('durata', 0)) * 60)))
+        self.user_codes.append(user_code)
+        self.materia_codes.append(materia_code)
+
+        user_index = self._user_indexes.get(user_code)
+        if user_index is None:
+            user_index = self._user_indexes[user_code] = _TimeIndex()
+        subjects = self._subject_indexes.setdefault(user_code, {})
+        subject_index = subjects.get(materia_code)
+        if subject_index is None:
+            subject_index = subjects[materia_code] = _TimeIndex()
+        for index in (self._all_index, user_index, subject_index):
+            index.add(epoch, row, self.durations)
+
+    def refresh(self):
+        """Aggiunge le sessioni salvate dopo l'ultimo aggiornamento"""
+        with self._lock:
+            tail = load_sessions_since(self.offset)
+            if tail.restarted:
+                self._reset()
+            for session in tail.sessions:
+                self.append(session)
+            self.offset = tail.offset
+        return self
+
+    def _index(self, user=None, materia=None):
+        """
+        Indice più stretto per i filtri e filtro residuo sulla materia
+        (solo senza utente). None se utente o materia non esistono.
+        """
+        materia_code = None
+        if materia is not None:
+            materia_code = self._materia_positions.get(materia)
+            if materia_code is None:
+                return None, None
+        if user is None:
+            return self._all_index, materia_code
+        user_code = self._user_positions.get(user)
+        if user_code is None:
+            return None, None
+        if materia is None:
+            return self._user_indexes[user_code], None
+        return self._subject_indexes[user_code].get(materia_code), None
+
+    def rows(self, user=None, materia=None, start=None, end=None):
+        """
+        Righe che rispettano i filtri, in ordine di tempo; start (incluso) ed
+        end (escluso) in secondi epoch. Con un filtro di tempo le sessioni
+        senza timestamp sono escluse.
+        """
+        with self._lock:
+            index, materia_code = self._index(user, materia)
+            if index is None:
+                return []
+            lo, hi = index.span(start, end)
+            rows = index.rows[lo:hi]
+            if materia_code is not None:
+                materia_codes = self.materia_codes
+                return [row for row in rows if materia_codes[row] == materia_code]
+            return rows
+
+    def count(self, user=None, materia=None, start=None, end=None):
+        """Numero di sessioni filtrate (due ricerche binarie se non serve filtrare la materia)"""
+        with self._lock:
+            index, materia_code = self._index(user, materia)
+            if index is None:
+                return 0
+            if materia_code is None:
+                lo, hi = index.span(start, end)
+                return hi - lo
+            return len(self.rows(user, materia, start, end))
+
+    def sum_minutes(self, user=None, materia=None, start=None, end=None):
+        """Minuti totali delle righe filtrate (somme prefisse se non serve filtrare la materia)"""
+        with self._lock:
+            index, materia_code = self._index(user, materia)
+            if index is None:
+                return 0
+            if materia_code is None:
+                return _seconds_to_minutes(index.seconds(start, end))
+            durations = self.durations
+            return _seconds_to_minutes(sum(durations[row] for row in self.rows(user, materia, start, end)))
+
+    def minutes_by_materia(self, user=None, start=None, end=None):
+        """{materia: minuti} delle materie con sessioni nell'intervallo"""
+        with self._lock:
+            if user is not None:
+                user_code = self._user_positions.get(user)
+                if user_code is None:
+                    return {}
+                totals = {}
+                for materia_code, index in self._subject_indexes[user_code].items():
+                    lo, hi = index.span(start, end)
+                    if hi > lo:
+                        totals[materia_code] = index.prefix[hi] - index.prefix[lo]
+            else:
+                durations = self.durations
+                materia_codes = self.materia_codes
+                totals = defaultdict(int)
+                for row in self.rows(start=start, end=end):
+                    totals[materia_codes[row]] += durations[row]
+            return {self.materie[code]: _seconds_to_minutes(seconds) for code, seconds in totals.items()}
+
+
+_session_tables = {}
+
+
+def get_session_table():
+    """Tabella colonnare condivisa per l'archivio attivo, aggiornata alle ultime sessioni"""
+    storage = get_sqlite_storage()
+    source = storage if storage else get_session_store()
+    key = os.path.abspath(storage.db_file if storage else SESSIONS_FILE)
+    table = _session_tables.get(key)
+    if table is None or table.source is not source:
+        table = _session_tables[key] = SessionTable(source)
+    return table.refresh()
+
 #=====SESSION FUNCTIONS=====
 def _get_next_session_id():
     """Generate next available session ID"""
+    storage = get_sqlite_storage()
+    if storage:
+        return storage.next_session_id()
     try:
-        with open('sessions.json', 'r') as f:
-            sessions = [json.loads(line) for line in f if line.strip()]
-            if sessions:
-                max_id = max(session.get('id', 0) for session in sessions)
-                return max_id + 1
-            return 1
-    except FileNotFoundError:
-        return 1
-    except json.JSONDecodeError:
-        print("Warning: Corrupted sessions file. Starting from ID 1")
+        return get_session_store().next_id()
+    except Exception as e:
+        print(f"Warning: Impossibile leggere l'indice sessioni ({e}). Starting from ID 1")
         return 1
 
 def save_session(user, materia, durata, note_argomento=None):
@@ -68,9 +960,15 @@ def save_session(user, materia, durata, note_argomento=None):
         session['note_argomento'] = note_argomento.strip()
     
     try:
-        with open('sessions.json', 'a') as f:
-            json.dump(session, f)
-            f.write('\n')  # Add newline for each session
+        storage = get_sqlite_storage()
+        if storage:
+            storage.insert_session(session)
+        else:
+            get_session_store().append(session)
+            try:
+                get_session_rollup().refresh()
+            except Exception as rollup_error:
+                print(f"Errore aggiornamento rollup sessioni: {rollup_error}")
         
         # Salva nota nel sistema progress se presente
         if note_argomento and note_argomento.strip():
@@ -144,14 +1042,95 @@ def _check_goals_after_session(user):
     except Exception as e:
         print(f"Errore nel controllo obiettivi: {e}")
 
+class SessionTail(NamedTuple):
+    """Risultato di una lettura incrementale delle sessioni"""
+    sessions: List[Dict]
+    offset: int
+    restarted: bool
+
+
+def load_sessions_since(offset=0, user=None):
+    """
+    Lettura incrementale: ritorna solo le sessioni salvate dopo offset.
+    L'offset è una posizione opaca (byte nel JSONL, ultimo ID con SQLite):
+    va passato quello restituito dalla chiamata precedente. Se restarted è
+    True il file è stato riscritto e sessions contiene di nuovo tutto.
+    """
+    try:
+        storage = get_sqlite_storage()
+        if storage:
+            sessions = storage.load_sessions_since(offset, user)
+            new_offset = max((s.get('id', 0) for s in sessions), default=offset)
+            return SessionTail(sessions, new_offset, False)
+        sessions, new_offset, restarted = get_session_store().load_since(offset, user)
+        return SessionTail(sessions, new_offset, restarted)
+    except Exception as e:
+        print(f"Errore lettura incrementale sessioni: {e}")
+        return SessionTail([], offset, False)
+
+class SessionPage(NamedTuple):
+    """Pagina di sessioni (dalla più recente) e totale sessioni dell'utente"""
+    sessions: List[Dict]
+    total: int
+
+
+def load_sessions_page(user, offset=0, limit=50):
+    """Sessioni dell'utente a pagine, dalla più recente (per liste virtualizzate)"""
+    try:
+        storage = get_sqlite_storage()
+        if storage:
+            return SessionPage(*storage.load_sessions_page(user, offset, limit))
+        return SessionPage(*get_session_store().load_page(user, offset, limit))
+    except Exception as e:
+        print(f"Errore lettura pagina sessioni: {e}")
+        return SessionPage([], 0)
+
 def load_sessions(user):
     """Load sessions for a specific user"""
     try:
-        with open('sessions.json', 'r') as f:
-            sessions = [json.loads(line) for line in f if line.strip()]
-            return [session for session in sessions if session.get('user') == user]
+        storage = get_sqlite_storage()
+        if storage:
+            return storage.load_sessions(user)
+        return get_session_store().load(user)
     except FileNotFoundError:
         return []
     except json.JSONDecodeError:
         print("Error reading sessions from file.")
-        return []
\ No newline at end of file
+        return []
+
+def load_daily_rollup(user):
+    """
+    Totali giornalieri dell'utente: {materia: {'YYYY-MM-DD': [minuti, sessioni]}}.
+    Con SQLite l'aggregazione è una GROUP BY sull'indice (user, timestamp).
+    """
+    try:
+        storage = get_sqlite_storage()
+        if storage:
+            return storage.daily_rollup(user)
+        return get_session_rollup().load(user)
+    except Exception as e:
+        print(f"Errore lettura rollup sessioni: {e}")
+        return {}
+
+def sessions_version():
+    """
+    Versione corrente dei dati sessioni: cambia quando vengono aggiunte
+    sessioni (chiave per le cache derivate). None se non determinabile.
+    """
+    try:
+        storage = get_sqlite_storage()
+        if storage:
+            return storage.next_session_id()
+        return get_session_rollup().refresh()
+    except Exception as e:
+        print(f"Errore lettura versione sessioni: {e}")
+        return None
+
+def sum_study_minutes(user, materia=None, since_day=None):
+    """
+    Minuti studiati (opzionalmente per materia) dal giorno since_day incluso:
+    ricerca binaria sull'indice temporale della tabella colonnare, quindi il
+    costo non cresce con i giorni di storia
+    """
+    start = datetime.datetime.combine(since_day, datetime.time()).timestamp() if since_day else None
+    return get_session_table().sum_minutes(user, materia, start=start)
@@ -4,10 +4,11 @@ Gestisce creazione, salvataggio, caricamento e controllo progresso obiettivi
 """
 
 import json
-import os
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import dataM  # Per accedere alle sessioni di studio
+from records import Goal
 
 
 class GoalsManager:
@@ -15,29 +16,53 @@ class GoalsManager:
     
     def __init__(self):
         self.goals_file = "goals.json"
+        self.storage = dataM.get_sqlite_storage()
+        self.journal = dataM.JsonJournal(self.goals_file, record_type=Goal)
         self.goals = self._load_goals()
     
-    def _load_goals(self) -> List[Dict]:
-        """Carica gli obiettivi dal file JSON"""
+    def _load_goals(self) -> List[Goal]:
+        """Carica gli obiettivi dal file JSON (o dal backend SQLite)"""
         try:
-            if os.path.exists(self.goals_file):
-                with open(self.goals_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
+            if self.storage:
+                return [Goal.from_dict(goal) for goal in self.storage.load_goals()]
+            return self.journal.load()
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Errore caricamento obiettivi: {e}")
             return []
     
     def _save_goals(self) -> bool:
-        """Salva gli obiettivi nel file JSON"""
+        """Salva gli obiettivi nel file JSON (riscrittura atomica completa)"""
         try:
-            with open(self.goals_file, 'w', encoding='utf-8') as f:
-                json.dump(self.goals, f, ensure_ascii=False, indent=2)
+            self.journal.compact(self.goals)
             return True
         except Exception as e:
             print(f"Errore salvataggio obiettivi: {e}")
             return False
     
+    def _persist_goal(self, goal: Dict) -> bool:
+        """Salva un obiettivo nuovo o modificato"""
+        try:
+            if self.storage:
+                self.storage.upsert_goal(goal)
+            else:
+                self.journal.put(goal, self.goals)
+            return True
+        except Exception as e:
+            print(f"Errore salvataggio obiettivo: {e}")
+            return False
+    
+    def _remove_goal(self, goal_id: int) -> bool:
+        """Rimuove un obiettivo dall'archivio"""
+        try:
+            if self.storage:
+                self.storage.delete_goal(goal_id)
+            else:
+                self.journal.delete(goal_id, self.goals)
+            return True
+        except Exception as e:
+            print(f"Errore eliminazione obiettivo: {e}")
+            return False
+    
     def create_goal(self, user: str, materia: str, ore_target: int, 
                    minuti_target: int, intervallo: str) -> bool:
         """Crea un nuovo obiettivo"""
@@ -51,7 +76,7 @@ class GoalsManager:
             # Genera ID unico
             goal_id = max([g.get('id', 0) for g in self.goals], default=0) + 1
             
-            nuovo_obiettivo = {
+            nuovo_obiettivo = Goal({
                 'id': goal_id,
                 'user': user,
                 'materia': materia,
@@ -62,10 +87,10 @@ class GoalsManager:
                 'data_creazione': datetime.now().isoformat(),
                 'completato': False,
                 'data_completamento': None
-            }
+            })
             
             self.goals.append(nuovo_obiettivo)
-            return self._save_goals()
+            return self._persist_goal(nuovo_obiettivo)
             
         except Exception as e:
             print(f"Errore creazione obiettivo: {e}")
@@ -79,7 +104,7 @@ class GoalsManager:
         """Elimina un obiettivo"""
         try:
             self.goals = [goal for goal in self.goals if goal.get('id') != goal_id]
-            return self._save_goals()
+            return self._remove_goal(goal_id)
         except Exception as e:
             print(f"Errore eliminazione obiettivo: {e}")
             return False
@@ -107,27 +132,15 @@ class GoalsManager:
         Ritorna: (minuti_studiati, minuti_target, percentuale_completamento)
         """
         try:
-            # Carica le sessioni dell'utente
-            sessions = dataM.load_sessions(user)
-            if not sessions:
-                return 0, goal['tempo_target_minuti'], 0.0
-            
             # Calcola periodo di riferimento
             period_start = self._get_period_start_date(goal['intervallo'])
-            
-            # Filtra sessioni per materia e periodo
             materia_target = goal['materia']
-            minuti_studiati = 0
             
-            for session in sessions:
-                # Controlla se è la materia giusta
-                if session.get('materia') != materia_target:
-                    continue
-                
-                # Controlla se è nel periodo giusto
-                session_date = self._parse_session_date(session)
-                if session_date and session_date >= period_start:
-                    minuti_studiati += session.get('durata', 0)
+            # Ricerca binaria sull'indice temporale (utente, materia) della tabella colonnare,
+            # la stessa fonte di calculate_progress_batch con entrambi i backend
+            minuti_studiati = dataM.get_session_table().sum_minutes(
+                user, materia_target, start=period_start.timestamp()
+            )
             
             tempo_target = goal['tempo_target_minuti']
             percentuale = min(100.0, (minuti_studiati / tempo_target * 100)) if tempo_target > 0 else 0.0
@@ -138,31 +151,42 @@ class GoalsManager:
             print(f"Errore calcolo progresso: {e}")
             return 0, goal.get('tempo_target_minuti', 0), 0.0
     
-    def _parse_session_date(self, session: Dict) -> Optional[datetime]:
-        """Estrae la data da una sessione"""
+    def calculate_progress_batch(self, user: str,
+                                 goals: Optional[List[Dict]] = None) -> Dict[int, Tuple[int, int, float]]:
+        """
+        Calcola in un solo passaggio il progresso di più obiettivi dell'utente
+        (di default tutti). Ritorna: {id_obiettivo: (minuti_studiati, minuti_target, percentuale)}
+        """
+        if goals is None:
+            goals = self.get_user_goals(user)
+        
         try:
-            timestamp = session.get('timestamp')
-            if not timestamp:
-                return None
-            
-            # Prova diversi formati di timestamp
-            formats = [
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%d %H:%M:%S.%f',
-                '%d/%m/%Y %H:%M:%S',
-                '%d/%m/%Y %H:%M'
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(timestamp, fmt)
-                except ValueError:
-                    continue
-            
-            return None
-            
-        except Exception:
-            return None
+            period_starts = {goal['intervallo']: self._get_period_start_date(goal['intervallo']) for goal in goals}
+            studied = self._study_minutes_by_period(user, period_starts)
+        except Exception as e:
+            print(f"Errore calcolo progresso: {e}")
+            studied = {}
+        
+        progress = {}
+        for goal in goals:
+            minuti_studiati = studied.get((goal.get('materia'), goal.get('intervallo')), 0)
+            tempo_target = goal.get('tempo_target_minuti', 0)
+            percentuale = min(100.0, (minuti_studiati / tempo_target * 100)) if tempo_target > 0 else 0.0
+            progress[goal['id']] = (minuti_studiati, tempo_target, percentuale)
+        return progress
+    
+    def _study_minutes_by_period(self, user: str, period_starts: Dict[str, datetime]) -> Dict[Tuple[str, str], int]:
+        """
+        Minuti studiati per (materia, intervallo) dalla tabella colonnare:
+        per ogni periodo una ricerca binaria per materia e una differenza di
+        somme prefisse, indipendentemente dalla lunghezza della storia.
+        """
+        totals = defaultdict(int)
+        table = dataM.get_session_table()
+        for intervallo, start in period_starts.items():
+            for materia, minuti in table.minutes_by_materia(user, start=start.timestamp()).items():
+                totals[(materia, intervallo)] += minuti
+        return totals
     
     def check_completed_goals(self, user: str) -> List[Dict]:
         """
@@ -170,14 +194,13 @@ class GoalsManager:
         Ritorna la lista di obiettivi appena raggiunti
         """
         newly_completed = []
-        user_goals = self.get_user_goals(user)
+        # Obiettivi non ancora completati, valutati tutti insieme
+        open_goals = [goal for goal in self.get_user_goals(user) if not goal.get('completato')]
+        progress = self.calculate_progress_batch(user, open_goals) if open_goals else {}
         
-        for goal in user_goals:
-            if goal.get('completato'):
-                continue  # Già completato prima
-            
+        for goal in open_goals:
             # Calcola progresso attuale
-            minuti_studiati, minuti_target, percentuale = self.calculate_progress(user, goal)
+            minuti_studiati, minuti_target, percentuale = progress[goal['id']]
             
             # Se raggiunto il target, marca come completato
             if minuti_studiati >= minuti_target:
@@ -186,8 +209,8 @@ class GoalsManager:
                 newly_completed.append(goal)
         
         # Salva i cambiamenti se ci sono obiettivi completati
-        if newly_completed:
-            self._save_goals()
+        for goal in newly_completed:
+            self._persist_goal(goal)
         
         return newly_completed
     
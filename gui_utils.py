@@ -12,92 +12,119 @@ import dataM
 class StatsCalculator:
     """Classe per calcolare statistiche avanzate delle sessioni"""
     
+    # utente -> (versione sessioni, giorno, statistiche) per user_stats
+    _user_stats_cache = {}
+    
     @staticmethod
-    def calculate_session_stats(sessions):
-        """Calcola statistiche complete dalle sessioni"""
-        if not sessions:
-            return {
-                'total_sessions': 0,
-                'total_minutes': 0,
-                'total_hours': 0.0,
-                'average_session': 0.0,
-                'favorite_subject': 'N/A',
-                'subjects_stats': {},
-                'daily_stats': {},
-                'weekly_total': 0,
-                'this_month': 0
-            }
-        
-        # Statistiche di base
-        total_sessions = len(sessions)
-        total_minutes = sum(s.get('durata', 0) for s in sessions)
-        total_hours = total_minutes / 60
-        average_session = total_minutes / total_sessions if total_sessions > 0 else 0
-        
-        # Statistiche per materia
-        subjects_stats = defaultdict(lambda: {'minutes': 0, 'sessions': 0})
-        for session in sessions:
-            subject = session.get('materia', 'Sconosciuto')
-            duration = session.get('durata', 0)
-            subjects_stats[subject]['minutes'] += duration
-            subjects_stats[subject]['sessions'] += 1
-        
-        # Materia preferita (più minuti studiati)
-        favorite_subject = 'N/A'
-        if subjects_stats:
-            favorite_subject = max(subjects_stats.keys(), 
-                                 key=lambda s: subjects_stats[s]['minutes'])
-        
-        # Statistiche temporali
-        now = datetime.now()
-        week_start = now - timedelta(days=7)
-        month_start = now - timedelta(days=30)
+    def _empty_stats():
+        return {
+            'total_sessions': 0,
+            'total_minutes': 0,
+            'total_hours': 0.0,
+            'average_session': 0.0,
+            'favorite_subject': 'N/A',
+            'subjects_stats': {},
+            'daily_stats': {},
+            'weekly_total': 0,
+            'monthly_total': 0
+        }
+    
+    @staticmethod
+    def aggregate(rows, now=None):
+        """
+        Kernel a passata singola su righe (materia, giorno 'YYYY-MM-DD',
+        minuti, sessioni): totali, per materia, giornaliere (ultimi 7 giorni),
+        settimanali e mensili in un solo giro. Le righe possono essere
+        sessioni singole o totali giornalieri già aggregati; un giorno None
+        (timestamp malformato) conta solo nei totali.
+        """
+        now = now or datetime.now()
+        week_start = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+        month_start = (now - timedelta(days=30)).strftime("%Y-%m-%d")
         
+        total_sessions = 0
+        total_minutes = 0
         weekly_total = 0
         monthly_total = 0
+        subjects_stats = {}
         daily_stats = defaultdict(int)
         
-        for session in sessions:
-            try:
-                timestamp_str = session.get('timestamp', '')
-                session_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                duration = session.get('durata', 0)
-                
-                # Statistiche settimanali
-                if session_date >= week_start:
-                    weekly_total += duration
-                
-                # Statistiche mensili
-                if session_date >= month_start:
-                    monthly_total += duration
-                
-                # Statistiche giornaliere (ultimi 7 giorni)
-                if session_date >= week_start:
-                    day_key = session_date.strftime("%Y-%m-%d")
-                    daily_stats[day_key] += duration
-                    
-            except ValueError:
-                continue  # Ignora timestamp malformati
+        for subject, day, minutes, count in rows:
+            total_sessions += count
+            total_minutes += minutes
+            
+            entry = subjects_stats.get(subject)
+            if entry is None:
+                entry = subjects_stats[subject] = {'minutes': 0, 'sessions': 0}
+            entry['minutes'] += minutes
+            entry['sessions'] += count
+            
+            if day is None or day < month_start:
+                continue
+            monthly_total += minutes
+            if day >= week_start:
+                weekly_total += minutes
+                daily_stats[day] += minutes
+        
+        if not total_sessions:
+            return StatsCalculator._empty_stats()
+        
+        # Materia preferita (più minuti studiati)
+        favorite_subject = max(subjects_stats.keys(), key=lambda s: subjects_stats[s]['minutes'])
         
         return {
             'total_sessions': total_sessions,
             'total_minutes': total_minutes,
-            'total_hours': total_hours,
-            'average_session': average_session,
+            'total_hours': total_minutes / 60,
+            'average_session': total_minutes / total_sessions,
             'favorite_subject': favorite_subject,
-            'subjects_stats': dict(subjects_stats),
+            'subjects_stats': subjects_stats,
             'daily_stats': dict(daily_stats),
             'weekly_total': weekly_total,
             'monthly_total': monthly_total
         }
+    
+    @staticmethod
+    def calculate_session_stats(sessions):
+        """Calcola statistiche complete dalle sessioni"""
+        return StatsCalculator.aggregate(
+            (session.get('materia', 'Sconosciuto'),
+             dataM.session_day(session.get('timestamp')),
+             dataM.session_minutes(session.get('durata', 0)),
+             1)
+            for session in sessions or ()
+        )
+    
+    @classmethod
+    def user_stats(cls, user):
+        """
+        Statistiche dell'utente dai totali giornalieri (rollup), ricalcolate
+        solo quando cambiano le sessioni o il giorno. Il dizionario ritornato
+        è condiviso tra i chiamanti: non va modificato.
+        """
+        version = dataM.sessions_version()
+        today = datetime.now().strftime("%Y-%m-%d")
+        cached = cls._user_stats_cache.get(user)
+        if version is not None and cached is not None and cached[:2] == (version, today):
+            return cached[2]
+        
+        stats = cls.aggregate(
+            (subject or 'Sconosciuto', day, entry[0], entry[1])
+            for subject, days in dataM.load_daily_rollup(user).items()
+            for day, entry in days.items()
+        )
+        if version is not None:
+            cls._user_stats_cache[user] = (version, today, stats)
+        return stats
 
     @staticmethod
-    def get_productivity_insights(sessions):
-        """Genera insights di produttività"""
+    def get_productivity_insights(sessions, stats=None):
+        """Genera insights di produttività (stats: statistiche già calcolate, se disponibili)"""
         if not sessions or len(sessions) < 5:
             return ["Accumula piu' sessioni per vedere insights personalizzati!"]
         
-        stats = StatsCalculator.calculate_session_stats(sessions)
+        if stats is None:
+            stats = StatsCalculator.calculate_session_stats(sessions)
         insights = []
         
         # Insight sulla consistenza
@@ -161,14 +188,9 @@ class DataValidator:
             except (ValueError, TypeError):
                 continue
             
-            # Valida timestamp
-            try:
-                if 'timestamp' in session:
-                    datetime.strptime(session['timestamp'], "%Y-%m-%d %H:%M:%S")
-                else:
-                    session['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                session['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Valida timestamp (stesso parser di dataM: anche i formati storici sono validi)
+            if dataM.parse_timestamp(session.get('timestamp')) is None:
+                session['timestamp'] = datetime.now().strftime(dataM.TIMESTAMP_FORMAT)
             
             validated.append(session)
         
@@ -264,7 +286,9 @@ class UIHelpers:
     def format_timestamp(timestamp_str):
         """Formatta un timestamp per la visualizzazione"""
         try:
-            dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+            dt = dataM.parse_timestamp(timestamp_str)
+            if dt is None:
+                return timestamp_str  # Fallback al timestamp originale
             now = datetime.now()
             
             # Se è oggi
@@ -6,9 +6,12 @@ Include: NewSessionWindow, SessionHistoryWindow, SubjectManagementWindow, TimerW
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
+import queue
 import threading
 import time
 import pygame
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import dei moduli esistenti
@@ -562,6 +565,200 @@ class NewSessionWindow(AeroStyleMixin):
         except Exception as e:
             print(f"Errore chiusura NewSessionWindow: {e}")
 
+class CardPool:
+    """
+    Card riusabili per liste di record (obiettivi, note) in un contenitore.
+    
+    sync(records) confronta i record con le card esistenti, indicizzate per
+    chiave: crea solo le card nuove, distrugge quelle sparite, riconfigura
+    quelle il cui stato visualizzato è cambiato e ripete il pack solo se
+    l'ordine è diverso. Le card sono dict con almeno la chiave 'frame'.
+    """
+    
+    def __init__(self, container, build_card, update_card, card_state,
+                 key=lambda record: record.get('id'), pack_options=None):
+        self.container = container
+        self.build_card = build_card  # record -> card (widget vuoti)
+        self.update_card = update_card  # (card, record) -> riempie i widget
+        self.card_state = card_state  # record -> tupla dei valori mostrati
+        self.key = key
+        self.pack_options = pack_options or {'fill': "x", 'padx': 10, 'pady': 8}
+        self.cards = {}  # chiave -> (card, stato)
+        self.order = []
+    
+    def sync(self, records):
+        order = []
+        seen = set()
+        for record in records:
+            key = self.key(record)
+            if key in seen:
+                continue  # chiave duplicata: una sola card
+            seen.add(key)
+            state = self.card_state(record)
+            entry = self.cards.get(key)
+            if entry is None:
+                card = self.build_card(record)
+                self.update_card(card, record)
+                self.cards[key] = (card, state)
+            elif entry[1] != state:
+                self.update_card(entry[0], record)
+                self.cards[key] = (entry[0], state)
+            order.append(key)
+        
+        for key in [key for key in self.cards if key not in seen]:
+            self.cards.pop(key)[0]['frame'].destroy()
+        
+        if order != self.order:
+            previous = set(self.order)
+            kept = [key for key in self.order if key in seen]
+            if kept == [key for key in order if key in previous]:
+                # Le card esistenti restano in ordine: si inseriscono solo le nuove
+                for i, key in enumerate(order):
+                    if key in previous:
+                        continue
+                    frame = self.cards[key][0]['frame']
+                    if i > 0:
+                        frame.pack(after=self.cards[order[i - 1]][0]['frame'], **self.pack_options)
+                    elif len(order) > 1 and order[1] in previous:
+                        frame.pack(before=self.cards[order[1]][0]['frame'], **self.pack_options)
+                    else:
+                        frame.pack(**self.pack_options)
+            else:
+                for key in order:
+                    self.cards[key][0]['frame'].pack_forget()
+                for key in order:
+                    self.cards[key][0]['frame'].pack(**self.pack_options)
+            self.order = order
+    
+    def clear(self):
+        self.sync([])
+
+
+class VirtualSessionList(ctk.CTkFrame):
+    """
+    Lista virtualizzata delle sessioni: crea widget solo per le righe visibili
+    e li riusa durante lo scroll. Le sessioni arrivano a pagine da
+    fetch_page(offset, limit), dalla più recente, e restano in una piccola cache.
+    """
+    
+    ROW_HEIGHT = 70
+    PAGE_SIZE = 50
+    MAX_CACHED_PAGES = 20
+    WHEEL_ROWS = 3
+    
+    def __init__(self, master, fetch_page, total_rows, first_page=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.fetch_page = fetch_page
+        self.total_rows = total_rows
+        self.top = 0  # pixel virtuale mostrato in cima
+        self._pages = OrderedDict()  # numero pagina -> sessioni (LRU)
+        self._rows = []  # righe riusate: (frame, label materia, label data)
+        if first_page is not None:
+            self._pages[0] = first_page
+        
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        self.body.bind("<Configure>", lambda event: self.render())
+        self._bind_wheel(self.body)
+    
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_mouse_wheel)  # Windows / macOS
+        widget.bind("<Button-4>", self.on_mouse_wheel)  # Linux
+        widget.bind("<Button-5>", self.on_mouse_wheel)
+    
+    def _session_at(self, index):
+        page_number = index // self.PAGE_SIZE
+        page = self._pages.get(page_number)
+        if page is None:
+            page = self.fetch_page(page_number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self._pages[page_number] = page
+            if len(self._pages) > self.MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_number)
+        position = index % self.PAGE_SIZE
+        return page[position] if position < len(page) else None
+    
+    def _create_row(self):
+        # Altezza fissa: CTk non accetta width/height in place()
+        frame = ctk.CTkFrame(self.body, corner_radius=8, height=self.ROW_HEIGHT - 8)
+        frame.pack_propagate(False)
+        subject_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=14, weight="bold"), anchor="w")
+        subject_label.pack(fill="x", padx=15, pady=(8, 0))
+        date_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=12), text_color="gray", anchor="w")
+        date_label.pack(fill="x", padx=15, pady=(0, 8))
+        for widget in (frame, subject_label, date_label):
+            self._bind_wheel(widget)
+        return frame, subject_label, date_label
+    
+    @staticmethod
+    def _fill_row(row, session):
+        _, subject_label, date_label = row
+        if session is None:
+            subject_label.configure(text="")
+            date_label.configure(text="")
+            return
+        # Materia e durata con emoji, come nelle card delle sessioni
+        subject_name = session.get('materia', 'N/A')
+        emoji = UIHelpers.get_subject_emoji(subject_name)
+        formatted_duration = UIHelpers.format_duration(session.get('durata', 0))
+        subject_label.configure(text=f"{emoji} {subject_name} - ⏱️ {formatted_duration}")
+        timestamp_formatted = UIHelpers.format_timestamp(session.get('timestamp', ''))
+        date_label.configure(text=f"📅 {timestamp_formatted}")
+    
+    def render(self):
+        """Posiziona le righe visibili e aggiorna la scrollbar"""
+        height = self.body.winfo_height()
+        if height <= 1:
+            return
+        content_height = self.total_rows * self.ROW_HEIGHT
+        self.top = max(0, min(self.top, content_height - height))
+        
+        first = int(self.top // self.ROW_HEIGHT)
+        visible = max(0, min(self.total_rows - first, height // self.ROW_HEIGHT + 2))
+        while len(self._rows) < visible:
+            self._rows.append(self._create_row())
+        
+        for i, row in enumerate(self._rows):
+            if i < visible:
+                index = first + i
+                self._fill_row(row, self._session_at(index))
+                row[0].place(x=0, y=index * self.ROW_HEIGHT - self.top, relwidth=1.0)
+            else:
+                row[0].place_forget()
+        
+        if content_height > height:
+            self.scrollbar.set(self.top / content_height, (self.top + height) / content_height)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll_to(self, top):
+        self.top = top
+        self.render()
+    
+    def on_scrollbar(self, *args):
+        """Comandi della scrollbar: ('moveto', frazione) o ('scroll', n, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * self.total_rows * self.ROW_HEIGHT)
+        elif args[0] == 'scroll':
+            step = self.ROW_HEIGHT if args[2] == 'units' else self.body.winfo_height()
+            self.scroll_to(self.top + int(args[1]) * step)
+    
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            direction = -1
+        else:
+            direction = 1
+        self.scroll_to(self.top + direction * self.WHEEL_ROWS * self.ROW_HEIGHT)
+        return "break"
+
+
 class SessionHistoryWindow:
     def __init__(self, main_app):
         self.main_app = main_app
@@ -637,14 +834,17 @@ class SessionHistoryWindow:
         )
         self.stats_label.pack(pady=15)
         
-        # Frame scrollabile per le sessioni
-        self.sessions_frame = ctk.CTkScrollableFrame(
-            main_frame, 
-            corner_radius=10,
-            label_text="📈 Sessioni Recenti"
-        )
+        # Frame per le sessioni (la lista virtualizzata gestisce lo scroll)
+        self.sessions_frame = ctk.CTkFrame(main_frame, corner_radius=10)
         self.sessions_frame.pack(fill="both", expand=True, padx=20, pady=(0, 15))
         
+        sessions_title = ctk.CTkLabel(
+            self.sessions_frame,
+            text="📈 Sessioni Recenti",
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        sessions_title.pack(pady=(8, 4))
+        
         # Pulsante chiudi
         close_btn = ctk.CTkButton(
             main_frame,
@@ -656,11 +856,12 @@ class SessionHistoryWindow:
         close_btn.pack(pady=(0, 15))
 
     def load_sessions(self):
-        """Carica e mostra le sessioni"""
+        """Carica e mostra le sessioni (lista virtualizzata, letta a pagine)"""
         try:
-            sessions = dataM.load_sessions(self.main_app.current_user)
+            user = self.main_app.current_user
+            first_page = dataM.load_sessions_page(user, 0, VirtualSessionList.PAGE_SIZE)
             
-            if not sessions:
+            if not first_page.total:
                 no_sessions_label = ctk.CTkLabel(
                     self.sessions_frame,
                     text="Nessuna sessione trovata",
@@ -670,29 +871,22 @@ class SessionHistoryWindow:
                 self.stats_label.configure(text="Nessuna statistica disponibile")
                 return
             
-            # Calcola statistiche
-            total_sessions = len(sessions)
-            total_minutes = sum(s.get('durata', 0) for s in sessions)
-            total_hours = total_minutes / 60
-            
-            # Materie più studiate
-            subject_stats = {}
-            for session in sessions:
-                subject = session.get('materia', 'Sconosciuto')
-                subject_stats[subject] = subject_stats.get(subject, 0) + session.get('durata', 0)
-            
-            top_subject = max(subject_stats.keys(), key=subject_stats.get) if subject_stats else "N/A"
+            # Statistiche dai totali giornalieri, senza leggere tutte le sessioni
+            stats = StatsCalculator.user_stats(user)
             
             # Aggiorna statistiche
-            stats_text = f"Sessioni totali: {total_sessions} | Tempo totale: {total_hours:.1f} ore | Materia preferita: {top_subject}"
+            stats_text = f"Sessioni totali: {first_page.total} | Tempo totale: {stats['total_hours']:.1f} ore | Materia preferita: {stats['favorite_subject']}"
             self.stats_label.configure(text=stats_text)
             
-            # Mostra le ultime 20 sessioni
-            recent_sessions = sessions[-20:] if len(sessions) > 20 else sessions
-            recent_sessions.reverse()  # Più recenti prima
-            
-            for session in recent_sessions:
-                self.create_session_card(session)
+            # Più recenti prima, pagina per pagina durante lo scroll
+            self.session_list = VirtualSessionList(
+                self.sessions_frame,
+                fetch_page=lambda offset, limit: dataM.load_sessions_page(user, offset, limit).sessions,
+                total_rows=first_page.total,
+                first_page=first_page.sessions,
+                fg_color="transparent"
+            )
+            self.session_list.pack(fill="both", expand=True, padx=5, pady=(0, 5))
                 
         except Exception as e:
             print(f"Errore nel caricamento sessioni: {e}")
@@ -704,39 +898,6 @@ class SessionHistoryWindow:
             )
             error_label.pack(pady=50)
 
-    def create_session_card(self, session):
-        """Crea una card per ogni sessione"""
-        
-        card_frame = ctk.CTkFrame(self.sessions_frame, corner_radius=8)
-        card_frame.pack(fill="x", padx=5, pady=5)
-        
-        # Info sessione
-        info_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        info_frame.pack(fill="x", padx=15, pady=10)
-        
-        # Materia e durata con emoji
-        subject_name = session.get('materia', 'N/A')
-        duration = session.get('durata', 0)
-        emoji = UIHelpers.get_subject_emoji(subject_name)
-        formatted_duration = UIHelpers.format_duration(duration)
-        
-        subject_duration = ctk.CTkLabel(
-            info_frame,
-            text=f"{emoji} {subject_name} - ⏱️ {formatted_duration}",
-            font=ctk.CTkFont(size=14, weight="bold")
-        )
-        subject_duration.pack(anchor="w")
-        
-        # Timestamp
-        timestamp_formatted = UIHelpers.format_timestamp(session.get('timestamp', ''))
-        timestamp = ctk.CTkLabel(
-            info_frame,
-            text=f"📅 {timestamp_formatted}",
-            font=ctk.CTkFont(size=12),
-            text_color="gray"
-        )
-        timestamp.pack(anchor="w")
-
 class SubjectManagementWindow:
     def __init__(self, main_app):
         self.main_app = main_app
@@ -1647,18 +1808,28 @@ class StopwatchWindow:
 class AnalyticsWindow:
     """Finestra per l'analisi dei dati e visualizzazione grafici"""
     
+    # Un solo thread di lavoro condiviso: i job sull'engine (non thread-safe)
+    # vengono eseguiti in ordine, mai in parallelo
+    _executor = None
+    POLL_INTERVAL_MS = 50
+    
     def __init__(self, main_app):
         self.main_app = main_app
         self.current_user = main_app.current_user
         
-        # Inizializza analytics engine
+        # Engine e generatore grafici vengono creati nel thread di lavoro
+        self.analytics = None
+        self.chart_gen = None
+        self._current_chart = None  # argomenti di show_chart dell'ultimo grafico mostrato
+        self._canvases = {}  # id(figura) -> canvas Tk, uno per tipo di grafico
+        self._data_version = None  # versione sessioni vista dall'engine
+        self._visible_canvas = None
+        self._generations = {}  # canale ('stats'/'chart') -> ultimo job richiesto
+        self._pending = {}  # canale -> Future del job in corso
+        self._results = queue.Queue()
+        self._polling = False
+        
         try:
-            from analytics_engine import AnalyticsEngine
-            from chart_generator import ChartGenerator
-            
-            self.analytics = AnalyticsEngine(self.current_user)
-            self.chart_gen = ChartGenerator(self.analytics)
-            
             self.setup_window()
             self.create_widgets()
             self.load_initial_data()
@@ -1815,16 +1986,123 @@ class AnalyticsWindow:
         )
         welcome_label.grid(row=0, column=0, pady=50)
     
+    # ===== CARICAMENTO IN BACKGROUND =====
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+        return cls._executor
+    
+    def _ensure_engine(self, version=None):
+        """
+        Crea engine e generatore grafici al primo uso (nel thread di lavoro);
+        se la versione delle sessioni è cambiata legge quelle nuove.
+        """
+        if self.analytics is None:
+            from analytics_engine import get_analytics_engine
+            from chart_generator import ChartGenerator
+            
+            self.analytics = get_analytics_engine(self.current_user)
+            self.chart_gen = ChartGenerator(self.analytics)
+        elif version is not None and version != self._data_version:
+            self.analytics.refresh()
+        if version is not None:
+            self._data_version = version
+        return self.analytics
+    
+    def run_async(self, channel, job, on_done, on_error):
+        """
+        Esegue job() nel thread di lavoro e passa il risultato a on_done sul
+        thread Tk (tramite after). Una nuova richiesta sullo stesso canale
+        rende obsolete le precedenti: se non sono partite vengono annullate,
+        altrimenti il loro risultato viene scartato.
+        """
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+        previous = self._pending.get(channel)
+        if previous is not None:
+            previous.cancel()
+        
+        def task():
+            if self._generations.get(channel) != generation:
+                return  # superato da una richiesta più recente
+            try:
+                result, error = job(), None
+            except Exception as e:
+                result, error = None, e
+            self._results.put((channel, generation, result, error, on_done, on_error))
+        
+        self._pending[channel] = self._get_executor().submit(task)
+        if not self._polling:
+            self._polling = True
+            self.window.after(self.POLL_INTERVAL_MS, self._poll_results)
+    
+    def _poll_results(self):
+        """Consegna sul thread Tk i risultati pronti dei job in background"""
+        if not self.window.winfo_exists():
+            self._polling = False
+            return
+        
+        while True:
+            try:
+                channel, generation, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if self._generations.get(channel) != generation:
+                continue  # risultato obsoleto
+            self._pending.pop(channel, None)
+            if error is not None:
+                on_error(error)
+            else:
+                on_done(result)
+        
+        if self._pending:
+            self.window.after(self.POLL_INTERVAL_MS, self._poll_results)
+        else:
+            self._polling = False
+    
+    def show_loading(self, message="Caricamento in corso..."):
+        """Segnaposto nell'area grafico mentre il lavoro è in background"""
+        self.clear_chart_area()
+        loading_label = ctk.CTkLabel(
+            self.chart_frame,
+            text=message,
+            font=ctk.CTkFont(size=16),
+            text_color="gray"
+        )
+        loading_label.grid(row=0, column=0, pady=50)
+    
     def load_initial_data(self):
-        """Carica i dati iniziali"""
+        """Carica i dati iniziali (in background)"""
         self.update_stats()
     
-    def update_stats(self):
-        """Aggiorna le statistiche nella sidebar"""
-        try:
-            insights = self.analytics.get_productivity_insights()
-            
-            stats_text = f"""
+    def set_stats_text(self, text):
+        self.stats_text.delete("1.0", "end")
+        self.stats_text.insert("1.0", text)
+    
+    def update_stats(self, refresh=False):
+        """Aggiorna le statistiche nella sidebar (calcolo nel thread di lavoro)"""
+        period = self.period_var.get()
+        
+        def job():
+            analytics = self._ensure_engine()
+            if refresh:
+                # Include le sessioni salvate mentre la finestra era aperta
+                analytics.refresh()
+            return self._build_stats_text(period)
+        
+        def on_error(error):
+            print(f"Errore aggiornamento statistiche: {error}")
+            self.set_stats_text(f"Errore nel caricamento delle statistiche:\n{error}")
+        
+        self.set_stats_text("Caricamento statistiche...")
+        self.run_async('stats', job, self.set_stats_text, on_error)
+    
+    def _build_stats_text(self, period):
+        """Testo delle statistiche per il periodo (eseguito nel thread di lavoro)"""
+        insights = self.analytics.get_productivity_insights()
+        
+        stats_text = f"""
 STATISTICHE GENERALI
 
 Sessioni Totali: {insights['total_sessions']}
@@ -1844,40 +2122,88 @@ Giorno più Produttivo:
 
 ANALISI PERIODO CORRENTE
 
-Tempo Totale: {self.analytics.get_total_study_time(self.period_var.get()):.1f}h
+Tempo Totale: {self.analytics.get_total_study_time(period):.1f}h
 
-            """
-            
-            # Aggiungi statistiche per materia del periodo corrente
-            subject_stats = self.analytics.get_study_time_by_subject(self.period_var.get())
-            if subject_stats:
-                stats_text += "\nTEMPO PER MATERIA:\n"
-                for subject, hours in sorted(subject_stats.items(), key=lambda x: x[1], reverse=True):
-                    stats_text += f"- {subject}: {hours:.1f}h\n"
-            
-            self.stats_text.delete("1.0", "end")
-            self.stats_text.insert("1.0", stats_text)
-            
-        except Exception as e:
-            print(f"Errore aggiornamento statistiche: {e}")
+        """
+        
+        # Aggiungi statistiche per materia del periodo corrente
+        subject_stats = self.analytics.get_study_time_by_subject(period)
+        if subject_stats:
+            stats_text += "\nTEMPO PER MATERIA:\n"
+            for subject, hours in sorted(subject_stats.items(), key=lambda x: x[1], reverse=True):
+                stats_text += f"- {subject}: {hours:.1f}h\n"
+        
+        return stats_text
     
     def clear_chart_area(self):
-        """Pulisce l'area del grafico"""
+        """Pulisce l'area del grafico (i canvas persistenti vengono solo nascosti)"""
+        canvas_widgets = {canvas.get_tk_widget() for canvas in self._canvases.values()}
         for widget in self.chart_frame.winfo_children():
-            widget.destroy()
+            if widget in canvas_widgets:
+                widget.grid_remove()
+            else:
+                widget.destroy()
+        self._visible_canvas = None
     
-    def display_chart(self, figure):
-        """Mostra un grafico matplotlib"""
-        try:
+    def _canvas_for(self, figure):
+        """Canvas Tk della figura, creato la prima volta che viene mostrata"""
+        canvas = self._canvases.get(id(figure))
+        if canvas is None:
             from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
             
-            self.clear_chart_area()
+            lock = self.chart_gen.lock
             
-            canvas = FigureCanvasTkAgg(figure, self.chart_frame)
-            canvas.draw()
+            class LockedCanvas(FigureCanvasTkAgg):
+                # I ridisegni di Tk (es. resize) non devono incrociare gli
+                # aggiornamenti della figura fatti nel thread di lavoro
+                def draw(self):
+                    with lock:
+                        super().draw()
             
-            canvas_widget = canvas.get_tk_widget()
-            canvas_widget.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+            canvas = LockedCanvas(figure, self.chart_frame)
+            self._canvases[id(figure)] = canvas
+        return canvas
+    
+    def display_cached_chart(self, cached):
+        """Mostra un grafico dalla cache (buffer RGBA già rasterizzato)"""
+        from PIL import Image
+        
+        width, height, rgba = cached
+        image = Image.frombuffer('RGBA', (width, height), rgba, 'raw', 'RGBA', 0, 1)
+        self.clear_chart_area()
+        image_label = ctk.CTkLabel(
+            self.chart_frame,
+            text="",
+            image=ctk.CTkImage(light_image=image, dark_image=image, size=(width, height))
+        )
+        image_label.grid(row=0, column=0, padx=10, pady=10)
+    
+    def display_chart(self, figure, rendered=False, cache_key=None):
+        """
+        Mostra un grafico matplotlib. Se la figura è già stata rasterizzata
+        nel thread di lavoro basta il blit del buffer, altrimenti draw_idle.
+        Con cache_key il buffer disegnato viene salvato nella cache grafici.
+        """
+        try:
+            is_new = id(figure) not in self._canvases
+            canvas = self._canvas_for(figure)
+            
+            if canvas is not self._visible_canvas:
+                self.clear_chart_area()
+                canvas_widget = canvas.get_tk_widget()
+                canvas_widget.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+                self._visible_canvas = canvas
+            
+            if is_new:
+                canvas.draw()
+            elif rendered:
+                with self.chart_gen.lock:
+                    canvas.blit()
+            else:
+                canvas.draw_idle()
+                cache_key = None  # buffer non ancora disegnato
+            
+            self.chart_gen.cache_rendered(cache_key, figure)
             
             # Toolbar rimossa per evitare conflitti geometry manager
             
@@ -1897,48 +2223,86 @@ Tempo Totale: {self.analytics.get_total_study_time(self.period_var.get()):.1f}h
         error_label.grid(row=0, column=0, pady=50)
     
     # Metodi per i diversi tipi di grafici
+    def show_chart(self, chart, builder, error_label, by_period=False):
+        """
+        Aggiorna la figura nel thread di lavoro (pandas + matplotlib) e la
+        mostra sul thread Tk; un click successivo annulla quella in corso.
+        Il grafico precedente resta visibile finché il nuovo non è pronto.
+        Se le sessioni non sono cambiate l'immagine arriva dalla cache.
+        builder riceve ChartGenerator e periodo selezionato.
+        """
+        self._current_chart = (chart, builder, error_label, by_period)
+        period = self.period_var.get()
+        
+        def job():
+            from chart_generator import chart_cache_key, get_render_cache
+            
+            version = dataM.sessions_version()
+            key = None
+            if version is not None:
+                key = chart_cache_key(self.current_user, chart, period if by_period else None, version)
+                cached = get_render_cache().get(key)
+                if cached is not None:
+                    return None, False, key, cached
+            
+            self._ensure_engine(version)
+            figure = builder(self.chart_gen, period)
+            # Rasterizza qui se la figura ha già un canvas: alla GUI resta il blit
+            return figure, self.chart_gen.render(figure), key, None
+        
+        def on_done(result):
+            figure, rendered, key, cached = result
+            if cached is not None:
+                self.display_cached_chart(cached)
+            else:
+                self.display_chart(figure, rendered, cache_key=key)
+        
+        def on_error(error):
+            self.show_error_message(f"{error_label}: {error}")
+        
+        if self._visible_canvas is None:
+            self.show_loading("Generazione grafico...")
+        self.run_async('chart', job, on_done, on_error)
+    
     def show_dashboard(self):
         """Mostra dashboard generale"""
-        try:
-            fig = self.chart_gen.create_productivity_dashboard()
-            self.display_chart(fig)
-        except Exception as e:
-            self.show_error_message(f"Errore dashboard: {e}")
+        self.show_chart('dashboard',
+                        lambda chart_gen, period: chart_gen.create_productivity_dashboard(),
+                        "Errore dashboard")
     
     def show_subject_chart(self, chart_type="pie"):
         """Mostra grafico distribuzione materie"""
-        try:
-            fig = self.chart_gen.create_subject_distribution_chart(
-                period=self.period_var.get(),
+        self.show_chart(
+            ('subject', chart_type),
+            lambda chart_gen, period: chart_gen.create_subject_distribution_chart(
+                period=period,
                 chart_type=chart_type
-            )
-            self.display_chart(fig)
-        except Exception as e:
-            self.show_error_message(f"Errore grafico materie: {e}")
+            ),
+            "Errore grafico materie",
+            by_period=True
+        )
     
     # Funzioni trend giornaliero e confronto settimanale rimosse per semplificare l'interfaccia
     
     def show_hourly_heatmap(self):
         """Mostra heatmap oraria"""
-        try:
-            fig = self.chart_gen.create_hourly_heatmap()
-            self.display_chart(fig)
-        except Exception as e:
-            self.show_error_message(f"Errore pattern orario: {e}")
+        self.show_chart('hourly_heatmap',
+                        lambda chart_gen, period: chart_gen.create_hourly_heatmap(),
+                        "Errore pattern orario")
     
     def show_weekday_pattern(self):
         """Mostra pattern settimanale"""
-        try:
-            fig = self.chart_gen.create_weekday_pattern_chart()
-            self.display_chart(fig)
-        except Exception as e:
-            self.show_error_message(f"Errore pattern settimanale: {e}")
+        self.show_chart('weekday_pattern',
+                        lambda chart_gen, period: chart_gen.create_weekday_pattern_chart(),
+                        "Errore pattern settimanale")
     
     def on_period_change(self, new_period):
         """Callback per cambio periodo"""
-        self.update_stats()
-        # Ricarica il grafico corrente se presente
-        # (Implementazione opzionale per auto-refresh)
+        # Il refresh dell'engine avviene nel job delle statistiche; il grafico
+        # corrente viene ricalcolato dopo (stesso thread di lavoro, in ordine)
+        self.update_stats(refresh=True)
+        if self._current_chart is not None:
+            self.show_chart(*self._current_chart)
 
 
 class GoalsWindow:
@@ -2107,6 +2471,13 @@ class GoalsWindow:
         list_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
         
         self.goals_container = list_frame
+        self._goal_progress = {}
+        self.goal_cards = CardPool(
+            self.goals_container,
+            build_card=self._build_goal_card,
+            update_card=self._update_goal_card,
+            card_state=self._goal_card_state
+        )
         
         # Messaggio iniziale (verrà sostituito dalla lista)
         self.no_goals_label = ctk.CTkLabel(
@@ -2116,6 +2487,14 @@ class GoalsWindow:
             text_color="gray"
         )
         self.no_goals_label.pack(pady=50)
+        
+        # Errore di caricamento: un'unica label, nascosta al primo caricamento riuscito
+        self.goals_error_label = ctk.CTkLabel(
+            self.goals_container,
+            text="",
+            font=ctk.CTkFont(size=14),
+            text_color="red"
+        )
     
     def load_subjects(self):
         """Carica la lista delle materie disponibili"""
@@ -2215,139 +2594,126 @@ class GoalsWindow:
             messagebox.showerror("Errore", f"Errore creazione obiettivo!\\n\\nDettagli: {e}")
     
     def load_goals(self):
-        """Carica e visualizza tutti gli obiettivi dell'utente"""
+        """Carica e visualizza tutti gli obiettivi dell'utente (solo le card cambiate)"""
         try:
-            # Pulisce il contenitore
-            for widget in self.goals_container.winfo_children():
-                widget.destroy()
-            
             # Carica gli obiettivi
             goals = self.goals_manager.get_user_goals(self.current_user)
+            self.goals_error_label.pack_forget()
             
             if not goals:
-                self.no_goals_label = ctk.CTkLabel(
-                    self.goals_container,
-                    text="Nessun obiettivo creato ancora.\\nCrea il tuo primo obiettivo!",
-                    font=ctk.CTkFont(size=16),
-                    text_color="gray"
-                )
+                self.goal_cards.clear()
                 self.no_goals_label.pack(pady=50)
                 return
+            self.no_goals_label.pack_forget()
             
             # Ordina per data di creazione (più recenti prima)
             goals.sort(key=lambda x: x.get('data_creazione', ''), reverse=True)
             
-            # Crea widget per ogni obiettivo
-            for goal in goals:
-                self.create_goal_widget(goal)
+            # Progresso di tutti gli obiettivi in un solo passaggio
+            self._goal_progress = self.goals_manager.calculate_progress_batch(self.current_user, goals)
+            
+            # Aggiorna le card: crea/elimina solo la differenza
+            self.goal_cards.sync(goals)
                 
         except Exception as e:
             print(f"Errore caricamento obiettivi: {e}")
-            error_label = ctk.CTkLabel(
-                self.goals_container,
-                text=f"Errore nel caricamento:\\n{str(e)}",
-                font=ctk.CTkFont(size=14),
-                text_color="red"
-            )
-            error_label.pack(pady=20)
+            self.goals_error_label.configure(text=f"Errore nel caricamento:\\n{str(e)}")
+            self.goals_error_label.pack(pady=20)
+    
+    def _goal_progress_for(self, goal):
+        """Progresso calcolato in blocco da load_goals (o calcolato ora)"""
+        progress = self._goal_progress.get(goal.get('id'))
+        if progress is None:
+            progress = self.goals_manager.calculate_progress(self.current_user, goal)
+        return progress
+    
+    def _goal_card_state(self, goal):
+        """Valori mostrati nella card: se non cambiano la card non si tocca"""
+        return (goal.get('materia'), goal.get('intervallo'), goal.get('completato'),
+                self._goal_progress_for(goal))
+    
+    def _build_goal_card(self, goal):
+        """Crea i widget (vuoti) della card di un obiettivo"""
+        goal_id = goal['id']
+        card = {}
+        
+        # Frame principale per l'obiettivo
+        card['frame'] = goal_frame = ctk.CTkFrame(
+            self.goals_container,
+            corner_radius=10,
+            border_width=2
+        )
+        
+        # Header con materia e stato
+        header_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
+        header_frame.pack(fill="x", padx=15, pady=(15, 5))
+        
+        # Materia
+        card['materia'] = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=18, weight="bold"))
+        card['materia'].pack(side="left")
+        
+        # Status badge
+        card['status'] = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=12, weight="bold"))
+        card['status'].pack(side="right")
+        
+        # Info obiettivo: target e progresso
+        info_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
+        info_frame.pack(fill="x", padx=15, pady=5)
+        
+        card['target'] = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(size=14))
+        card['target'].pack(side="left")
+        
+        card['progress'] = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(size=14))
+        card['progress'].pack(side="right")
+        
+        # Barra di progresso
+        progress_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
+        progress_frame.pack(fill="x", padx=15, pady=5)
+        
+        card['progress_bar'] = ctk.CTkProgressBar(progress_frame, width=400, height=20)
+        card['progress_bar'].pack(fill="x")
+        
+        # Frame pulsanti
+        buttons_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=15, pady=(5, 15))
+        
+        # Pulsante elimina
+        delete_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Elimina",
+            command=lambda: self.delete_goal(goal_id),
+            height=25,
+            width=80,
+            fg_color="#dc3545",
+            hover_color="#c82333",
+            font=ctk.CTkFont(size=12)
+        )
+        delete_btn.pack(side="right")
+        return card
     
-    def create_goal_widget(self, goal):
-        """Crea un widget per visualizzare un singolo obiettivo"""
+    def _update_goal_card(self, card, goal):
+        """Aggiorna testi, colori e barra della card di un obiettivo"""
         try:
-            # Calcola il progresso
-            minuti_studiati, minuti_target, percentuale = self.goals_manager.calculate_progress(
-                self.current_user, goal
-            )
+            minuti_studiati, minuti_target, percentuale = self._goal_progress_for(goal)
             
             # Colore basato sullo stato
             color = self.goals_manager.get_goal_status_color(percentuale)
+            card['frame'].configure(border_color=color)
+            card['materia'].configure(text=goal['materia'])
             
-            # Frame principale per l'obiettivo
-            goal_frame = ctk.CTkFrame(
-                self.goals_container,
-                corner_radius=10,
-                border_width=2,
-                border_color=color
-            )
-            goal_frame.pack(fill="x", padx=10, pady=8)
-            
-            # Header con materia e stato
-            header_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
-            header_frame.pack(fill="x", padx=15, pady=(15, 5))
-            
-            # Materia
-            materia_label = ctk.CTkLabel(
-                header_frame,
-                text=goal['materia'],
-                font=ctk.CTkFont(size=18, weight="bold")
-            )
-            materia_label.pack(side="left")
-            
-            # Status badge
             if goal.get('completato'):
-                status_text = "COMPLETATO"
-                status_color = "#28a745"
+                card['status'].configure(text="COMPLETATO", text_color="#28a745")
             else:
-                status_text = f"{percentuale:.1f}%"
-                status_color = color
-            
-            status_label = ctk.CTkLabel(
-                header_frame,
-                text=status_text,
-                font=ctk.CTkFont(size=12, weight="bold"),
-                text_color=status_color
-            )
-            status_label.pack(side="right")
-            
-            # Info obiettivo
-            info_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
-            info_frame.pack(fill="x", padx=15, pady=5)
+                card['status'].configure(text=f"{percentuale:.1f}%", text_color=color)
             
-            # Target e progresso
             target_time = self.goals_manager.format_time(minuti_target)
             studied_time = self.goals_manager.format_time(minuti_studiati)
-            
-            target_label = ctk.CTkLabel(
-                info_frame,
-                text=f"Obiettivo: {target_time} / {goal['intervallo']}",
-                font=ctk.CTkFont(size=14)
-            )
-            target_label.pack(side="left")
-            
-            progress_label = ctk.CTkLabel(
-                info_frame,
-                text=f"Progresso: {studied_time}",
-                font=ctk.CTkFont(size=14)
-            )
-            progress_label.pack(side="right")
-            
-            # Barra di progresso
-            progress_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
-            progress_frame.pack(fill="x", padx=15, pady=5)
-            
-            progress_bar = ctk.CTkProgressBar(progress_frame, width=400, height=20)
-            progress_bar.pack(fill="x")
-            progress_bar.set(min(1.0, percentuale / 100))
-            
-            # Frame pulsanti
-            buttons_frame = ctk.CTkFrame(goal_frame, fg_color="transparent")
-            buttons_frame.pack(fill="x", padx=15, pady=(5, 15))
-            
-            # Pulsante elimina
-            delete_btn = ctk.CTkButton(
-                buttons_frame,
-                text="Elimina",
-                command=lambda: self.delete_goal(goal['id']),
-                height=25,
-                width=80,
-                fg_color="#dc3545",
-                hover_color="#c82333",
-                font=ctk.CTkFont(size=12)
-            )
-            delete_btn.pack(side="right")
+            card['target'].configure(text=f"Obiettivo: {target_time} / {goal['intervallo']}")
+            card['progress'].configure(text=f"Progresso: {studied_time}")
+            card['progress_bar'].set(min(1.0, percentuale / 100))
             
         except Exception as e:
-            print(f"Errore creazione widget obiettivo: {e}")
+            print(f"Errore aggiornamento widget obiettivo: {e}")
     
     def delete_goal(self, goal_id):
         """Elimina un obiettivo"""
@@ -2684,6 +3050,18 @@ class NotesWindow:
         controls_frame = ctk.CTkFrame(title_frame, fg_color="transparent")
         controls_frame.pack(side="right", padx=20)
         
+        # Ricerca testuale (per prefisso, mentre si scrive)
+        self.search_var = ctk.StringVar(value="")
+        self._search_job = None
+        search_entry = ctk.CTkEntry(
+            controls_frame,
+            textvariable=self.search_var,
+            placeholder_text="Cerca argomenti...",
+            width=200
+        )
+        search_entry.pack(side="left", padx=(0, 15))
+        search_entry.bind("<KeyRelease>", self.on_search_change)
+        
         # Filtro per materia
         filter_label = ctk.CTkLabel(controls_frame, text="Filtra per materia:")
         filter_label.pack(side="left", padx=(0, 10))
@@ -2758,6 +3136,13 @@ class NotesWindow:
         timeline_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
         
         self.timeline_container = timeline_frame
+        self.note_cards = CardPool(
+            self.timeline_container,
+            build_card=self._build_note_card,
+            update_card=self._update_note_card,
+            card_state=self._note_card_state,
+            key=lambda note: (note.get('id'), note.get('timestamp'))
+        )
         
         # Messaggio iniziale (verrà sostituito dalla timeline)
         self.no_notes_label = ctk.CTkLabel(
@@ -2767,162 +3152,188 @@ class NotesWindow:
             text_color="gray"
         )
         self.no_notes_label.pack(pady=50)
+        
+        # Errore di caricamento: un'unica label, nascosta al primo caricamento riuscito
+        self.notes_error_label = ctk.CTkLabel(
+            self.timeline_container,
+            text="",
+            font=ctk.CTkFont(size=14),
+            text_color="red"
+        )
     
     def load_notes(self):
         """Carica e visualizza tutte le note dell'utente"""
         try:
             # Determina materia filtro
-            selected_filter = self.filter_var.get()
-            materia_filter = None if selected_filter == "Tutte le materie" else selected_filter
+            materia_filter = self.get_materia_filter()
             
             # Carica le note
-            notes = self.progress_manager.get_user_notes(self.current_user, materia_filter)
+            notes = self.get_filtered_notes(materia_filter)
             
             # Aggiorna timeline
             self.update_timeline(notes)
             
             # Aggiorna statistiche
             self.update_stats(materia_filter)
+            self.notes_error_label.pack_forget()
             
         except Exception as e:
             print(f"Errore caricamento note: {e}")
-            error_label = ctk.CTkLabel(
-                self.timeline_container,
-                text=f"Errore nel caricamento:\\n{str(e)}",
-                font=ctk.CTkFont(size=14),
-                text_color="red"
-            )
-            error_label.pack(pady=20)
+            self.notes_error_label.configure(text=f"Errore nel caricamento:\\n{str(e)}")
+            self.notes_error_label.pack(pady=20)
+    
+    def get_materia_filter(self):
+        """Materia selezionata nel filtro, None per tutte"""
+        selected_filter = self.filter_var.get()
+        return None if selected_filter == "Tutte le materie" else selected_filter
+    
+    def get_filtered_notes(self, materia_filter):
+        """Note dell'utente per filtro materia e testo di ricerca"""
+        query = self.search_var.get().strip()
+        if not query:
+            return self.progress_manager.get_user_notes(self.current_user, materia_filter)
+        
+        notes = self.progress_manager.search_notes(self.current_user, query)
+        if materia_filter:
+            notes = [note for note in notes if note.get('materia') == materia_filter]
+        return notes
+    
+    def on_search_change(self, event=None):
+        """Ricerca mentre si scrive: aggiorna la timeline dopo una breve pausa"""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self._search_job = self.window.after(200, self.apply_search)
+    
+    def apply_search(self):
+        """Aggiorna solo la timeline con i risultati della ricerca"""
+        self._search_job = None
+        try:
+            self.update_timeline(self.get_filtered_notes(self.get_materia_filter()))
+        except Exception as e:
+            print(f"Errore ricerca note: {e}")
     
     def update_timeline(self, notes):
-        """Aggiorna la visualizzazione della timeline"""
-        # Pulisce il contenitore
-        for widget in self.timeline_container.winfo_children():
-            widget.destroy()
+        """Aggiorna la timeline: riusa le card esistenti, crea/elimina solo la differenza"""
+        self.note_cards.sync(notes)
         
         if not notes:
-            self.no_notes_label = ctk.CTkLabel(
-                self.timeline_container,
-                text="Nessuna nota per il filtro selezionato.\\nProva a cambiare il filtro o aggiungi nuove note!",
-                font=ctk.CTkFont(size=16),
-                text_color="gray"
+            self.no_notes_label.configure(
+                text="Nessuna nota per il filtro selezionato.\\nProva a cambiare il filtro o aggiungi nuove note!"
             )
             self.no_notes_label.pack(pady=50)
-            return
+        else:
+            self.no_notes_label.pack_forget()
+    
+    @staticmethod
+    def _note_card_state(note):
+        """Valori mostrati nella card di una nota"""
+        return tuple(note.get(field) for field in (
+            'tipo', 'materia', 'timestamp', 'argomento', 'descrizione',
+            'durata_sessione', 'ore_totali_materia'
+        ))
+    
+    def _build_note_card(self, note):
+        """Crea i widget (vuoti) della card di una nota"""
+        note_id = note['id']
+        card = {}
+        
+        # Frame principale per la nota
+        card['frame'] = note_frame = ctk.CTkFrame(
+            self.timeline_container,
+            corner_radius=10,
+            border_width=1
+        )
+        
+        # Header con materia e timestamp
+        header_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
+        header_frame.pack(fill="x", padx=15, pady=(15, 5))
+        
+        card['materia'] = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=16, weight="bold"))
+        card['materia'].pack(side="left")
         
-        # Crea widget per ogni nota
-        for note in notes:
-            self.create_note_widget(note)
+        card['time'] = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        card['time'].pack(side="right")
+        
+        # Argomento
+        argomento_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
+        argomento_frame.pack(fill="x", padx=15, pady=5)
+        
+        card['argomento'] = ctk.CTkLabel(
+            argomento_frame,
+            text="",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            anchor="w"
+        )
+        card['argomento'].pack(fill="x")
+        
+        # Descrizione (mostrata solo per le milestone che ne hanno una)
+        card['descrizione'] = ctk.CTkLabel(
+            argomento_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="gray",
+            anchor="w",
+            wraplength=500
+        )
+        
+        # Info durata e ore totali
+        info_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
+        info_frame.pack(fill="x", padx=15, pady=5)
+        
+        card['durata'] = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(size=12))
+        card['durata'].pack(side="left")
+        
+        card['ore'] = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(size=12), text_color="#3b82f6")
+        card['ore'].pack(side="right")
+        
+        # Pulsante elimina (solo per l'utente)
+        delete_btn = ctk.CTkButton(
+            note_frame,
+            text="Elimina",
+            command=lambda: self.delete_note(note_id),
+            height=25,
+            width=80,
+            fg_color="#dc3545",
+            hover_color="#c82333",
+            font=ctk.CTkFont(size=12)
+        )
+        delete_btn.pack(side="right", padx=15, pady=(0, 15))
+        return card
     
-    def create_note_widget(self, note):
-        """Crea un widget per visualizzare una singola nota"""
+    def _update_note_card(self, card, note):
+        """Aggiorna i testi della card di una nota"""
         try:
-            # Frame principale per la nota
-            note_frame = ctk.CTkFrame(
-                self.timeline_container,
-                corner_radius=10,
-                border_width=1,
-                border_color=("#3b82f6" if note.get('tipo') == 'milestone' else "#6b7280")
-            )
-            note_frame.pack(fill="x", padx=10, pady=8)
-            
-            # Header con materia e timestamp
-            header_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
-            header_frame.pack(fill="x", padx=15, pady=(15, 5))
+            is_milestone = note.get('tipo') == 'milestone'
+            card['frame'].configure(border_color=("#3b82f6" if is_milestone else "#6b7280"))
             
             # Materia e tipo
-            tipo_icon = "🏆" if note.get('tipo') == 'milestone' else "📝"
-            materia_text = f"{tipo_icon} {note['materia']}"
-            
-            materia_label = ctk.CTkLabel(
-                header_frame,
-                text=materia_text,
-                font=ctk.CTkFont(size=16, weight="bold")
-            )
-            materia_label.pack(side="left")
+            tipo_icon = "🏆" if is_milestone else "📝"
+            card['materia'].configure(text=f"{tipo_icon} {note['materia']}")
             
             # Timestamp
-            try:
-                from datetime import datetime
-                timestamp = datetime.fromisoformat(note.get('timestamp', ''))
-                time_str = timestamp.strftime("%d/%m/%Y %H:%M")
-            except:
-                time_str = note.get('timestamp', 'N/A')
-            
-            time_label = ctk.CTkLabel(
-                header_frame,
-                text=time_str,
-                font=ctk.CTkFont(size=12),
-                text_color="gray"
-            )
-            time_label.pack(side="right")
+            timestamp = dataM.parse_timestamp(note.get('timestamp', ''))
+            time_str = timestamp.strftime("%d/%m/%Y %H:%M") if timestamp else note.get('timestamp', 'N/A')
+            card['time'].configure(text=time_str)
             
-            # Argomento
-            argomento_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
-            argomento_frame.pack(fill="x", padx=15, pady=5)
+            card['argomento'].configure(text=f"Argomento: {note.get('argomento', 'N/A')}")
             
-            argomento_label = ctk.CTkLabel(
-                argomento_frame,
-                text=f"Argomento: {note.get('argomento', 'N/A')}",
-                font=ctk.CTkFont(size=14, weight="bold"),
-                anchor="w"
-            )
-            argomento_label.pack(fill="x")
-            
-            # Descrizione (se milestone)
-            if note.get('tipo') == 'milestone' and note.get('descrizione'):
-                desc_label = ctk.CTkLabel(
-                    argomento_frame,
-                    text=f"Dettagli: {note['descrizione']}",
-                    font=ctk.CTkFont(size=12),
-                    text_color="gray",
-                    anchor="w",
-                    wraplength=500
-                )
-                desc_label.pack(fill="x", pady=(5, 0))
-            
-            # Info durata e ore totali
-            info_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
-            info_frame.pack(fill="x", padx=15, pady=5)
+            if is_milestone and note.get('descrizione'):
+                card['descrizione'].configure(text=f"Dettagli: {note['descrizione']}")
+                card['descrizione'].pack(fill="x", pady=(5, 0))
+            else:
+                card['descrizione'].pack_forget()
             
             if note.get('tipo') == 'sessione':
                 durata_text = f"Durata sessione: {note.get('durata_sessione', 0)} min"
             else:
                 durata_text = "Milestone completata"
-            
-            durata_label = ctk.CTkLabel(
-                info_frame,
-                text=durata_text,
-                font=ctk.CTkFont(size=12)
-            )
-            durata_label.pack(side="left")
+            card['durata'].configure(text=durata_text)
             
             ore_totali = note.get('ore_totali_materia', 0)
-            ore_text = f"Ore totali materia: {ore_totali:.1f}h"
-            
-            ore_label = ctk.CTkLabel(
-                info_frame,
-                text=ore_text,
-                font=ctk.CTkFont(size=12),
-                text_color="#3b82f6"
-            )
-            ore_label.pack(side="right")
-            
-            # Pulsante elimina (solo per l'utente)
-            delete_btn = ctk.CTkButton(
-                note_frame,
-                text="Elimina",
-                command=lambda: self.delete_note(note['id']),
-                height=25,
-                width=80,
-                fg_color="#dc3545",
-                hover_color="#c82333",
-                font=ctk.CTkFont(size=12)
-            )
-            delete_btn.pack(side="right", padx=15, pady=(0, 15))
+            card['ore'].configure(text=f"Ore totali materia: {ore_totali:.1f}h")
             
         except Exception as e:
-            print(f"Errore creazione widget nota: {e}")
+            print(f"Errore aggiornamento widget nota: {e}")
     
     def update_stats(self, materia_filter=None):
         """Aggiorna le statistiche nella sidebar"""
@@ -3,11 +3,104 @@ Gestore note di progresso per TimeTrackerT2
 Gestisce le note sugli argomenti studiati e il tempo speso per ciascun argomento
 """
 
+import heapq
 import json
-import os
+import re
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import dataM  # Per accedere alle sessioni
+from records import ProgressNote
+
+
+_TOKEN_RE = re.compile(r'\w+')
+SEARCH_FIELDS = ('argomento', 'materia', 'descrizione')
+
+
+def _tokenize(text: str) -> List[str]:
+    """Parole minuscole di un testo (lettere accentate comprese)"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _note_tokens(note: Dict) -> set:
+    return {token for field in SEARCH_FIELDS for token in _tokenize(note.get(field) or '')}
+
+
+class _TextIndex:
+    """Indice invertito token -> note, con vocabolario ordinato per la ricerca per prefisso"""
+    
+    __slots__ = ('postings', 'vocabulary')
+    
+    def __init__(self):
+        self.postings = {}  # token -> {id(nota): nota}
+        self.vocabulary = []  # token ordinati
+    
+    @classmethod
+    def build(cls, notes: List[Dict]) -> '_TextIndex':
+        """Costruzione in blocco: il vocabolario viene ordinato una volta sola"""
+        index = cls()
+        for note in notes:
+            for token in _note_tokens(note):
+                index.postings.setdefault(token, {})[id(note)] = note
+        index.vocabulary = sorted(index.postings)
+        return index
+    
+    def add(self, note: Dict):
+        for token in _note_tokens(note):
+            bucket = self.postings.get(token)
+            if bucket is None:
+                bucket = self.postings[token] = {}
+                insort(self.vocabulary, token)
+            bucket[id(note)] = note
+    
+    def remove(self, note: Dict):
+        for token in _note_tokens(note):
+            bucket = self.postings.get(token)
+            if bucket is None:
+                continue
+            bucket.pop(id(note), None)
+            if not bucket:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+    
+    def match_prefix(self, prefix: str) -> Dict[int, Dict]:
+        """Note che contengono almeno una parola che inizia con prefix"""
+        matches = {}
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            matches.update(self.postings[self.vocabulary[i]])
+            i += 1
+        return matches
+
+
+class _NoteTimeline:
+    """Note ordinate per timestamp, con le chiavi in una lista parallela per bisect"""
+    
+    __slots__ = ('keys', 'notes')
+    
+    def __init__(self, notes: Optional[List[Dict]] = None):
+        self.notes = sorted(notes, key=lambda note: note.get('timestamp', '')) if notes else []
+        self.keys = [note.get('timestamp', '') for note in self.notes]
+    
+    def add(self, note: Dict):
+        key = note.get('timestamp', '')
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.notes.insert(i, note)
+    
+    def remove(self, note: Dict):
+        for i, candidate in enumerate(self.notes):
+            if candidate is note:
+                del self.keys[i]
+                del self.notes[i]
+                return
+    
+    def newest_first(self) -> List[Dict]:
+        return self.notes[::-1]
+    
+    def since(self, timestamp: str) -> List[Dict]:
+        """Note con timestamp >= timestamp, più recenti prima"""
+        return self.notes[bisect_left(self.keys, timestamp):][::-1]
 
 
 class ProgressManager:
@@ -15,29 +108,94 @@ class ProgressManager:
     
     def __init__(self):
         self.notes_file = "progress_notes.json"
+        self.storage = dataM.get_sqlite_storage()
+        self.journal = dataM.JsonJournal(self.notes_file, record_type=ProgressNote)
         self.notes = self._load_notes()
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """Indici in memoria: per utente e per (utente, materia), ordinati per timestamp, e testo"""
+        self._by_user = {}  # user -> _NoteTimeline
+        self._by_subject = {}  # (user, materia) -> _NoteTimeline
+        self._text_index = {}  # user -> _TextIndex
+        self._max_id = max((note.get('id', 0) for note in self.notes), default=0)
+        
+        # Costruzione in blocco: raggruppa e ordina una volta per bucket
+        user_notes, subject_notes = {}, {}
+        for note in self.notes:
+            user_notes.setdefault(note.get('user'), []).append(note)
+            subject_notes.setdefault((note.get('user'), note.get('materia')), []).append(note)
+        for user, notes in user_notes.items():
+            self._by_user[user] = _NoteTimeline(notes)
+            self._text_index[user] = _TextIndex.build(notes)
+        for key, notes in subject_notes.items():
+            self._by_subject[key] = _NoteTimeline(notes)
+    
+    def _index_note(self, note: Dict):
+        self._by_user.setdefault(note.get('user'), _NoteTimeline()).add(note)
+        self._by_subject.setdefault((note.get('user'), note.get('materia')), _NoteTimeline()).add(note)
+        self._text_index.setdefault(note.get('user'), _TextIndex()).add(note)
+        self._max_id = max(self._max_id, note.get('id', 0))
+    
+    def _unindex_note(self, note: Dict):
+        for index, key in ((self._by_user, note.get('user')),
+                           (self._by_subject, (note.get('user'), note.get('materia')))):
+            timeline = index.get(key)
+            if timeline:
+                timeline.remove(note)
+        text_index = self._text_index.get(note.get('user'))
+        if text_index:
+            text_index.remove(note)
+    
+    def _add_note(self, note: Dict) -> bool:
+        """Aggiunge una nota a lista, indici e archivio"""
+        self.notes.append(note)
+        self._index_note(note)
+        return self._persist_note(note)
     
-    def _load_notes(self) -> List[Dict]:
-        """Carica le note dal file JSON"""
+    def _load_notes(self) -> List[ProgressNote]:
+        """Carica le note dal file JSON (o dal backend SQLite)"""
         try:
-            if os.path.exists(self.notes_file):
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
+            if self.storage:
+                return [ProgressNote.from_dict(note) for note in self.storage.load_notes()]
+            return self.journal.load()
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Errore caricamento note: {e}")
             return []
     
     def _save_notes(self) -> bool:
-        """Salva le note nel file JSON"""
+        """Salva le note nel file JSON (riscrittura atomica completa)"""
         try:
-            with open(self.notes_file, 'w', encoding='utf-8') as f:
-                json.dump(self.notes, f, ensure_ascii=False, indent=2)
+            self.journal.compact(self.notes)
             return True
         except Exception as e:
             print(f"Errore salvataggio note: {e}")
             return False
     
+    def _persist_note(self, note: Dict) -> bool:
+        """Salva una nota nuova o modificata"""
+        try:
+            if self.storage:
+                self.storage.upsert_note(note)
+            else:
+                self.journal.put(note, self.notes)
+            return True
+        except Exception as e:
+            print(f"Errore salvataggio nota: {e}")
+            return False
+    
+    def _remove_note(self, note_id: int) -> bool:
+        """Rimuove una nota dall'archivio"""
+        try:
+            if self.storage:
+                self.storage.delete_note(note_id)
+            else:
+                self.journal.delete(note_id, self.notes)
+            return True
+        except Exception as e:
+            print(f"Errore eliminazione nota: {e}")
+            return False
+    
     def add_session_note(self, user: str, materia: str, argomento: str, 
                         durata_sessione: int, session_id: Optional[int] = None) -> bool:
         """
@@ -55,9 +213,9 @@ class ProgressManager:
             ore_totali_materia = self._calculate_total_subject_hours(user, materia)
             
             # Genera ID unico per la nota
-            note_id = max([note.get('id', 0) for note in self.notes], default=0) + 1
+            note_id = self._max_id + 1
             
-            new_note = {
+            new_note = ProgressNote({
                 'id': note_id,
                 'user': user,
                 'materia': materia,
@@ -67,59 +225,14 @@ class ProgressManager:
                 'timestamp': datetime.now().isoformat(),
                 'session_id': session_id,
                 'tipo': 'sessione'  # Tipo di nota
-            }
+            })
             
-            self.notes.append(new_note)
-            return self._save_notes()
+            return self._add_note(new_note)
             
         except Exception as e:
             print(f"Errore aggiunta nota sessione: {e}")
             return False
     
-    def add_milestone_note(self, user: str, materia: str, argomento: str, 
-                          descrizione: Optional[str] = None) -> bool:
-        """
-        Aggiunge una nota milestone (traguardo completato)
-        
-        Args:
-            user: Nome utente  
-            materia: Materia
-            argomento: Titolo del traguardo/argomento completato
-            descrizione: Descrizione opzionale dettagliata
-        """
-        try:
-            ore_totali_materia = self._calculate_total_subject_hours(user, materia)
-            note_id = max([note.get('id', 0) for note in self.notes], default=0) + 1
-            
-            new_note = {
-                'id': note_id,
-                'user': user,
-                'materia': materia,
-                'argomento': argomento,
-                'descrizione': descrizione or "",
-                'ore_totali_materia': round(ore_totali_materia, 2),
-                'timestamp': datetime.now().isoformat(),
-                'tipo': 'milestone'
-            }
-            
-            self.notes.append(new_note)
-            return self._save_notes()
-            
-        except Exception as e:
-            print(f"Errore aggiunta milestone: {e}")
-            return False
-    
-    def get_user_notes(self, user: str, materia: Optional[str] = None) -> List[Dict]:
-        """Ottieni tutte le note di un utente, opzionalmente filtrate per materia"""
-        user_notes = [note for note in self.notes if note.get('user') == user]
-        
-        if materia:
-            user_notes = [note for note in user_notes if note.get('materia') == materia]
-        
-        # Ordina per timestamp (più recenti prima)
-        user_notes.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return user_notes
-    
     def get_subject_timeline(self, user: str, materia: str) -> List[Dict]:
         """Ottieni timeline completa di una materia con note e statistiche"""
         notes = self.get_user_notes(user, materia)
@@ -132,57 +245,11 @@ class ProgressManager:
         
         return notes
     
-    def get_subject_statistics(self, user: str, materia: str) -> Dict:
-        """Ottieni statistiche complete per una materia"""
-        try:
-            # Carica tutte le sessioni per calcoli
-            sessions = dataM.load_sessions(user)
-            subject_sessions = [s for s in sessions if s.get('materia') == materia]
-            
-            # Carica le note
-            notes = self.get_user_notes(user, materia)
-            session_notes = [n for n in notes if n.get('tipo') == 'sessione']
-            milestone_notes = [n for n in notes if n.get('tipo') == 'milestone']
-            
-            # Calcoli base
-            total_sessions = len(subject_sessions)
-            total_hours = sum(s.get('durata', 0) for s in subject_sessions) / 60
-            sessions_with_notes = len(session_notes)
-            
-            # Argomenti unici studiati
-            argomenti_unici = len(set(n.get('argomento', '') for n in notes if n.get('argomento')))
-            
-            # Tempo medio per argomento (approssimativo)
-            tempo_medio_argomento = total_hours / max(argomenti_unici, 1)
-            
-            # Milestone completate
-            milestone_count = len(milestone_notes)
-            
-            return {
-                'materia': materia,
-                'sessioni_totali': total_sessions,
-                'ore_totali': round(total_hours, 2),
-                'sessioni_con_note': sessions_with_notes,
-                'copertura_note': round((sessions_with_notes / max(total_sessions, 1)) * 100, 1),
-                'argomenti_studiati': argomenti_unici,
-                'milestone_completate': milestone_count,
-                'tempo_medio_per_argomento': round(tempo_medio_argomento, 2),
-                'ultima_attivita': max([n.get('timestamp', '') for n in notes], default=None)
-            }
-            
-        except Exception as e:
-            print(f"Errore calcolo statistiche: {e}")
-            return {'materia': materia, 'errore': str(e)}
-    
     def _calculate_total_subject_hours(self, user: str, materia: str) -> float:
         """Calcola il totale delle ore studiate per una materia"""
         try:
-            sessions = dataM.load_sessions(user)
-            subject_sessions = [s for s in sessions if s.get('materia') == materia]
-            total_minutes = sum(s.get('durata', 0) for s in subject_sessions)
-            # DEBUG temporaneo
-            print(f"DEBUG: Calcolo ore per {materia} - Sessioni trovate: {len(subject_sessions)}, Minuti totali: {total_minutes}")
-            return total_minutes / 60
+            # Somme prefisse della tabella colonnare (JSON o SQLite): niente scansione delle sessioni
+            return dataM.sum_study_minutes(user, materia) / 60
         except Exception as e:
             print(f"ERROR in _calculate_total_subject_hours: {e}")
             return 0.0
@@ -202,8 +269,11 @@ class ProgressManager:
     def delete_note(self, note_id: int) -> bool:
         """Elimina una nota per ID"""
         try:
+            removed = [note for note in self.notes if note.get('id') == note_id]
             self.notes = [note for note in self.notes if note.get('id') != note_id]
-            return self._save_notes()
+            for note in removed:
+                self._unindex_note(note)
+            return self._remove_note(note_id)
         except Exception as e:
             print(f"Errore eliminazione nota: {e}")
             return False
@@ -211,50 +281,47 @@ class ProgressManager:
     def get_recent_activity(self, user: str, days: int = 7) -> List[Dict]:
         """Ottieni attività recente degli ultimi N giorni"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent_notes = []
-            
-            for note in self.notes:
-                if note.get('user') != user:
-                    continue
-                
-                try:
-                    note_date = datetime.fromisoformat(note.get('timestamp', ''))
-                    if note_date >= cutoff_date:
-                        recent_notes.append(note)
-                except ValueError:
-                    continue
+            timeline = self._by_user.get(user)
+            if not timeline:
+                return []
             
-            # Ordina per data più recente
-            recent_notes.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            return recent_notes
+            # Ricerca binaria sulla timeline dell'utente (più recenti prima)
+            cutoff_date = datetime.now() - timedelta(days=days)
+            recent_notes = timeline.since(cutoff_date.isoformat())
+            return [note for note in recent_notes if dataM.parse_timestamp(note.get('timestamp'))]
             
         except Exception as e:
             print(f"Errore caricamento attività recente: {e}")
             return []
     
-    def search_notes(self, user: str, query: str) -> List[Dict]:
-        """Cerca nelle note per testo"""
+    def search_notes(self, user: str, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Cerca nelle note per testo (argomento, materia, descrizione).
+        Ogni parola della query è un prefisso e devono corrispondere tutte;
+        risultati ordinati dai più recenti, al massimo limit se indicato.
+        """
         try:
-            query_lower = query.lower()
-            results = []
+            terms = _tokenize(query)
+            if not terms:
+                notes = self.get_user_notes(user)
+                return notes[:limit] if limit else notes
             
-            for note in self.notes:
-                if note.get('user') != user:
-                    continue
-                
-                # Cerca in argomento, materia e descrizione
-                text_fields = [
-                    note.get('argomento', ''),
-                    note.get('materia', ''), 
-                    note.get('descrizione', '')
-                ]
-                
-                if any(query_lower in field.lower() for field in text_fields if field):
-                    results.append(note)
+            text_index = self._text_index.get(user)
+            if not text_index:
+                return []
+            
+            # Intersezione degli insiemi, partendo dal più piccolo
+            candidate_sets = sorted((text_index.match_prefix(term) for term in set(terms)), key=len)
+            matches = candidate_sets[0]
+            for candidates in candidate_sets[1:]:
+                matches = {key: note for key, note in matches.items() if key in candidates}
             
-            results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            return results
+            def by_recency(note):
+                return note.get('timestamp', '')
+            
+            if limit:
+                return heapq.nlargest(limit, matches.values(), key=by_recency)
+            return sorted(matches.values(), key=by_recency, reverse=True)
             
         except Exception as e:
             print(f"Errore ricerca note: {e}")
@@ -263,21 +330,13 @@ class ProgressManager:
     def get_user_notes(self, user: str, materia_filter: Optional[str] = None) -> List[Dict]:
         """Ottieni tutte le note di un utente, opzionalmente filtrate per materia"""
         try:
-            user_notes = []
-            
-            for note in self.notes:
-                if note.get('user') != user:
-                    continue
-                
-                # Applica filtro materia se specificato
-                if materia_filter and note.get('materia') != materia_filter:
-                    continue
-                
-                user_notes.append(note)
+            if materia_filter:
+                timeline = self._by_subject.get((user, materia_filter))
+            else:
+                timeline = self._by_user.get(user)
             
-            # Ordina per timestamp più recente
-            user_notes.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            return user_notes
+            # Ordinate per timestamp più recente
+            return timeline.newest_first() if timeline else []
             
         except Exception as e:
             print(f"Errore caricamento note utente: {e}")
@@ -286,11 +345,9 @@ class ProgressManager:
     def get_subject_statistics(self, user: str, materia: str) -> Dict:
         """Calcola statistiche dettagliate per una materia specifica"""
         try:
-            # Filtra note per utente e materia
-            subject_notes = [
-                note for note in self.notes 
-                if note.get('user') == user and note.get('materia') == materia
-            ]
+            # Note di utente e materia dall'indice
+            timeline = self._by_subject.get((user, materia))
+            subject_notes = timeline.notes if timeline else []
             
             if not subject_notes:
                 return {
@@ -311,15 +368,14 @@ class ProgressManager:
             argomenti_unici = set(n.get('argomento') for n in subject_notes if n.get('argomento'))
             argomenti_studiati = len(argomenti_unici)
             
-            # Calcola ore totali dalla sessioni dell'utente
+            # Ore e numero di sessioni dagli indici della tabella colonnare (durate già in minuti)
             try:
-                all_sessions = dataM.load_sessions(user)
-                user_sessions = [s for s in all_sessions if s.get('materia') == materia]
-                ore_totali = sum(s.get('durata', 0) for s in user_sessions) / 60.0  # Converti minuti in ore
+                table = dataM.get_session_table()
+                ore_totali = table.sum_minutes(user, materia) / 60.0
+                sessioni_registrate = table.count(user, materia)
                 
-                # Calcola copertura note (percentuale sessioni con note)
-                sessions_with_notes = len([s for s in user_sessions if s.get('note_argomento')])
-                copertura_note = (sessions_with_notes / len(user_sessions) * 100) if user_sessions else 0
+                # Copertura note: sessioni con nota (note di tipo sessione) sul totale sessioni
+                copertura_note = min(100.0, sessioni_totali / sessioni_registrate * 100) if sessioni_registrate else 0
                 
             except Exception as e:
                 print(f"Errore calcolo ore totali: {e}")
@@ -359,22 +415,21 @@ class ProgressManager:
             ore_totali_materia = self._calculate_total_subject_hours(user, materia)
             
             # Crea la nota milestone
-            note = {
-                'id': len(self.notes) + 1,  # ID incrementale
+            note = ProgressNote({
+                'id': self._max_id + 1,  # ID incrementale (massimo corrente + 1)
                 'user': user,
                 'materia': materia,
                 'argomento': argomento,
                 'tipo': 'milestone',
                 'timestamp': datetime.now().isoformat(),
                 'ore_totali_materia': round(ore_totali_materia, 2)
-            }
+            })
             
             # Aggiungi descrizione se fornita
             if descrizione:
                 note['descrizione'] = descrizione
             
-            self.notes.append(note)
-            return self._save_notes()
+            return self._add_note(note)
             
         except Exception as e:
             print(f"Errore aggiunta milestone: {e}")
@@ -0,0 +1,193 @@
+"""
+Record compatti per TimeTrackerT2
+Sessioni, obiettivi e note in memoria come oggetti con __slots__ invece di
+dizionari: i campi noti occupano uno slot ciascuno, gli eventuali campi
+sconosciuti finiscono in un dizionario a parte creato solo se serve.
+
+I record si comportano come dizionari (record['materia'], record.get(...),
+'campo' in record, items(), uguaglianza con un dict), quindi il codice
+esistente continua a funzionare. Un campo mai assegnato equivale a una
+chiave assente, come nei dizionari letti dal JSON.
+"""
+
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    """Base dei record: campi fissi in slot, campi extra in _extra"""
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    _FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data=None, **fields):
+        self._extra = None
+        if data:
+            for key, value in data.items():
+                self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record da un dizionario (es. json.loads) senza passare da __init__"""
+        record = object.__new__(cls)
+        record._extra = None
+        field_set = cls._FIELD_SET
+        for key, value in data.items():
+            if key in field_set:
+                setattr(record, key, value)
+            else:
+                if record._extra is None:
+                    record._extra = {}
+                record._extra[key] = value
+        return record
+
+    def to_dict(self):
+        """Dizionario con i soli campi presenti, nell'ordine dei FIELDS"""
+        data = {}
+        for key in self.FIELDS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    # ===== API DIZIONARIO =====
+    # get e [] sono i percorsi caldi: un campo in slot si legge con un solo
+    # getattr, senza passare dai mixin di MutableMapping né da _extra
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        extra = self._extra
+        return default if extra is None else extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        count = sum(1 for key in self.FIELDS if hasattr(self, key))
+        return count + (len(self._extra) if self._extra else 0)
+
+    def __eq__(self, other):
+        """Confronto campo per campo senza costruire dizionari"""
+        if type(other) is type(self):
+            for key in self.FIELDS:
+                if getattr(self, key, _MISSING) != getattr(other, key, _MISSING):
+                    return False
+            return (self._extra or {}) == (other._extra or {})
+        if not isinstance(other, (dict, Record)):
+            return NotImplemented
+        count = 0
+        for key in self.FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                if other.get(key, _MISSING) != value:
+                    return False
+                count += 1
+        if self._extra:
+            for key, value in self._extra.items():
+                if other.get(key, _MISSING) != value:
+                    return False
+            count += len(self._extra)
+        return count == len(other)
+
+    __hash__ = None
+
+    def copy(self):
+        return self.from_dict(self.to_dict())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Session(Record):
+    """Sessione di studio (una riga di sessions.json)"""
+
+    FIELDS = ('id', 'user', 'materia', 'durata', 'timestamp', 'note_argomento')
+    __slots__ = FIELDS
+
+
+class Goal(Record):
+    """Obiettivo di studio (goals.json)"""
+
+    FIELDS = ('id', 'user', 'materia', 'ore_target', 'minuti_target', 'tempo_target_minuti',
+              'intervallo', 'data_creazione', 'completato', 'data_completamento')
+    __slots__ = FIELDS
+
+
+class ProgressNote(Record):
+    """Nota del registro argomenti (progress_notes.json)"""
+
+    FIELDS = ('id', 'user', 'materia', 'argomento', 'tipo', 'timestamp', 'durata_sessione',
+              'ore_totali_materia', 'session_id', 'descrizione')
+    __slots__ = FIELDS
+
+
+def columns(records, fields):
+    """
+    Colonne {campo: [valori]} da una lista di record o dizionari, con None per
+    i campi assenti. Se tutti i record hanno il campo in uno slot lo legge con
+    getattr: è il modo veloce di passare i record a pd.DataFrame.
+    """
+    types = {type(record) for record in records}
+    result = {}
+    for field in fields:
+        if all(issubclass(kind, Record) and field in kind._FIELD_SET for kind in types):
+            result[field] = [getattr(record, field, None) for record in records]
+        else:
+            result[field] = [record.get(field) for record in records]
+    return result
+
+
+def json_default(obj):
+    """Hook 'default' per json.dump/json.dumps: serializza i record come dizionari"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
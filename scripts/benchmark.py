@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark di scalabilità TimeTrackerT2
+Genera in una cartella temporanea dati sintetici (sessions.json, goals.json,
+progress_notes.json, users.txt, subjects.json) da 10^3 a 10^7 sessioni
+distribuite su molti utenti e misura le operazioni principali:
+
+- dataM.save_session e dataM.load_sessions (a freddo e a caldo);
+- costruzione dell'AnalyticsEngine (a freddo e con lo snapshot già pronto);
+- ogni ChartGenerator.create_*;
+- GoalsManager.check_completed_goals e ProgressManager.search_notes.
+
+Ogni dimensione gira in un processo nuovo, quindi le cache di modulo
+partono vuote. I risultati vanno in un file JSON; con --compare vengono
+confrontati con un'esecuzione precedente e lo script esce con codice 1 se
+qualche misura peggiora oltre la soglia.
+
+Uso:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --sizes 1000 100000 10000000 --users 500
+    python scripts/benchmark.py --backend sqlite --compare benchmark_risultati/base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+OUTPUT_DIR = ROOT_DIR / 'benchmark_risultati'
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_USERS = 50
+BACKENDS = ('json', 'sqlite')
+
+SUBJECTS = ['Matematica', 'Fisica', 'Chimica', 'Storia', 'Inglese', 'Informatica', 'Biologia', 'Filosofia']
+TOPICS = ['derivate parziali', 'integrali doppi', 'cinematica', 'termodinamica', 'reazioni redox',
+          'rivoluzione francese', 'present perfect', 'algoritmi di ordinamento', 'genetica mendeliana',
+          'critica della ragion pura', 'esercizi capitolo', 'ripasso generale']
+INTERVALS = ('giorno', 'settimana', 'mese')
+SUBJECTS_PER_USER = 4
+GOALS_PER_USER = 3
+SESSIONS_PER_NOTE = 10
+HISTORY_DAYS = 365
+
+SAVE_CALLS = 50
+REPEAT = 3  # misure a caldo: migliore di REPEAT
+SEARCH_QUERIES = ('derivate', 'fis', 'esercizi capitolo', 'termo')
+
+REGRESSION_THRESHOLD = 1.25
+MIN_COMPARE_SECONDS = 0.001  # sotto il millisecondo le differenze sono rumore
+
+
+#=====GENERAZIONE DATI=====
+def generate_dataset(directory, n_sessions, n_users, seed=0):
+    """
+    Scrive i file dati sintetici in directory. Le sessioni sono in ordine
+    di tempo sugli ultimi HISTORY_DAYS giorni e gli utenti si alternano.
+    Ritorna il numero di record per file.
+    """
+    rng = random.Random(seed)
+    users = [f"Utente{i:04d}" for i in range(n_users)]
+    subjects = {user: rng.sample(SUBJECTS, SUBJECTS_PER_USER) for user in users}
+
+    with open(os.path.join(directory, 'users.txt'), 'w', encoding='utf-8') as f:
+        f.writelines(user + '\n' for user in users)
+    with open(os.path.join(directory, 'subjects.json'), 'w') as f:
+        json.dump(subjects, f)
+
+    start = time.time() - HISTORY_DAYS * 86400
+    step = HISTORY_DAYS * 86400 / max(n_sessions, 1)
+    notes = []
+    with open(os.path.join(directory, 'sessions.json'), 'w') as f:
+        for i in range(n_sessions):
+            user = users[i % n_users]
+            materia = subjects[user][rng.randrange(SUBJECTS_PER_USER)]
+            moment = time.localtime(start + (i + rng.random()) * step)
+            minutes = rng.randint(5, 120)
+            # Una sessione su venti con la durata nel formato storico HH:MM:SS
+            durata = f"{minutes // 60:02d}:{minutes % 60:02d}:00" if i % 20 == 0 else minutes
+            session = {'id': i + 1, 'user': user, 'materia': materia, 'durata': durata,
+                       'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', moment)}
+            f.write(json.dumps(session) + '\n')
+
+            if i % SESSIONS_PER_NOTE == 0:
+                notes.append({
+                    'id': len(notes) + 1, 'user': user, 'materia': materia,
+                    'argomento': rng.choice(TOPICS).capitalize(), 'tipo': 'sessione',
+                    'durata_sessione': minutes, 'ore_totali_materia': 0.0, 'session_id': i + 1,
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', moment),
+                })
+
+    with open(os.path.join(directory, 'progress_notes.json'), 'w', encoding='utf-8') as f:
+        json.dump(notes, f, ensure_ascii=False)
+
+    goals = []
+    for user in users:
+        for _ in range(GOALS_PER_USER):
+            ore = rng.randint(1, 20)
+            goals.append({
+                'id': len(goals) + 1, 'user': user, 'materia': rng.choice(subjects[user]),
+                'ore_target': ore, 'minuti_target': 0, 'tempo_target_minuti': ore * 60,
+                'intervallo': rng.choice(INTERVALS), 'data_creazione': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'completato': False, 'data_completamento': None,
+            })
+    with open(os.path.join(directory, 'goals.json'), 'w', encoding='utf-8') as f:
+        json.dump(goals, f, ensure_ascii=False)
+
+    return {'sessioni': n_sessions, 'utenti': n_users, 'note': len(notes), 'obiettivi': len(goals)}
+
+
+#=====MISURE=====
+def _timed(func, repeat=1):
+    """(secondi del tentativo migliore, risultato dell'ultima chiamata)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _max_rss_mb():
+    """Picco di memoria del processo in MB (None dove resource non esiste)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux in KB, macOS in byte
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_size(n_sessions, n_users, backend='json', seed=0, keep_data=False):
+    """
+    Genera i dati per una dimensione e misura tutte le operazioni.
+    Pensata per girare in un processo dedicato: cambia cartella di lavoro.
+    """
+    directory = tempfile.mkdtemp(prefix='timetracker_bench_')
+    os.chdir(directory)
+    try:
+        generate_seconds, counts = _timed(lambda: generate_dataset(directory, n_sessions, n_users, seed))
+        if backend == 'sqlite':
+            from sqlite_storage import migrate_json_to_sqlite
+            migrate_json_to_sqlite()
+
+        import matplotlib
+        matplotlib.use('Agg')
+        import dataM
+        from analytics_engine import AnalyticsEngine
+        from chart_generator import ChartGenerator
+        from goals_manager import GoalsManager
+        from progress_manager import ProgressManager
+
+        user = dataM.load_user()[0]
+        measures = {}
+
+        def record(name, seconds, calls=1):
+            measures[name] = {'secondi': round(seconds, 6), 'chiamate': calls}
+
+        record('dataM.load_sessions (freddo)', *_timed(lambda: dataM.load_sessions(user))[:1])
+        record('dataM.load_sessions (caldo)', _timed(lambda: dataM.load_sessions(user), REPEAT)[0])
+
+        start = time.perf_counter()
+        for i in range(SAVE_CALLS):
+            dataM.save_session(user, SUBJECTS[i % len(SUBJECTS)], 25)
+        record('dataM.save_session', (time.perf_counter() - start) / SAVE_CALLS, SAVE_CALLS)
+
+        record('AnalyticsEngine (freddo)', _timed(lambda: AnalyticsEngine(user))[0])
+        seconds, engine = _timed(lambda: AnalyticsEngine(user), REPEAT)
+        record('AnalyticsEngine (caldo)', seconds)
+
+        chart_gen = ChartGenerator(engine)
+        for name in sorted(attr for attr in dir(ChartGenerator) if attr.startswith('create_')):
+            record(f'ChartGenerator.{name}', _timed(getattr(chart_gen, name))[0])
+
+        seconds, goals_manager = _timed(GoalsManager)
+        record('GoalsManager()', seconds)
+        record('GoalsManager.check_completed_goals',
+               _timed(lambda: goals_manager.check_completed_goals(user))[0])
+
+        seconds, progress_manager = _timed(ProgressManager)
+        record('ProgressManager()', seconds)
+        for query in SEARCH_QUERIES:
+            record(f'ProgressManager.search_notes ({query})',
+                   _timed(lambda: progress_manager.search_notes(user, query), REPEAT)[0])
+
+        return dict(counts, backend=backend, generazione_secondi=round(generate_seconds, 3),
+                    max_rss_mb=_max_rss_mb(), misure=measures)
+    finally:
+        os.chdir(ROOT_DIR)
+        if keep_data:
+            print(f"   dati conservati in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+#=====CONFRONTO=====
+def compare_results(current, previous, threshold=REGRESSION_THRESHOLD):
+    """
+    Misure peggiorate oltre la soglia rispetto a un'esecuzione precedente,
+    abbinate per numero di sessioni e backend: [(sessioni, backend, misura, rapporto)]
+    """
+    previous_runs = {(run['sessioni'], run['backend']): run['misure'] for run in previous.get('risultati', [])}
+    regressions = []
+    for run in current['risultati']:
+        old_measures = previous_runs.get((run['sessioni'], run['backend']))
+        if not old_measures:
+            continue
+        for name, measure in run['misure'].items():
+            old = old_measures.get(name)
+            if not old or max(old['secondi'], measure['secondi']) < MIN_COMPARE_SECONDS:
+                continue
+            ratio = measure['secondi'] / max(old['secondi'], 1e-9)
+            if ratio > threshold:
+                regressions.append((run['sessioni'], run['backend'], name, ratio))
+    return regressions
+
+
+def print_run(run):
+    print(f"   generazione dati {run['generazione_secondi']:.1f}s - "
+          f"{run['note']} note, {run['obiettivi']} obiettivi - picco memoria {run['max_rss_mb']} MB")
+    for name, measure in run['misure'].items():
+        print(f"   {measure['secondi'] * 1000:12.2f} ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark di scalabilità con dati sintetici")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numero di sessioni")
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+    parser.add_argument('--backend', default='json', choices=BACKENDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file JSON dei risultati (default: benchmark_risultati/)")
+    parser.add_argument('--compare', help="risultati precedenti da confrontare")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="rapporto oltre il quale una misura è una regressione")
+    parser.add_argument('--keep-data', action='store_true', help="non cancella i dati generati")
+    args = parser.parse_args(argv)
+
+    print("🚀 TimeTrackerT2 - Benchmark di scalabilità")
+    print("=" * 50)
+
+    report = {
+        'data': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'piattaforma': platform.platform(),
+        'parametri': {'utenti': args.users, 'backend': args.backend, 'seed': args.seed,
+                      'save_calls': SAVE_CALLS, 'repeat': REPEAT},
+        'risultati': [],
+    }
+    failures = 0
+    for size in args.sizes:
+        print(f"\n📊 {size} sessioni, {args.users} utenti ({args.backend})")
+        # Un processo nuovo per dimensione: cache e memoria non si sommano tra le misure
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                run = executor.submit(run_size, size, args.users, args.backend, args.seed, args.keep_data).result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ Benchmark fallito: {e}")
+                continue
+        print_run(run)
+        report['risultati'].append(run)
+
+    output = Path(args.output) if args.output else OUTPUT_DIR / f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Risultati salvati in {output}")
+
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"❌ Confronto impossibile: {e}")
+            return 1
+        regressions = compare_results(report, previous, args.threshold)
+        for size, backend, name, ratio in regressions:
+            print(f"❌ {size} sessioni ({backend}) - {name}: {ratio:.2f}x più lento")
+        if regressions:
+            failures += 1
+        else:
+            print(f"✅ Nessuna regressione oltre {args.threshold:.2f}x rispetto a {args.compare}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Profilo di avvio TimeTrackerT2
+Misura il costo degli import all'avvio della GUI con `python -X importtime`
+in processi nuovi, mostra i moduli più lenti e verifica due vincoli:
+
+- il tempo di import (mediana su più avvii) resta sotto il budget;
+- lo stack analytics (pandas, matplotlib, seaborn, numpy) non viene caricato:
+  deve arrivare solo alla prima apertura dell'Analytics.
+
+Esce con codice 1 se uno dei due vincoli non è rispettato.
+
+Uso:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --budget 800 --runs 7 --top 15
+    python scripts/profile_startup.py --modules dataM gui_utils
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Moduli importati da main_gui.py prima di mostrare la finestra
+STARTUP_MODULES = ['customtkinter', 'pygame', 'dataM', 'gui_utils', 'user_manager', 'gui_windows']
+
+# Da caricare solo all'apertura dell'Analytics
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'numpy']
+
+STARTUP_BUDGET_MS = 1500
+
+
+def run_importtime(modules):
+    """
+    Importa i moduli in un interprete nuovo con -X importtime.
+    Ritorna (tempo totale in ms, {modulo: (self_us, cumulativo_us)}).
+    """
+    code = "import " + ", ".join(modules)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "errore sconosciuto"
+        raise RuntimeError(last_line)
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed_ms, timings
+
+
+def print_profile(timings, top):
+    """Moduli di primo livello ordinati per tempo cumulativo"""
+    top_level = {name: times for name, times in timings.items() if '.' not in name}
+    ranking = sorted(top_level.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    print(f"{'cumulativo [ms]':>16} {'proprio [ms]':>13}  modulo")
+    for name, (self_us, cumulative_us) in ranking:
+        print(f"{cumulative_us / 1000:16.1f} {self_us / 1000:13.1f}  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profilo import e benchmark di avvio")
+    parser.add_argument('--modules', nargs='+', default=STARTUP_MODULES)
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS, help="budget in ms")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print("🚀 TimeTrackerT2 - Profilo di avvio")
+    print("=" * 50)
+    print(f"Moduli: {', '.join(args.modules)}\n")
+
+    durations = []
+    timings = {}
+    try:
+        for _ in range(args.runs):
+            elapsed_ms, timings = run_importtime(args.modules)
+            durations.append(elapsed_ms)
+    except RuntimeError as e:
+        print(f"❌ Import fallito: {e}")
+        return 1
+
+    print_profile(timings, args.top)
+
+    median_ms = statistics.median(durations)
+    print(f"\n⏱️ Avvio (mediana su {args.runs}): {median_ms:.0f} ms "
+          f"(min {min(durations):.0f}, max {max(durations):.0f}) - budget {args.budget:.0f} ms")
+
+    ok = True
+    heavy = [name for name in HEAVY_MODULES if name in timings]
+    if heavy:
+        ok = False
+        print(f"❌ Moduli analytics caricati all'avvio: {', '.join(heavy)}")
+    if median_ms > args.budget:
+        ok = False
+        print("❌ Budget di avvio superato")
+    if ok:
+        print("✅ Avvio entro il budget, stack analytics non caricato")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Snapshot colonnare delle sessioni per TimeTrackerT2
+Copia binaria (una colonna NumPy grezza per file, caricata in memory-map)
+della tabella sessioni: evita di rileggere tutto il JSON a ogni apertura
+dell'Analytics.
+
+Lo snapshot registra l'offset del file sessions.json fino a cui è aggiornato
+e un checksum degli ultimi byte prima di quell'offset: se il file è stato
+riscritto lo snapshot viene scartato, altrimenti basta leggere la coda.
+Anche la scrittura è incrementale: le righe nuove si aggiungono in fondo ai
+file delle colonne e meta.json dice quante righe sono valide.
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from dataM import file_fingerprint
+
+SNAPSHOT_DIR = '.analytics_cache'
+SNAPSHOT_VERSION = 2
+
+# nome colonna -> dtype su disco
+COLUMNS = {
+    'ids': np.int64,
+    'user_codes': np.int32,
+    'materia_codes': np.int32,
+    'timestamps': 'datetime64[s]',
+    'durations': np.float32,  # minuti
+}
+
+
+class SessionSnapshot:
+    """Tabella sessioni in forma colonnare con dizionari per utenti e materie"""
+
+    def __init__(self, columns=None, users: Optional[List[str]] = None,
+                 materie: Optional[List[str]] = None, offset: int = 0,
+                 generation: int = 0, persisted: int = 0):
+        if columns is None:
+            columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.columns = columns
+        self.users = users or []
+        self.materie = materie or []
+        self.offset = offset
+        self.generation = generation  # generazione su disco da cui deriva (0: mai salvato)
+        self.persisted = persisted  # righe già scritte nei file di quella generazione
+
+    def __len__(self):
+        return len(self.columns['ids'])
+
+    @staticmethod
+    def code_for(values: List[str], labels) -> np.ndarray:
+        """Codici interi per una lista di etichette, estendendo il dizionario"""
+        positions = {label: i for i, label in enumerate(values)}
+        codes = np.empty(len(labels), dtype=np.int32)
+        for i, label in enumerate(labels):
+            code = positions.get(label)
+            if code is None:
+                code = len(values)
+                values.append(label)
+                positions[label] = code
+            codes[i] = code
+        return codes
+
+    def extended(self, ids, users, materie, timestamps, durations, offset) -> 'SessionSnapshot':
+        """Nuovo snapshot con le righe della coda aggiunte in fondo"""
+        user_dict = list(self.users)
+        materia_dict = list(self.materie)
+        new_columns = {
+            'ids': np.asarray(ids, dtype=np.int64),
+            'user_codes': self.code_for(user_dict, users),
+            'materia_codes': self.code_for(materia_dict, materie),
+            'timestamps': np.asarray(timestamps, dtype='datetime64[s]'),
+            'durations': np.asarray(durations, dtype=np.float32),
+        }
+        columns = {name: np.concatenate([self.columns[name], new_columns[name]]) for name in COLUMNS}
+        return SessionSnapshot(columns, user_dict, materia_dict, offset, self.generation, self.persisted)
+
+    def rows_for_user(self, user: str):
+        """Colonne (copie in memoria) delle sole righe dell'utente"""
+        try:
+            code = self.users.index(user)
+        except ValueError:
+            return None
+        mask = self.columns['user_codes'] == code
+        return {name: np.asarray(column[mask]) for name, column in self.columns.items()}
+
+
+def _meta_path(snapshot_dir: str) -> str:
+    return os.path.join(snapshot_dir, 'meta.json')
+
+
+def _column_path(snapshot_dir: str, name: str, generation: int) -> str:
+    return os.path.join(snapshot_dir, f"{name}.{generation}.col")
+
+
+def _read_meta(snapshot_dir: str) -> Optional[dict]:
+    try:
+        with open(_meta_path(snapshot_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _map_column(path: str, dtype, rows: int) -> np.ndarray:
+    """Prime rows righe della colonna in memory-map (i byte oltre sono scarti di un crash)"""
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+
+def load_snapshot(sessions_file: str, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[SessionSnapshot]:
+    """
+    Carica lo snapshot in memory-map se descrive ancora sessions_file.
+    Ritorna None se manca, è di un'altra versione o il file è stato riscritto.
+    """
+    try:
+        meta = _read_meta(snapshot_dir)
+        if meta is None or meta.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        offset = meta['offset']
+        if offset > os.path.getsize(sessions_file):
+            return None
+        if file_fingerprint(sessions_file, offset) != meta['fingerprint']:
+            return None
+
+        generation, rows = meta['generation'], meta['rows']
+        columns = {
+            name: _map_column(_column_path(snapshot_dir, name, generation), dtype, rows)
+            for name, dtype in COLUMNS.items()
+        }
+        return SessionSnapshot(columns, meta['users'], meta['materie'], offset, generation, rows)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_snapshot(snapshot: SessionSnapshot, sessions_file: str, snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+    """
+    Scrive su disco le righe non ancora salvate. Se lo snapshot estende la
+    generazione corrente le righe nuove vanno in fondo ai file delle colonne
+    (costo proporzionale alla coda), altrimenti si scrive una generazione
+    nuova. meta.json viene sostituito per ultimo e rende visibile la nuova
+    versione in modo atomico; le righe già mappate dai lettori non vengono
+    mai sovrascritte.
+    """
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        previous = _read_meta(snapshot_dir) or {}
+        appending = (snapshot.generation > 0 and previous.get('version') == SNAPSHOT_VERSION and
+                     previous.get('generation') == snapshot.generation and
+                     previous.get('rows') == snapshot.persisted)
+        if appending:
+            generation, start = snapshot.generation, snapshot.persisted
+        else:
+            generation, start = previous.get('generation', 0) + 1, 0
+
+        for name, dtype in COLUMNS.items():
+            rows = np.ascontiguousarray(snapshot.columns[name][start:], dtype=dtype)
+            with open(_column_path(snapshot_dir, name, generation), 'r+b' if start else 'wb') as f:
+                f.seek(start * rows.itemsize)
+                f.write(rows.tobytes())
+
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'generation': generation,
+            'rows': len(snapshot),
+            'offset': snapshot.offset,
+            'fingerprint': file_fingerprint(sessions_file, snapshot.offset),
+            'users': snapshot.users,
+            'materie': snapshot.materie,
+        }
+        tmp_path = _meta_path(snapshot_dir) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, _meta_path(snapshot_dir))
+        snapshot.generation, snapshot.persisted = generation, len(snapshot)
+
+        if not appending:
+            _remove_old_generations(snapshot_dir, generation)
+        return True
+    except OSError as e:
+        print(f"Avviso: impossibile salvare lo snapshot analytics - {e}")
+        return False
+
+
+def _remove_old_generations(snapshot_dir: str, current: int):
+    """Elimina le generazioni precedenti (su Windows quelle ancora mappate restano)"""
+    for file_name in os.listdir(snapshot_dir):
+        parts = file_name.split('.')
+        if len(parts) == 3 and parts[2] in ('col', 'npy') and parts[1].isdigit() and int(parts[1]) != current:
+            try:
+                os.remove(os.path.join(snapshot_dir, file_name))
+            except OSError:
+                pass
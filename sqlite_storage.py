@@ -0,0 +1,358 @@
+"""
+Backend SQLite opzionale per TimeTrackerT2
+Conserva sessioni, materie, utenti, obiettivi e note in un unico database
+indicizzato, dietro le stesse funzioni di dataM e le classi manager.
+
+Il backend si attiva quando esiste il file timetracker.db (creato dal
+migratore) oppure con la variabile d'ambiente TIMETRACKER_STORAGE=sqlite.
+
+Migrazione one-shot dai file JSON esistenti:
+    python sqlite_storage.py [percorso_db]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from dataM import TIMESTAMP_FORMAT, parse_timestamp, session_minutes
+from records import Session, json_default
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    user TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (user, position)
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    materia TEXT,
+    durata INTEGER NOT NULL DEFAULT 0,  -- minuti (session_minutes)
+    timestamp TEXT,  -- formato canonico TIMESTAMP_FORMAT se leggibile
+    note_argomento TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_materia_ts
+    ON sessions (user, materia, timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_ts
+    ON sessions (user, timestamp);
+
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    materia TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user, materia);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    materia TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_user_materia_ts
+    ON notes (user, materia, timestamp);
+"""
+
+# Timestamp in formato canonico: gli altri sono illeggibili e restano fuori
+# da filtri temporali e totali giornalieri, come nel rollup dei file JSON
+CANONICAL_TIMESTAMP = "timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+
+
+def _session_values(session: Dict) -> Tuple:
+    """
+    Riga della tabella sessions: durata in minuti e timestamp canonico, così
+    SUM(durata) e confronti/substr sul timestamp valgono anche per i formati
+    storici ("HH:MM:SS", "dd/mm/YYYY ...")
+    """
+    timestamp = session.get('timestamp')
+    parsed = parse_timestamp(timestamp)
+    if parsed is not None:
+        timestamp = parsed.strftime(TIMESTAMP_FORMAT)
+    return (session.get('id'), session.get('user'), session.get('materia'),
+            session_minutes(session.get('durata', 0)), timestamp, session.get('note_argomento'))
+
+
+class SQLiteStorage:
+    """Motore di archiviazione SQLite con la stessa semantica dei file JSON"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        # La GUI usa thread di lavoro: una connessione condivisa protetta da lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._normalize_sessions()
+
+    def _normalize_sessions(self):
+        """Converte le righe importate con durate o timestamp nei formati storici"""
+        with self._lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, user, materia, durata, timestamp, note_argomento FROM sessions "
+                f"WHERE typeof(durata) NOT IN ('integer', 'real') OR NOT {CANONICAL_TIMESTAMP}"
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE sessions SET durata = ?, timestamp = ? WHERE id = ?",
+                [values[3:5] + values[:1] for values in map(_session_values, map(dict, rows))]
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ===== UTENTI =====
+    def load_users(self) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT name FROM users ORDER BY position").fetchall()
+        return [row['name'] for row in rows]
+
+    def save_users(self, user_list: List[str]):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM users")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO users (name) VALUES (?)",
+                [(user,) for user in user_list if user]
+            )
+
+    # ===== MATERIE =====
+    def load_subjects(self) -> Dict[str, List[str]]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT user, name FROM subjects ORDER BY user, position"
+            ).fetchall()
+        subjects = {}
+        for row in rows:
+            subjects.setdefault(row['user'], []).append(row['name'])
+        return subjects
+
+    def save_subjects(self, subjects: Dict[str, List[str]]):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM subjects")
+            self.conn.executemany(
+                "INSERT INTO subjects (user, position, name) VALUES (?, ?, ?)",
+                [(user, i, name) for user, names in subjects.items() for i, name in enumerate(names)]
+            )
+
+    # ===== SESSIONI =====
+    def next_session_id(self) -> int:
+        with self._lock:
+            row = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM sessions").fetchone()
+        return row[0]
+
+    def insert_session(self, session: Dict) -> Dict:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO sessions (id, user, materia, durata, timestamp, note_argomento) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                _session_values(session)
+            )
+        session['id'] = cursor.lastrowid
+        return session
+
+    def insert_sessions(self, sessions: List[Dict]) -> int:
+        """Importa più sessioni in una sola transazione (sostituisce gli ID già presenti)"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sessions (id, user, materia, durata, timestamp, note_argomento) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [_session_values(session) for session in sessions]
+            )
+        return len(sessions)
+
+    def load_sessions(self, user: str) -> List[Session]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, user, materia, durata, timestamp, note_argomento "
+                "FROM sessions WHERE user = ? ORDER BY id",
+                (user,)
+            ).fetchall()
+        return [self._session_from_row(row) for row in rows]
+
+    def load_sessions_page(self, user: str, offset: int, limit: int) -> Tuple[List[Session], int]:
+        """Pagina di sessioni dalla più recente e totale sessioni dell'utente"""
+        with self._lock:
+            total = self.conn.execute("SELECT COUNT(*) FROM sessions WHERE user = ?", (user,)).fetchone()[0]
+            rows = self.conn.execute(
+                "SELECT id, user, materia, durata, timestamp, note_argomento "
+                "FROM sessions WHERE user = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (user, limit, offset)
+            ).fetchall()
+        return [self._session_from_row(row) for row in rows], total
+
+    def load_sessions_since(self, last_id: int, user: Optional[str] = None) -> List[Session]:
+        """Sessioni con ID maggiore di last_id (lettura incrementale)"""
+        query = ("SELECT id, user, materia, durata, timestamp, note_argomento "
+                 "FROM sessions WHERE id > ?")
+        params = [last_id]
+        if user is not None:
+            query += " AND user = ?"
+            params.append(user)
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        return [self._session_from_row(row) for row in rows]
+
+    @staticmethod
+    def _session_from_row(row) -> Session:
+        session = Session(
+            id=row['id'],
+            user=row['user'],
+            materia=row['materia'],
+            durata=row['durata'],
+            timestamp=row['timestamp']
+        )
+        if row['note_argomento']:
+            session['note_argomento'] = row['note_argomento']
+        return session
+
+    def sum_session_minutes(self, user: str, materia: Optional[str] = None,
+                            since: Optional[str] = None) -> int:
+        """Minuti totali di studio, opzionalmente per materia e da un timestamp"""
+        query = "SELECT COALESCE(SUM(durata), 0) FROM sessions WHERE user = ?"
+        params = [user]
+        if materia is not None:
+            query += " AND materia = ?"
+            params.append(materia)
+        if since is not None:
+            query += f" AND {CANONICAL_TIMESTAMP} AND timestamp >= ?"
+            params.append(since)
+        with self._lock:
+            return self.conn.execute(query, params).fetchone()[0]
+
+    def daily_rollup(self, user: str) -> Dict[str, Dict[str, List]]:
+        """Totali per materia e giorno: {materia: {'YYYY-MM-DD': [minuti, sessioni]}}"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT materia, substr(timestamp, 1, 10) AS day, SUM(durata), COUNT(*) "
+                f"FROM sessions WHERE user = ? AND {CANONICAL_TIMESTAMP} GROUP BY materia, day",
+                (user,)
+            ).fetchall()
+        rollup = {}
+        for materia, day, minutes, count in rows:
+            rollup.setdefault(materia, {})[day] = [minutes, count]
+        return rollup
+
+    # ===== OBIETTIVI =====
+    def load_goals(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM goals ORDER BY id").fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def upsert_goal(self, goal: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO goals (id, user, materia, data) VALUES (?, ?, ?, ?)",
+                (goal['id'], goal.get('user'), goal.get('materia'), json.dumps(goal, ensure_ascii=False, default=json_default))
+            )
+
+    def delete_goal(self, goal_id: int):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
+
+    # ===== NOTE =====
+    def load_notes(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM notes ORDER BY id").fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def upsert_note(self, note: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO notes (id, user, materia, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (note['id'], note.get('user'), note.get('materia'), note.get('timestamp'),
+                 json.dumps(note, ensure_ascii=False, default=json_default))
+            )
+
+    def delete_note(self, note_id: int):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def migrate_json_to_sqlite(db_file: str = 'timetracker.db',
+                           sessions_file: str = 'sessions.json',
+                           subjects_file: str = 'subjects.json',
+                           goals_file: str = 'goals.json',
+                           notes_file: str = 'progress_notes.json',
+                           users_file: str = 'users.txt') -> Dict[str, int]:
+    """
+    Importa in un colpo solo i file JSON esistenti nel database SQLite.
+    I file originali non vengono modificati. Ritorna il numero di record importati.
+    """
+    if os.path.exists(db_file):
+        raise FileExistsError(f"Il database {db_file} esiste già: migrazione annullata")
+
+    storage = SQLiteStorage(db_file)
+    counts = {}
+    try:
+        users = []
+        if os.path.exists(users_file):
+            with open(users_file, 'r', encoding='utf-8') as f:
+                users = [line.strip() for line in f if line.strip()]
+        storage.save_users(users)
+        counts['users'] = len(users)
+
+        subjects = _read_json(subjects_file, {})
+        storage.save_subjects(subjects)
+        counts['subjects'] = sum(len(names) for names in subjects.values())
+
+        sessions = []
+        if os.path.exists(sessions_file):
+            with open(sessions_file, 'r') as f:
+                sessions = [json.loads(line) for line in f if line.strip()]
+        counts['sessions'] = storage.insert_sessions(sessions)
+
+        # Obiettivi e note: snapshot JSON più eventuale journal delle modifiche
+        from dataM import JsonJournal
+        goals = JsonJournal(goals_file).load()
+        for goal in goals:
+            storage.upsert_goal(goal)
+        counts['goals'] = len(goals)
+
+        notes = JsonJournal(notes_file).load()
+        for note in notes:
+            storage.upsert_note(note)
+        counts['notes'] = len(notes)
+    except Exception:
+        storage.close()
+        for path in (db_file, db_file + '-wal', db_file + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    storage.close()
+    return counts
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else 'timetracker.db'
+    try:
+        result = migrate_json_to_sqlite(target)
+    except Exception as e:
+        print(f"❌ Migrazione fallita: {e}")
+        sys.exit(1)
+    print(f"✅ Migrazione completata in {target}")
+    for table, count in result.items():
+        print(f"   {table}: {count}")
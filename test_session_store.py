@@ -0,0 +1,1045 @@
+#!/usr/bin/env python3
+"""
+Test per gli archivi di dataM (sessioni indicizzate, rollup, journal)
+Lavora in una directory temporanea per non toccare i dati reali
+"""
+
+import os
+import sys
+import json
+import tempfile
+import traceback
+
+import dataM
+
+
+def _in_temp_dir(test_func):
+    """Esegue il test in una directory temporanea pulita"""
+    def wrapper():
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                return test_func()
+            finally:
+                os.chdir(old_cwd)
+    wrapper.__name__ = test_func.__name__
+    return wrapper
+
+
+def _write_sessions(sessions):
+    with open(dataM.SESSIONS_FILE, 'w') as f:
+        for session in sessions:
+            f.write(json.dumps(session) + '\n')
+
+
+@_in_temp_dir
+def test_next_id_and_user_index():
+    """L'ID successivo e le letture per utente usano l'indice"""
+    print("🔍 Testing next ID / indice per utente...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 7, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+    ])
+
+    store = dataM.SessionStore(dataM.SESSIONS_FILE)
+    assert store.next_id() == 8
+    assert [s['id'] for s in store.load('Anna')] == [1]
+
+    store.append({'user': 'Anna', 'materia': 'Fisica', 'durata': 20, 'timestamp': '2025-01-02 10:00:00'})
+    assert [s['id'] for s in store.load('Anna')] == [1, 8]
+
+    # Un nuovo processo riparte dall'indice persistito
+    reopened = dataM.SessionStore(dataM.SESSIONS_FILE)
+    assert reopened.next_id() == 9
+    assert [s['id'] for s in reopened.load('Luca')] == [7]
+    print("✅ Indice sessioni: OK")
+
+
+@_in_temp_dir
+def test_external_changes():
+    """Append esterni e riscritture del file vengono riallineati"""
+    print("🔍 Testing riallineamento indice...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    store = dataM.SessionStore(dataM.SESSIONS_FILE)
+    assert store.next_id() == 2
+
+    with open(dataM.SESSIONS_FILE, 'a') as f:
+        f.write(json.dumps({'id': 5, 'user': 'Anna', 'materia': 'Chimica', 'durata': 10,
+                            'timestamp': '2025-01-03 10:00:00'}) + '\n')
+    assert store.next_id() == 6
+    assert len(store.load('Anna')) == 2
+
+    _write_sessions([
+        {'id': 3, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+    ])
+    reopened = dataM.SessionStore(dataM.SESSIONS_FILE)
+    assert reopened.next_id() == 4
+    assert reopened.load('Anna') == []
+
+    # Riscrittura più grande del file indicizzato: non è un append
+    assert reopened.load('Luca')[0]['id'] == 3
+    _write_sessions([
+        {'id': 7, 'user': 'Luca', 'materia': 'Geografia', 'durata': 45, 'timestamp': '2025-02-01 09:00:00'},
+        {'id': 8, 'user': 'Anna', 'materia': 'Fisica', 'durata': 20, 'timestamp': '2025-02-01 10:00:00'},
+    ])
+    assert [session['id'] for session in reopened.load('Luca')] == [7]
+    assert [session['id'] for session in reopened.load('Anna')] == [8]
+    assert reopened.next_id() == 9
+    print("✅ Riallineamento indice: OK")
+
+
+@_in_temp_dir
+def test_session_cache():
+    """La cache per utente segue append interni ed esterni"""
+    print("🔍 Testing cache sessioni...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    store = dataM.SessionStore(dataM.SESSIONS_FILE)
+    first = store.load('Anna')
+    assert store.load('Anna') == first
+    assert 'Anna' in store._cache
+
+    store.append({'user': 'Anna', 'materia': 'Fisica', 'durata': 20, 'timestamp': '2025-01-02 10:00:00'})
+    assert [s['id'] for s in store.load('Anna')] == [1, 2]
+
+    # Modifica da un altro processo: mtime/dimensione cambiano
+    with open(dataM.SESSIONS_FILE, 'a') as f:
+        f.write(json.dumps({'id': 3, 'user': 'Anna', 'materia': 'Chimica', 'durata': 10,
+                            'timestamp': '2025-01-03 10:00:00'}) + '\n')
+    assert [s['id'] for s in store.load('Anna')] == [1, 2, 3]
+    print("✅ Cache sessioni: OK")
+
+
+@_in_temp_dir
+def test_load_sessions_since():
+    """La lettura incrementale restituisce solo le righe nuove"""
+    print("🔍 Testing lettura incrementale...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+    ])
+    dataM._session_stores.clear()
+
+    tail = dataM.load_sessions_since(0, 'Anna')
+    assert [s['id'] for s in tail.sessions] == [1]
+
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 5,
+                                      'timestamp': '2025-01-02 10:00:00'})
+    tail = dataM.load_sessions_since(tail.offset, 'Anna')
+    assert [s['id'] for s in tail.sessions] == [3]
+    assert not tail.restarted
+
+    again = dataM.load_sessions_since(tail.offset, 'Anna')
+    assert again.sessions == [] and again.offset == tail.offset
+
+    # File riscritto più corto: la lettura riparte da zero
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    restarted = dataM.load_sessions_since(tail.offset, 'Anna')
+    assert restarted.restarted and [s['id'] for s in restarted.sessions] == [1]
+    dataM._session_stores.clear()
+    print("✅ Lettura incrementale: OK")
+
+
+@_in_temp_dir
+def test_load_sessions_page():
+    """Le pagine partono dalla sessione più recente e leggono solo le righe richieste"""
+    print("🔍 Testing lettura a pagine...")
+    _write_sessions([
+        {'id': i, 'user': 'Anna' if i % 2 else 'Luca', 'materia': 'Fisica', 'durata': i,
+         'timestamp': '2025-01-01 10:00:00'} for i in range(1, 12)
+    ])
+    dataM._session_stores.clear()
+
+    page = dataM.load_sessions_page('Anna', 0, 4)
+    assert page.total == 6
+    assert [s['id'] for s in page.sessions] == [11, 9, 7, 5]
+    assert [s['id'] for s in dataM.load_sessions_page('Anna', 4, 4).sessions] == [3, 1]
+    assert dataM.load_sessions_page('Anna', 8, 4).sessions == []
+
+    # Con la cache utente già piena le pagine arrivano dalla cache
+    dataM.load_sessions('Anna')
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 5,
+                                      'timestamp': '2025-01-02 10:00:00'})
+    page = dataM.load_sessions_page('Anna', 0, 2)
+    assert page.total == 7 and [s['id'] for s in page.sessions] == [12, 11]
+    dataM._session_stores.clear()
+    print("✅ Lettura a pagine: OK")
+
+
+@_in_temp_dir
+def test_session_snapshot():
+    """Lo snapshot colonnare si estende con la coda e si scarta se il file cambia"""
+    print("🔍 Testing snapshot colonnare...")
+    import session_snapshot
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+    ])
+    dataM._session_stores.clear()
+    assert session_snapshot.load_snapshot(dataM.SESSIONS_FILE) is None
+
+    tail = dataM.load_sessions_since(0)
+    snapshot = session_snapshot.SessionSnapshot().extended(
+        ids=[1, 2], users=['Anna', 'Luca'], materie=['Fisica', 'Storia'],
+        timestamps=['2025-01-01T10:00:00', '2025-01-01T11:00:00'], durations=[30, 15],
+        offset=tail.offset
+    )
+    assert session_snapshot.save_snapshot(snapshot, dataM.SESSIONS_FILE)
+
+    loaded = session_snapshot.load_snapshot(dataM.SESSIONS_FILE)
+    assert loaded is not None and len(loaded) == 2
+    rows = loaded.rows_for_user('Anna')
+    assert list(rows['ids']) == [1] and list(rows['durations']) == [30]
+
+    # Append: lo snapshot resta valido e la coda va in fondo agli stessi file
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 5,
+                                      'timestamp': '2025-01-02 10:00:00'})
+    assert session_snapshot.load_snapshot(dataM.SESSIONS_FILE) is not None
+    ids_path = session_snapshot._column_path(session_snapshot.SNAPSHOT_DIR, 'ids', loaded.generation)
+    with open(ids_path, 'rb') as f:
+        saved_ids = f.read()
+    longer = loaded.extended(ids=[3], users=['Anna'], materie=['Fisica'], timestamps=['2025-01-02T10:00:00'],
+                             durations=[5], offset=dataM.load_sessions_since(0).offset)
+    assert session_snapshot.save_snapshot(longer, dataM.SESSIONS_FILE)
+    reloaded = session_snapshot.load_snapshot(dataM.SESSIONS_FILE)
+    assert reloaded.generation == loaded.generation and len(reloaded) == 3
+    with open(ids_path, 'rb') as f:
+        assert f.read()[:len(saved_ids)] == saved_ids
+    assert list(reloaded.rows_for_user('Anna')['ids']) == [1, 3]
+    assert list(loaded.rows_for_user('Anna')['ids']) == [1]  # memory-map già aperta intatta
+
+    # Uno snapshot non derivato dalla generazione corrente ne scrive una nuova
+    assert session_snapshot.save_snapshot(snapshot, dataM.SESSIONS_FILE)
+    assert session_snapshot.load_snapshot(dataM.SESSIONS_FILE).generation == loaded.generation + 1
+
+    # Riscrittura del file sessioni: lo snapshot viene scartato
+    _write_sessions([
+        {'id': 9, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+        {'id': 3, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-01 11:00:00'},
+    ])
+    assert session_snapshot.load_snapshot(dataM.SESSIONS_FILE) is None
+    dataM._session_stores.clear()
+    print("✅ Snapshot colonnare: OK")
+
+
+@_in_temp_dir
+def test_daily_rollup():
+    """Il rollup giornaliero segue gli append e si ricostruisce se il file cambia"""
+    print("🔍 Testing rollup giornaliero...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': '00:15:00', 'timestamp': '2025-01-01 18:00:00'},
+        {'id': 3, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '02/01/2025 11:00:00'},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+
+    assert dataM.load_daily_rollup('Anna') == {'Fisica': {'2025-01-01': [45, 2]}}
+    assert dataM.load_daily_rollup('Luca') == {'Storia': {'2025-01-02': [15, 1]}}
+
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Chimica', 'durata': 20,
+                                      'timestamp': '2025-01-03 10:00:00'})
+    assert dataM.sum_study_minutes('Anna') == 65
+    assert dataM.sum_study_minutes('Anna', 'Fisica') == 45
+    assert dataM.sum_study_minutes('Anna', since_day=dataM.datetime.date(2025, 1, 2)) == 20
+
+    # Un nuovo processo riparte dal file del rollup; un file riscritto lo invalida
+    dataM._session_rollups.clear()
+    assert dataM.sum_study_minutes('Anna') == 65
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 10, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    dataM._session_rollups.clear()
+    assert dataM.load_daily_rollup('Anna') == {'Fisica': {'2025-01-01': [10, 1]}}
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    print("✅ Rollup giornaliero: OK")
+
+
+@_in_temp_dir
+def test_rollup_delta():
+    """Gli aggiornamenti del rollup vanno in coda al delta, compattato ogni compact_ops righe"""
+    print("🔍 Testing delta del rollup...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    store = dataM.SessionStore(dataM.SESSIONS_FILE)
+    rollup = dataM.SessionRollup(store, dataM.ROLLUP_FILE, compact_ops=3)
+    rollup.refresh()
+    with open(dataM.ROLLUP_FILE) as f:
+        full = f.read()
+
+    for day in (1, 2):
+        store.append({'user': 'Anna', 'materia': 'Fisica', 'durata': 10, 'timestamp': f'2025-01-0{day} 12:00:00'})
+        rollup.refresh()
+    with open(dataM.ROLLUP_FILE) as f:
+        assert f.read() == full
+    with open(rollup.delta_file) as f:
+        assert len(f.readlines()) == 2
+    expected = {'Fisica': {'2025-01-01': [40, 2], '2025-01-02': [10, 1]}}
+    assert dataM.SessionRollup(store, dataM.ROLLUP_FILE).load('Anna') == expected
+
+    # Una riga interrotta da un crash si scarta: le sessioni si rileggono dall'offset
+    with open(rollup.delta_file, 'a') as f:
+        f.write('{"from": 12')
+    store.append({'user': 'Anna', 'materia': 'Storia', 'durata': 5, 'timestamp': '2025-01-03 12:00:00'})
+    expected['Storia'] = {'2025-01-03': [5, 1]}
+    assert dataM.SessionRollup(store, dataM.ROLLUP_FILE).load('Anna') == expected
+
+    # Alla terza riga il file completo viene riscritto e il delta svuotato
+    rollup.refresh()
+    assert os.path.getsize(rollup.delta_file) == 0 and rollup.pending_ops == 0
+    assert dataM.SessionRollup(store, dataM.ROLLUP_FILE).load('Anna') == expected
+
+    # Un delta rimasto da un rollup precedente non viene contato due volte
+    with open(rollup.delta_file, 'w') as f:
+        f.write(json.dumps({'from': 0, 'to': 10, 'fingerprint': 0,
+                            'days': [['Anna', 'Fisica', '2025-01-01', 99, 1]]}) + '\n')
+    assert dataM.SessionRollup(store, dataM.ROLLUP_FILE).load('Anna') == expected
+    print("✅ Delta del rollup: OK")
+
+
+def test_parse_timestamp():
+    """Parser condiviso: formato canonico, formati storici, epoch e stesse date nell'engine analytics"""
+    print("🔍 Testing parsing timestamp...")
+    expected = dataM.datetime.datetime(2025, 1, 2, 10, 30, 0)
+    assert dataM.parse_timestamp('2025-01-02 10:30:00') == expected
+    assert dataM.parse_timestamp('02/01/2025 10:30:00') == expected
+    assert dataM.parse_timestamp('02/01/2025 10:30') == expected
+    assert dataM.parse_timestamp('2025-01-02 10:30:00.250000').microsecond == 250000
+    assert dataM.parse_timestamp('ieri') is None
+    assert dataM.parse_timestamp(None) is None
+
+    session = {'timestamp': '2025-01-02 10:30:00'}
+    assert dataM.session_epoch(session) == expected.timestamp()
+    assert dataM.session_epoch({'timestamp': 'ieri'}) is None
+    assert dataM.session_day('02/01/2025 10:30') == '2025-01-02'
+
+    import pandas as pd
+    from analytics_engine import AnalyticsEngine
+    from gui_utils import DataValidator
+    samples = ['2025-01-02 10:30:00', '02/01/2025 10:30:00', '02/01/2025 10:30', '2025-01-02T10:30:00',
+               '2025-01-02 10:30:00.250000', 'ieri', None]
+    parsed = AnalyticsEngine.__new__(AnalyticsEngine)._parse_timestamps(pd.Series(samples, dtype=object))
+    assert [None if pd.isna(value) else value.to_pydatetime() for value in parsed] == \
+        [dataM.parse_timestamp(sample) for sample in samples]
+    validated = DataValidator.validate_session_data(
+        [{'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '02/01/2025 10:30'}])
+    assert validated[0]['timestamp'] == '02/01/2025 10:30'
+    print("✅ Parsing timestamp: OK")
+
+
+@_in_temp_dir
+def test_json_journal():
+    """Le modifiche vanno nel journal e sopravvivono a riapertura e compattazione"""
+    print("🔍 Testing journal JSON...")
+    with open('goals.json', 'w', encoding='utf-8') as f:
+        json.dump([{'id': 1, 'materia': 'Fisica'}], f)
+
+    journal = dataM.JsonJournal('goals.json', compact_ops=3)
+    records = journal.load()
+    records.append({'id': 2, 'materia': 'Storia'})
+    journal.put(records[-1], records)
+    records[0] = {'id': 1, 'materia': 'Fisica', 'completato': True}
+    journal.put(records[0], records)
+
+    # Lo snapshot non è stato riscritto, il journal sì
+    with open('goals.json', encoding='utf-8') as f:
+        assert json.load(f) == [{'id': 1, 'materia': 'Fisica'}]
+    assert dataM.JsonJournal('goals.json').load() == records
+
+    # Una riga troncata da un crash viene ignorata
+    with open('goals.json.journal', 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "rec')
+    assert dataM.JsonJournal('goals.json').load() == records
+
+    records = [record for record in records if record['id'] != 2]
+    journal.delete(2, records)  # terza operazione: compattazione
+    assert os.path.getsize('goals.json.journal') == 0
+    with open('goals.json', encoding='utf-8') as f:
+        assert json.load(f) == records
+    assert dataM.JsonJournal('goals.json').load() == records
+
+    # Replay per ID: put dopo del riaggiunge in coda, un put già nello snapshot non duplica
+    journal = dataM.JsonJournal('goals.json', compact_ops=100)
+    journal.put({'id': 3, 'materia': 'Chimica'}, records)
+    journal.delete(3, records)
+    journal.put({'id': 3, 'materia': 'Biologia'}, records)
+    journal.put(records[0], records)
+    assert dataM.JsonJournal('goals.json').load() == records + [{'id': 3, 'materia': 'Biologia'}]
+    print("✅ Journal JSON: OK")
+
+
+@_in_temp_dir
+def test_goal_progress():
+    """Il progresso degli obiettivi conta solo le sessioni del periodo, singolo e in blocco"""
+    print("🔍 Testing progresso obiettivi...")
+    from goals_manager import GoalsManager
+
+    now = dataM.datetime.datetime.now()
+    today = now.replace(hour=0, minute=0, second=1)
+    old = now - dataM.datetime.timedelta(days=40)
+    fmt = dataM.TIMESTAMP_FORMAT
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 50, 'timestamp': old.strftime(fmt)},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': today.strftime(fmt)},
+        {'id': 3, 'user': 'Anna', 'materia': 'Storia', 'durata': 20, 'timestamp': today.strftime(fmt)},
+        {'id': 4, 'user': 'Luca', 'materia': 'Fisica', 'durata': 99, 'timestamp': today.strftime(fmt)},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+
+    manager = GoalsManager()
+    goals = [
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'intervallo': 'giorno', 'tempo_target_minuti': 60},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'intervallo': 'mese', 'tempo_target_minuti': 60},
+        {'id': 3, 'user': 'Anna', 'materia': 'Chimica', 'intervallo': 'settimana', 'tempo_target_minuti': 60},
+    ]
+    assert manager.calculate_progress('Anna', goals[0]) == (30, 60, 50.0)
+    assert manager.calculate_progress('Anna', goals[2]) == (0, 60, 0.0)
+    batch = manager.calculate_progress_batch('Anna', goals)
+    assert batch == {goal['id']: manager.calculate_progress('Anna', goal) for goal in goals}
+
+    # Con SQLite lista e dettaglio usano la stessa fonte, anche con durate HH:MM:SS
+    from sqlite_storage import migrate_json_to_sqlite
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': '00:20:00',
+                                      'timestamp': today.strftime(fmt)})
+    migrate_json_to_sqlite(dataM.DATABASE_FILE)
+    dataM._session_tables.clear()
+    try:
+        manager = GoalsManager()
+        assert manager.storage is not None
+        assert manager.calculate_progress('Anna', goals[0]) == (50, 60, 50 / 60 * 100)
+        batch = manager.calculate_progress_batch('Anna', goals)
+        assert batch == {goal['id']: manager.calculate_progress('Anna', goal) for goal in goals}
+    finally:
+        _close_sqlite_storages()
+    print("✅ Progresso obiettivi: OK")
+
+
+def _write_notes(days_ago):
+    """progress_notes.json con una nota per voce di days_ago: {id: (giorni fa, utente, materia, argomento)}"""
+    now = dataM.datetime.datetime.now()
+    notes = [{'id': note_id, 'user': user, 'materia': materia, 'argomento': argomento, 'tipo': 'sessione',
+              'timestamp': (now - dataM.datetime.timedelta(days=days)).isoformat()
+              if days is not None else 'ieri'}
+             for note_id, (days, user, materia, argomento) in days_ago.items()]
+    with open('progress_notes.json', 'w', encoding='utf-8') as f:
+        json.dump(notes, f)
+
+
+@_in_temp_dir
+def test_note_timeline():
+    """Le note per utente e materia restano ordinate e la finestra recente usa la bisezione"""
+    print("🔍 Testing timeline note...")
+    from progress_manager import ProgressManager
+
+    _write_notes({
+        1: (10, 'Anna', 'Fisica', 'Cinematica'),
+        2: (2, 'Anna', 'Storia', 'Risorgimento'),
+        3: (6, 'Anna', 'Fisica', 'Dinamica'),
+        4: (1, 'Luca', 'Fisica', 'Ottica'),
+        5: (None, 'Anna', 'Fisica', 'Senza data'),
+    })
+    manager = ProgressManager()
+    assert [note['id'] for note in manager.get_user_notes('Anna')] == [5, 2, 3, 1]
+    assert [note['id'] for note in manager.get_user_notes('Anna', 'Fisica')] == [5, 3, 1]
+    # Ultimi 7 giorni: la nota senza data cade nella finestra ma viene scartata
+    assert [note['id'] for note in manager.get_recent_activity('Anna', days=7)] == [2, 3]
+    assert [note['id'] for note in manager.get_recent_activity('Anna', days=1)] == []
+
+    manager.add_milestone_note('Anna', 'Fisica', 'Termodinamica', 'Capitolo finito')
+    newest = manager.get_user_notes('Anna', 'Fisica')[1]
+    assert newest['argomento'] == 'Termodinamica'
+    assert manager.get_recent_activity('Anna', days=7)[0] is newest
+
+    assert manager.delete_note(3)
+    assert [note['id'] for note in manager.get_user_notes('Anna', 'Fisica')] == [5, newest['id'], 1]
+    assert [note['id'] for note in manager.get_recent_activity('Anna')] == [newest['id'], 2]
+    assert [note['id'] for note in ProgressManager().get_recent_activity('Anna')] == [newest['id'], 2]
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+    print("✅ Timeline note: OK")
+
+
+@_in_temp_dir
+def test_subject_statistics():
+    """Ore e sessioni di una materia dalla tabella colonnare, durate HH:MM:SS comprese"""
+    print("🔍 Testing statistiche materia...")
+    from progress_manager import ProgressManager
+
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': '01:30:00', 'timestamp': '2025-01-02 10:00:00'},
+        {'id': 3, 'user': 'Anna', 'materia': 'Fisica', 'durata': '30:00', 'timestamp': '2025-01-03 10:00:00'},
+        {'id': 4, 'user': 'Anna', 'materia': 'Storia', 'durata': 60, 'timestamp': '2025-01-03 11:00:00'},
+    ])
+    _write_notes({1: (3, 'Anna', 'Fisica', 'Cinematica'), 2: (1, 'Anna', 'Fisica', 'Dinamica')})
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+
+    stats = ProgressManager().get_subject_statistics('Anna', 'Fisica')
+    assert stats['ore_totali'] == 2.5 and stats['sessioni_totali'] == 2
+    assert stats['argomenti_studiati'] == 2 and stats['tempo_medio_per_argomento'] == 1.2
+    assert stats['copertura_note'] == round(2 / 3 * 100, 1)
+    table = dataM.get_session_table()
+    jan_2 = dataM.timestamp_epoch('2025-01-02 00:00:00')
+    assert table.count('Anna') == 4 and table.count('Anna', 'Fisica', start=jan_2) == 2
+    assert table.count(materia='Storia') == 1
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+    print("✅ Statistiche materia: OK")
+
+
+@_in_temp_dir
+def test_note_search():
+    """Ricerca per prefisso, tutte le parole richieste, più recenti prima; l'indice segue le eliminazioni"""
+    print("🔍 Testing ricerca note...")
+    from progress_manager import ProgressManager
+
+    _write_notes({
+        1: (9, 'Anna', 'Matematica', 'Derivate parziali'),
+        2: (3, 'Anna', 'Matematica', 'Derivate composte'),
+        3: (5, 'Anna', 'Fisica', 'Parziale di cinematica'),
+        4: (1, 'Luca', 'Matematica', 'Derivate parziali'),
+    })
+    manager = ProgressManager()
+
+    def search(query, **kwargs):
+        return [note['id'] for note in manager.search_notes('Anna', query, **kwargs)]
+
+    assert search('deriv') == [2, 1]  # prefisso, solo note di Anna, più recenti prima
+    assert search('PARZ') == [3, 1]
+    assert search('deriv parz') == [1]  # tutte le parole devono corrispondere
+    assert search('matematica composte') == [2]
+    assert search('deriv', limit=1) == [2]
+    assert search('integrali') == [] and search('deriv integr') == []
+    assert search('') == [2, 3, 1]
+
+    assert manager.delete_note(1)
+    assert search('deriv parz') == [] and search('parz') == [3]
+    assert manager.delete_note(3)
+    assert search('parz') == [] and 'parziale' not in manager._text_index['Anna'].vocabulary
+    assert search('cinematica') == []
+    assert [note['id'] for note in manager.search_notes('Luca', 'parz')] == [4]
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+    print("✅ Ricerca note: OK")
+
+
+@_in_temp_dir
+def test_parse_durations():
+    """Parser vettoriale delle durate: formati misti, righe errate contate, 10^6 righe in meno di un secondo"""
+    print("🔍 Testing parsing durate...")
+    import time
+    import pandas as pd
+    from analytics_engine import AnalyticsEngine
+
+    engine = AnalyticsEngine('Nessuno')
+    durations = pd.Series([30, 12.5, '01:30:00', '45:30', ' 20 ', '00:00:30', 'abc', '1:xx', None, '1:2:3:4'])
+    minutes = engine._parse_durations(durations)
+    assert minutes.tolist() == [30, 12.5, 90, 45.5, 20, 0.5, 0, 0, 0, 0]
+    assert engine.duration_parse_errors == 4
+    assert engine._parse_durations(pd.Series([5, 10])).tolist() == [5, 10]
+    assert engine.duration_parse_errors == 4
+
+    many = pd.Series(['01:30:00', 25, '12:30', 40] * 250000, dtype=object)
+    start = time.perf_counter()
+    minutes = engine._parse_durations(many)
+    elapsed = time.perf_counter() - start
+    assert minutes.sum() == (90 + 25 + 12.5 + 40) * 250000
+    assert elapsed < 1.0, f"10^6 durate in {elapsed:.2f}s"
+    print(f"✅ Parsing durate: OK (10^6 righe in {elapsed:.2f}s)")
+
+
+@_in_temp_dir
+def test_analytics_frames():
+    """Frame da snapshot e da sessioni JSON hanno le stesse colonne e gli stessi tipi"""
+    print("🔍 Testing frame analytics...")
+    from analytics_engine import AnalyticsEngine
+
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Anna', 'materia': 'Storia', 'durata': '00:15:00', 'timestamp': '2025-01-02 18:00:00'},
+    ])
+    dataM._session_stores.clear()
+    engine = AnalyticsEngine('Anna')  # snapshot colonnare
+    dataM.get_session_store().append({'id': 3, 'user': 'Anna', 'materia': 'Fisica', 'durata': '10:00',
+                                      'timestamp': '2025-01-03 09:00:00', 'note_argomento': 'Ottica'})
+    assert engine.refresh()  # coda costruita dalle sessioni JSON
+
+    expected = engine._build_frame(dataM.load_sessions('Anna'))
+    assert list(engine.df.columns) == list(expected.columns)
+    assert engine.df.dtypes.equals(expected.dtypes)
+    assert engine.df['durata'].tolist() == [30.0, 15.0, 10.0] and engine.df['id'].tolist() == [1, 2, 3]
+    dataM._session_stores.clear()
+    print("✅ Frame analytics: OK")
+
+
+@_in_temp_dir
+def test_analytics_timestamps():
+    """L'engine legge i timestamp come dataM.parse_timestamp e scarta quelli illeggibili"""
+    print("🔍 Testing timestamp analytics...")
+    from analytics_engine import AnalyticsEngine
+
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': 20, 'timestamp': '02/01/2025 11:00:00'},
+        {'id': 3, 'user': 'Anna', 'materia': 'Storia', 'durata': 10, 'timestamp': 'ieri'},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    engine = AnalyticsEngine('Anna')  # snapshot colonnare
+    dataM.get_session_store().append({'id': 4, 'user': 'Anna', 'materia': 'Storia', 'durata': 15,
+                                      'timestamp': '03/01/2025 09:30'})
+    dataM.get_session_store().append({'id': 5, 'user': 'Anna', 'materia': 'Storia', 'durata': 5})
+    assert engine.refresh()  # coda costruita dalle sessioni JSON
+
+    assert engine.df['id'].tolist() == [1, 2, 4]
+    assert [str(date) for date in engine.df['date']] == ['2025-01-01', '2025-01-02', '2025-01-03']
+    assert engine.df['hour'].tolist() == [10, 11, 9]
+    assert engine.timestamp_parse_errors == 2
+
+    # Stessi totali giornalieri del rollup usato da statistiche e obiettivi
+    daily = {}
+    for row in engine.df.itertuples():
+        entry = daily.setdefault(row.materia, {}).setdefault(str(row.date), [0, 0])
+        entry[0] += row.durata
+        entry[1] += 1
+    assert daily == dataM.load_daily_rollup('Anna')
+
+    rebuilt = AnalyticsEngine.__new__(AnalyticsEngine)
+    rebuilt.timestamp_parse_errors = 0
+    assert rebuilt._build_frame(dataM.load_sessions('Anna'))['id'].tolist() == [1, 2, 4]
+    assert rebuilt.timestamp_parse_errors == 2
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    print("✅ Timestamp analytics: OK")
+
+
+@_in_temp_dir
+def test_period_filter():
+    """I filtri oggi/settimana/mese con ricerca binaria danno le stesse righe del filtro completo"""
+    print("🔍 Testing filtri per periodo...")
+    from analytics_engine import AnalyticsEngine
+
+    now = dataM.datetime.datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    offsets = [dataM.datetime.timedelta(days=days, hours=hours)
+               for days, hours in ((60, 0), (20, 1), (8, 0), (3, 5), (10, 2), (0, 0))]
+    sessions = [{'id': i + 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 10 * (i + 1),
+                 'timestamp': (now - offset).strftime(dataM.TIMESTAMP_FORMAT)}
+                for i, offset in enumerate(offsets)]  # non in ordine di tempo
+    sessions.append({'id': 7, 'user': 'Anna', 'materia': 'Storia', 'durata': 5,
+                     'timestamp': midnight.strftime(dataM.TIMESTAMP_FORMAT)})
+    _write_sessions(sessions)
+    dataM._session_stores.clear()
+
+    engine = AnalyticsEngine('Anna')
+    df = engine.df
+    expected = {
+        'oggi': df[df['date'] == now.date()],
+        'settimana': df[df['datetime'] >= now - dataM.datetime.timedelta(days=7)],
+        'mese': df[df['datetime'] >= now - dataM.datetime.timedelta(days=30)],
+        'tutto': df,
+    }
+    for period, rows in expected.items():
+        assert engine._filter_by_period(period)['id'].tolist() == rows['id'].tolist(), period
+    assert engine._filter_by_period('settimana')['id'].tolist() == [4, 6, 7]
+    assert engine._rows_between(midnight, midnight + dataM.datetime.timedelta(days=1))['id'].tolist() == [6, 7]
+    assert engine._rows_between(now, now - dataM.datetime.timedelta(days=1)).empty
+
+    # Le sessioni aggiunte dopo rientrano nell'indice ricostruito
+    dataM.get_session_store().append({'id': 8, 'user': 'Anna', 'materia': 'Fisica', 'durata': 1,
+                                      'timestamp': now.strftime(dataM.TIMESTAMP_FORMAT)})
+    assert engine.refresh() and engine._filter_by_period('oggi')['id'].tolist()[-1] == 8
+    dataM._session_stores.clear()
+    print("✅ Filtri per periodo: OK")
+
+
+@_in_temp_dir
+def test_chart_export():
+    """Export da riga di comando: due utenti in due processi, validazione ed errori per grafico"""
+    print("🔍 Testing export grafici...")
+    import chart_export
+
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Luca', 'materia': 'Storia', 'durata': 15, 'timestamp': '2025-01-02 11:00:00'},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+
+    charts = ['dashboard', 'materie_torta']
+    results = chart_export.export_charts(['Anna', 'Luca'], charts, output_dir='out', workers=2)
+    assert list(results) == ['Anna', 'Luca']
+    for user in ('Anna', 'Luca'):
+        assert results[user] == {chart: os.path.join('out', user, f'{chart}.png') for chart in charts}
+        for path in results[user].values():
+            assert os.path.getsize(path) > 0
+
+    for bad_args in ({'charts': ['inesistente']}, {'fmt': 'bmp'}):
+        try:
+            chart_export.export_charts(['Anna'], output_dir='out', **bad_args)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"export_charts accetta {bad_args}")
+    assert chart_export.export_charts([], output_dir='out') == {}
+
+    # Un grafico che fallisce viene riportato senza fermare gli altri
+    chart_export.CHARTS['rotto'] = lambda gen, period: gen.grafico_inesistente()
+    try:
+        results = chart_export.export_charts(['Anna'], ['rotto', 'dashboard'], output_dir='out', fmt='svg')
+    finally:
+        del chart_export.CHARTS['rotto']
+    assert results['Anna']['rotto'].startswith('ERRORE')
+    assert results['Anna']['dashboard'] == os.path.join('out', 'Anna', 'dashboard.svg')
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    print("✅ Export grafici: OK")
+
+
+@_in_temp_dir
+def test_render_cache():
+    """La cache grafici cambia chiave con le sessioni e rispetta il limite di memoria"""
+    print("🔍 Testing cache grafici...")
+    from chart_generator import RenderCache, chart_cache_key
+
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+
+    key = chart_cache_key('Anna', 'dashboard')
+    assert key == chart_cache_key('Anna', 'dashboard')
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 20,
+                                      'timestamp': '2025-01-02 10:00:00'})
+    assert chart_cache_key('Anna', 'dashboard') != key
+
+    cache = RenderCache(max_bytes=10)
+    cache.put('a', 1, 1, b'1234')
+    cache.put('b', 1, 1, b'5678')
+    assert cache.get('a') == (1, 1, b'1234')  # 'a' diventa il più recente
+    cache.put('c', 1, 1, b'9012')
+    assert cache.get('b') is None and len(cache) == 2 and cache.size == 8
+    cache.put('d', 1, 1, b'x' * 11)  # più grande del limite: non entra
+    assert cache.get('d') is None and cache.get('a') is not None
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    print("✅ Cache grafici: OK")
+
+
+@_in_temp_dir
+def test_stats_calculator():
+    """Statistiche da sessioni e da rollup coincidono; la cache segue le nuove sessioni"""
+    print("🔍 Testing statistiche sessioni...")
+    from gui_utils import StatsCalculator
+
+    today = dataM.datetime.datetime.now()
+    old = today - dataM.datetime.timedelta(days=20)
+    sessions = [
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': today.strftime('%Y-%m-%d %H:%M:%S')},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': '00:15:00', 'timestamp': old.strftime('%d/%m/%Y %H:%M:%S')},
+        {'id': 3, 'user': 'Anna', 'materia': 'Storia', 'durata': 60, 'timestamp': '2020-01-01 10:00:00'},
+    ]
+    _write_sessions(sessions)
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    StatsCalculator._user_stats_cache.clear()
+
+    stats = StatsCalculator.calculate_session_stats(sessions)
+    assert stats['total_sessions'] == 3 and stats['total_minutes'] == 105
+    assert stats['weekly_total'] == 30 and stats['monthly_total'] == 45
+    assert stats['daily_stats'] == {today.strftime('%Y-%m-%d'): 30}
+    assert stats['favorite_subject'] == 'Storia'
+    assert StatsCalculator.user_stats('Anna') == stats
+    assert StatsCalculator.user_stats('Anna') is StatsCalculator.user_stats('Anna')
+
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 40,
+                                      'timestamp': today.strftime('%Y-%m-%d %H:%M:%S')})
+    assert StatsCalculator.user_stats('Anna')['favorite_subject'] == 'Fisica'
+    assert StatsCalculator.calculate_session_stats([])['monthly_total'] == 0
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    print("✅ Statistiche sessioni: OK")
+
+
+@_in_temp_dir
+def test_records():
+    """I record con __slots__ si comportano come dict e passano per JSON e journal"""
+    print("🔍 Testing record compatti...")
+    from records import Goal, Session, columns, json_default
+
+    data = {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30,
+            'timestamp': '2025-01-01 10:00:00', 'extra': 'x'}
+    session = Session.from_dict(data)
+    assert session == data and dict(session) == data
+    assert session['materia'] == 'Fisica' and session.get('note_argomento') is None
+    assert 'note_argomento' not in session and 'extra' in session
+    assert session == Session.from_dict(data) and session != Session.from_dict(dict(data, durata=31))
+    assert session != {k: v for k, v in data.items() if k != 'extra'}
+    assert columns([session, Session(id=2, user='Luca')], ('id', 'durata', 'extra')) == {
+        'id': [1, 2], 'durata': [30, None], 'extra': ['x', None]}
+    session['note_argomento'] = 'Cinematica'
+    assert json.loads(json.dumps(session, default=json_default))['note_argomento'] == 'Cinematica'
+
+    _write_sessions([data])
+    dataM._session_stores.clear()
+    loaded = dataM.load_sessions('Anna')
+    assert isinstance(loaded[0], Session) and loaded == [data]
+
+    journal = dataM.JsonJournal('goals.json', record_type=Goal)
+    goals = journal.load()
+    goals.append(Goal({'id': 1, 'user': 'Anna', 'completato': False}))
+    journal.put(goals[-1], goals)
+    reloaded = dataM.JsonJournal('goals.json', record_type=Goal).load()
+    assert isinstance(reloaded[0], Goal) and reloaded == [{'id': 1, 'user': 'Anna', 'completato': False}]
+    journal.compact(goals)
+    with open('goals.json', encoding='utf-8') as f:
+        assert json.load(f) == [{'id': 1, 'user': 'Anna', 'completato': False}]
+    dataM._session_stores.clear()
+    print("✅ Record compatti: OK")
+
+
+@_in_temp_dir
+def test_session_table():
+    """La tabella colonnare filtra e somma come le sessioni e segue gli append"""
+    print("🔍 Testing tabella colonnare...")
+    _write_sessions([
+        {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+        {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': '00:15:30', 'timestamp': '2025-01-02 18:00:00'},
+        {'id': 3, 'user': 'Luca', 'materia': 'Fisica', 'durata': 15, 'timestamp': '02/01/2025 11:00:00'},
+        {'id': 4, 'user': 'Anna', 'materia': 'Storia', 'durata': 20, 'timestamp': 'ieri'},
+    ])
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+
+    table = dataM.get_session_table()
+    assert len(table) == 4 and table.users == ['Anna', 'Luca']
+    assert table.sum_minutes('Anna') == 65.5
+    assert table.sum_minutes('Anna', 'Storia') == 20 and table.sum_minutes('Marco') == 0
+    jan_2 = dataM.datetime.datetime(2025, 1, 2).timestamp()
+    assert table.sum_minutes('Anna', start=jan_2) == 15.5
+    assert table.sum_minutes(materia='Fisica', end=jan_2) == 30
+    assert table.minutes_by_materia('Anna', start=jan_2) == {'Fisica': 15.5}
+
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Chimica', 'durata': 10,
+                                      'timestamp': '2025-01-03 10:00:00'})
+    assert dataM.get_session_table() is table and len(table) == 5
+    assert table.minutes_by_materia('Anna', start=jan_2) == {'Fisica': 15.5, 'Chimica': 10}
+
+    # Una sessione fuori ordine entra al suo posto negli indici temporali
+    dataM.get_session_store().append({'user': 'Anna', 'materia': 'Fisica', 'durata': 5,
+                                      'timestamp': '2025-01-01 12:00:00'})
+    dataM.get_session_table()
+    assert table.sum_minutes('Anna', end=jan_2) == 35 and table.sum_minutes('Anna', 'Fisica') == 50.5
+    assert [table.ids[row] for row in table.rows('Anna', 'Fisica')] == [1, 6, 2]
+
+    _write_sessions([
+        {'id': 1, 'user': 'Luca', 'materia': 'Storia', 'durata': 5, 'timestamp': '2025-01-01 10:00:00'},
+    ])
+    assert dataM.get_session_table().sum_minutes('Anna') == 0
+    assert table.sum_minutes('Luca', 'Storia') == 5
+
+    # Le letture aspettano un refresh() in corso in un altro thread
+    import threading
+    results = []
+    with table._lock:
+        reader = threading.Thread(target=lambda: results.append(table.sum_minutes('Luca')))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive() and results == []
+    reader.join()
+    assert results == [5]
+    dataM._session_stores.clear()
+    dataM._session_tables.clear()
+    print("✅ Tabella colonnare: OK")
+
+
+_LEGACY_SESSIONS = [
+    {'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'durata': 30, 'timestamp': '2025-01-01 10:00:00'},
+    {'id': 2, 'user': 'Anna', 'materia': 'Fisica', 'durata': '01:30:00', 'timestamp': '2025-01-01 18:00:00'},
+    {'id': 3, 'user': 'Anna', 'materia': 'Storia', 'durata': 15, 'timestamp': '02/01/2025 11:00:00',
+     'note_argomento': 'Rivoluzione francese'},
+    {'id': 4, 'user': 'Anna', 'materia': 'Storia', 'durata': 5, 'timestamp': 'ieri'},
+    {'id': 5, 'user': 'Luca', 'materia': 'Fisica', 'durata': 20, 'timestamp': '2025-01-03 09:00:00'},
+]
+
+
+def _close_sqlite_storages():
+    for storage in dataM._sqlite_storages.values():
+        storage.close()
+    dataM._sqlite_storages.clear()
+    dataM._session_stores.clear()
+    dataM._session_rollups.clear()
+    dataM._session_tables.clear()
+
+
+@_in_temp_dir
+def test_sqlite_storage():
+    """Il backend SQLite salva minuti e timestamp canonici: totali uguali al rollup JSON"""
+    print("🔍 Testing backend SQLite...")
+    from sqlite_storage import SQLiteStorage
+
+    storage = SQLiteStorage('test.db')
+    try:
+        assert storage.insert_sessions(_LEGACY_SESSIONS[:4]) == 4
+        storage.insert_session(dict(_LEGACY_SESSIONS[4], id=None))
+        assert storage.next_session_id() == 6
+        assert [s['durata'] for s in storage.load_sessions('Anna')] == [30, 90, 15, 5]
+        assert storage.load_sessions('Anna')[2]['timestamp'] == '2025-01-02 11:00:00'
+        assert storage.load_sessions('Anna')[2]['note_argomento'] == 'Rivoluzione francese'
+
+        assert storage.sum_session_minutes('Anna') == 140
+        assert storage.sum_session_minutes('Anna', 'Fisica') == 120
+        # Il timestamp illeggibile resta fuori dai filtri temporali e dai giorni
+        assert storage.sum_session_minutes('Anna', since='2025-01-02 00:00:00') == 15
+        assert storage.daily_rollup('Anna') == {'Fisica': {'2025-01-01': [120, 2]},
+                                                'Storia': {'2025-01-02': [15, 1]}}
+
+        page, total = storage.load_sessions_page('Anna', 1, 2)
+        assert total == 4 and [s['id'] for s in page] == [3, 2]
+        assert [s['id'] for s in storage.load_sessions_since(3)] == [4, 5]
+        assert [s['id'] for s in storage.load_sessions_since(0, 'Luca')] == [5]
+
+        # Righe importate nei formati storici da versioni precedenti: convertite all'apertura
+        with storage.conn:
+            storage.conn.execute("UPDATE sessions SET durata = '00:45:00', timestamp = '01/01/2025 12:00' "
+                                 "WHERE id = 1")
+    finally:
+        storage.close()
+    reopened = SQLiteStorage('test.db')
+    try:
+        assert reopened.daily_rollup('Anna')['Fisica'] == {'2025-01-01': [135, 2]}
+        assert reopened.load_sessions('Anna')[0]['timestamp'] == '2025-01-01 12:00:00'
+    finally:
+        reopened.close()
+    print("✅ Backend SQLite: OK")
+
+
+@_in_temp_dir
+def test_sqlite_migration():
+    """Il migratore importa tutti i file JSON e rifiuta un database esistente"""
+    print("🔍 Testing migrazione JSON -> SQLite...")
+    from sqlite_storage import SQLiteStorage, migrate_json_to_sqlite
+
+    _write_sessions(_LEGACY_SESSIONS)
+    with open('users.txt', 'w', encoding='utf-8') as f:
+        f.write('Anna\nLuca\n')
+    with open('subjects.json', 'w') as f:
+        json.dump({'Anna': ['Fisica', 'Storia'], 'Luca': ['Fisica']}, f)
+    with open('goals.json', 'w') as f:
+        json.dump([{'id': 1, 'user': 'Anna', 'materia': 'Fisica', 'intervallo': 'giorno',
+                    'tempo_target_minuti': 60}], f)
+    # Le note in sospeso nel journal entrano nella migrazione
+    dataM.JsonJournal('progress_notes.json').put({'id': 1, 'user': 'Anna', 'materia': 'Storia',
+                                                  'argomento': 'Napoleone'}, [])
+
+    counts = migrate_json_to_sqlite('test.db')
+    assert counts == {'users': 2, 'subjects': 3, 'sessions': 5, 'goals': 1, 'notes': 1}
+    try:
+        migrate_json_to_sqlite('test.db')
+        assert False, "la migrazione non deve sovrascrivere un database esistente"
+    except FileExistsError:
+        pass
+
+    storage = SQLiteStorage('test.db')
+    try:
+        assert storage.load_users() == ['Anna', 'Luca']
+        assert storage.load_subjects() == {'Anna': ['Fisica', 'Storia'], 'Luca': ['Fisica']}
+        assert [goal['id'] for goal in storage.load_goals()] == [1]
+        assert storage.load_notes()[0]['argomento'] == 'Napoleone'
+        # Stessi totali del rollup sui file JSON, durate "HH:MM:SS" e date dd/mm comprese
+        for user in ('Anna', 'Luca'):
+            assert storage.daily_rollup(user) == dataM.load_daily_rollup(user)
+        assert storage.sum_session_minutes('Anna', 'Fisica') == dataM.sum_study_minutes('Anna', 'Fisica') == 120
+    finally:
+        storage.close()
+        dataM._session_stores.clear()
+        dataM._session_rollups.clear()
+        dataM._session_tables.clear()
+    print("✅ Migrazione SQLite: OK")
+
+
+@_in_temp_dir
+def test_storage_backend():
+    """Le funzioni di dataM passano a SQLite quando esiste timetracker.db o con TIMETRACKER_STORAGE"""
+    print("🔍 Testing scelta backend...")
+    from sqlite_storage import SQLiteStorage, migrate_json_to_sqlite
+
+    _write_sessions(_LEGACY_SESSIONS)
+    old_env = os.environ.pop('TIMETRACKER_STORAGE', None)
+    try:
+        assert dataM.get_sqlite_storage() is None
+        json_rollup = dataM.load_daily_rollup('Anna')
+        json_minutes = dataM.sum_study_minutes('Anna')
+        dataM._session_stores.clear()
+        dataM._session_rollups.clear()
+        dataM._session_tables.clear()
+
+        migrate_json_to_sqlite(dataM.DATABASE_FILE)
+        storage = dataM.get_sqlite_storage()
+        assert isinstance(storage, SQLiteStorage) and dataM.get_sqlite_storage() is storage
+        assert dataM.get_session_table().source is storage
+        assert dataM.load_daily_rollup('Anna') == json_rollup
+        assert dataM.sum_study_minutes('Anna') == json_minutes
+        assert dataM.load_user() == []
+
+        assert dataM.save_session('Luca', 'Fisica', '00:10:00')
+        assert dataM.load_sessions('Luca')[-1]['durata'] == 10
+        assert dataM.sum_study_minutes('Luca') == storage.sum_session_minutes('Luca') == 30
+        # Il file JSON non viene più toccato
+        with open(dataM.SESSIONS_FILE) as f:
+            assert len(f.readlines()) == len(_LEGACY_SESSIONS)
+        _close_sqlite_storages()
+
+        # La variabile d'ambiente crea il database anche senza migrazione
+        os.remove(dataM.DATABASE_FILE)
+        os.environ['TIMETRACKER_STORAGE'] = 'sqlite'
+        assert dataM.get_sqlite_storage() is not None and os.path.exists(dataM.DATABASE_FILE)
+        assert dataM.load_sessions('Anna') == []
+    finally:
+        if old_env is None:
+            os.environ.pop('TIMETRACKER_STORAGE', None)
+        else:
+            os.environ['TIMETRACKER_STORAGE'] = old_env
+        _close_sqlite_storages()
+    print("✅ Scelta backend: OK")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 INIZIO TEST ARCHIVIO SESSIONI")
+    print("=" * 50)
+
+    tests = [test_next_id_and_user_index, test_external_changes, test_session_cache,
+             test_load_sessions_since, test_load_sessions_page, test_session_snapshot, test_daily_rollup,
+             test_rollup_delta, test_parse_timestamp, test_json_journal, test_render_cache, test_stats_calculator,
+             test_records, test_session_table, test_goal_progress, test_note_timeline,
+             test_subject_statistics, test_note_search, test_parse_durations, test_analytics_frames, test_analytics_timestamps,
+             test_period_filter, test_chart_export, test_sqlite_storage, test_sqlite_migration, test_storage_backend]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            traceback.print_exc()
+
+    print(f"\n🎯 RISULTATO FINALE: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -8,6 +8,7 @@ import tkinter as tk
 from tkinter import messagebox
 import json
 from pathlib import Path
+import dataM
 
 class UserSelectionWindow(ctk.CTkToplevel):
     def __init__(self, parent, callback):
@@ -15,7 +16,6 @@ class UserSelectionWindow(ctk.CTkToplevel):
         
         self.callback = callback
         self.selected_user = None
-        self.users_file = Path("users.txt")
         self.config_file = Path("user_config.json")
         
         self.setup_window()
@@ -51,10 +51,7 @@ class UserSelectionWindow(ctk.CTkToplevel):
     def load_users(self):
         """Carica lista utenti e configurazione"""
         # Carica utenti
-        self.users = []
-        if self.users_file.exists():
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                self.users = [line.strip() for line in f if line.strip()]
+        self.users = dataM.load_user()
                 
         # Carica configurazione
         self.config = {"default_user": None, "auto_login": False}
@@ -76,9 +73,7 @@ class UserSelectionWindow(ctk.CTkToplevel):
     def save_users(self):
         """Salva lista utenti"""
         try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                for user in self.users:
-                    f.write(f"{user}\n")
+            dataM.save_user(self.users)
         except Exception as e:
             print(f"Errore salvataggio utenti: {e}")
             
@@ -315,7 +310,6 @@ class UserManager:
         Altrimenti mostra finestra selezione.
         """
         config_file = Path("user_config.json")
-        users_file = Path("users.txt")
         
         # Carica configurazione
         config = {"default_user": None, "auto_login": False}
@@ -327,10 +321,7 @@ class UserManager:
                 pass
                 
         # Carica utenti
-        users = []
-        if users_file.exists():
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users = [line.strip() for line in f if line.strip()]
+        users = dataM.load_user()
                 
         # Se auto-login e utente predefinito esiste
         if (config.get("auto_login") and 